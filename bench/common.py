@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+SRC_DIRECTORY = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+)
+if SRC_DIRECTORY not in sys.path:
+    sys.path.insert(0, SRC_DIRECTORY)
+
+CONFIG_SIZES = [10, 1000, 100000]
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the median duration of a function, in milliseconds.
+
+    Parameters:
+        function (Callable[[], object]): The function to measure.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: The median duration in milliseconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return sorted(durations)[len(durations) // 2]
+
+
+def synthetic_config(size: int) -> Dict[str, Any]:
+    """
+    Builds a configuration with the given number of goto and run aliases.
+
+    Parameters:
+        size (int): Number of aliases of each kind.
+
+    Returns:
+        Dict[str, Any]: The configuration data.
+    """
+    return {
+        "displayName": "bench",
+        "goto": {"dirs": {f"project-{i}": f"/tmp/project-{i}" for i in range(size)}},
+        "run": {
+            "commands": {
+                f"task-{i}": {"directory": f"/tmp/project-{i}", "command": f"make task-{i}"}
+                for i in range(size)
+            }
+        },
+    }
+
+
+def write_config(home: str, size: int) -> None:
+    """
+    Writes a synthetic configuration into an IKEIN home directory.
+
+    Parameters:
+        home (str): The IKEIN home directory.
+        size (int): Number of aliases of each kind.
+    """
+    with open(os.path.join(home, "config.json"), "w") as out_file:
+        json.dump(synthetic_config(size), out_file, indent=4)
@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import tempfile
+from typing import Dict, Iterator, List
+
+from common import CONFIG_SIZES, measure, write_config
+from ikein import execute
+from utils import config
+from utils.alias_store import STORE_THRESHOLD, lookup, sync
+from utils.config import HOME_VARIABLE, get_config, save_config
+from utils.loads import load
+
+
+@contextlib.contextmanager
+def ikein_home(size: int) -> Iterator[str]:
+    """
+    Points IKEIN_HOME to a temporary directory holding a synthetic configuration.
+
+    Parameters:
+        size (int): Number of aliases of each kind in the configuration.
+
+    Yields:
+        str: The temporary IKEIN home.
+    """
+    previous = os.environ.get(HOME_VARIABLE)
+    with tempfile.TemporaryDirectory() as home:
+        write_config(home, size)
+        os.environ[HOME_VARIABLE] = home
+        config.reload()
+        try:
+            yield home
+        finally:
+            if previous is None:
+                os.environ.pop(HOME_VARIABLE, None)
+            else:
+                os.environ[HOME_VARIABLE] = previous
+
+
+def run(sizes: List[int] = CONFIG_SIZES) -> Dict[str, float]:
+    """
+    Benchmarks the configuration, plugin loading and dispatch hot paths.
+
+    Parameters:
+        sizes (List[int]): Numbers of goto and run aliases in the configuration.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median duration in milliseconds.
+    """
+    results = {}
+    for size in sizes:
+        repeat = 20 if size < 100000 else 3
+        with ikein_home(size):
+            configuration = get_config()
+            results[f"config.read[{size}]"] = measure(config.reload, repeat)
+            results[f"config.cached[{size}]"] = measure(get_config, 100)
+
+            def save() -> None:
+                configuration["displayName"] = f"bench-{os.urandom(4).hex()}"
+                save_config(configuration)
+
+            results[f"config.save[{size}]"] = measure(save, repeat)
+            results[f"config.update[{size}]"] = measure(
+                lambda: config.update_config([(config.SET, ["goto", "dirs", "bench"], os.urandom(4).hex())]),
+                repeat,
+            )
+            config.compact()
+
+            if size >= STORE_THRESHOLD:
+                sync()
+                results[f"alias_store.sync[{size}]"] = measure(lambda: (save(), sync()), repeat)
+                results[f"alias_store.lookup[{size}]"] = measure(
+                    lambda: lookup("goto.dirs", f"project-{size // 2}"), 100
+                )
+
+            load("plugins", "goto")
+            results[f"loads.load.goto[{size}]"] = measure(lambda: load("plugins", "goto"), 20)
+            results[f"loads.load.all[{size}]"] = measure(lambda: load("plugins"), 5)
+
+            registry = load("plugins")
+            for name, args in [
+                ("goto", ["goto", f"project-{size // 2}"]),
+                ("goto.fuzzy", ["goto", f"projetc-{size // 2}"]),
+                ("run", ["run", f"task-{size // 2}"]),
+            ]:
+
+                def dispatch() -> None:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        execute(*registry, ["ikein.py", *args])
+
+                results[f"dispatch.{name}[{size}]"] = measure(dispatch, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
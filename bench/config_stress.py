@@ -0,0 +1,139 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from multiprocessing.synchronize import Event
+from typing import Dict, List
+
+from common import write_config
+from utils import config
+from utils.config import CONFIG_FILE, HOME_VARIABLE, JOURNAL_MIN_BYTES, SET, update_config
+
+# Number of aliases of each kind of the configurations updated in place and through the
+# journal, the latter being written above JOURNAL_MIN_BYTES.
+SMALL_SIZE = 10
+LARGE_SIZE = 5000
+
+
+def update_keys(home: str, worker: int, updates: int) -> None:
+    """
+    Adds goto aliases to the configuration, one update_config call per alias.
+
+    Parameters:
+        home (str): The IKEIN home holding the configuration.
+        worker (int): Index of the process, used to name its aliases.
+        updates (int): Number of aliases to add.
+    """
+    os.environ[HOME_VARIABLE] = home
+    for update in range(updates):
+        update_config([(SET, ["goto", "dirs", f"stress-{worker}-{update}"], f"/tmp/{worker}/{update}")])
+
+
+def compact_until(home: str, done: Event) -> None:
+    """
+    Compacts the journal into config.json over and over while the writers are running.
+
+    Parameters:
+        home (str): The IKEIN home holding the configuration.
+        done (Event): Set once every writer has finished.
+    """
+    os.environ[HOME_VARIABLE] = home
+    while not done.is_set():
+        config.compact()
+
+
+def missing_keys(aliases: Dict[str, str], workers: int, updates: int) -> List[str]:
+    """
+    Lists the aliases added by the writers that are not in the configuration.
+
+    Parameters:
+        aliases (Dict[str, str]): The goto aliases of the configuration.
+        workers (int): Number of writer processes.
+        updates (int): Number of aliases added by every writer.
+
+    Returns:
+        List[str]: The missing aliases.
+    """
+    return [
+        f"stress-{worker}-{update}"
+        for worker in range(workers)
+        for update in range(updates)
+        if f"stress-{worker}-{update}" not in aliases
+    ]
+
+
+def stress(size: int, workers: int, updates: int) -> List[str]:
+    """
+    Runs concurrent writers against a synthetic configuration and checks that no update is lost.
+
+    Each writer adds its own aliases with update_config while a compactor folds the
+    journal into config.json. The configuration is then checked as read by ikein, and
+    config.json alone once the journal is compacted.
+
+    Parameters:
+        size (int): Number of aliases of each kind of the initial configuration.
+        workers (int): Number of writer processes.
+        updates (int): Number of aliases added by every writer.
+
+    Returns:
+        List[str]: The failures found, empty if every update survived.
+    """
+    with tempfile.TemporaryDirectory() as home:
+        write_config(home, size)
+        os.environ[HOME_VARIABLE] = home
+        journaled = os.path.getsize(config.get_path(CONFIG_FILE)) >= JOURNAL_MIN_BYTES
+
+        done = multiprocessing.Event()
+        compactor = multiprocessing.Process(target=compact_until, args=(home, done))
+        writers = [
+            multiprocessing.Process(target=update_keys, args=(home, worker, updates))
+            for worker in range(workers)
+        ]
+        compactor.start()
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        done.set()
+        compactor.join()
+
+        failures = [
+            f"process {process.name} exited with status {process.exitcode}"
+            for process in [*writers, compactor]
+            if process.exitcode != 0
+        ]
+        mode = "journal" if journaled else "rewrite"
+        missing = missing_keys(config.reload()["goto"]["dirs"], workers, updates)
+        if missing:
+            failures.append(f"{mode}: {len(missing)} updates lost, e.g. {missing[0]}")
+
+        config.compact()
+        with open(config.get_path(CONFIG_FILE), "r") as in_file:
+            missing = missing_keys(json.load(in_file)["goto"]["dirs"], workers, updates)
+        if missing:
+            failures.append(f"{mode}: {len(missing)} updates missing from config.json after compaction")
+        return failures
+
+
+if __name__ == "__main__":
+    """
+    Concurrent writer stress test of the configuration.
+    Checks that updates made by concurrent ikein processes are never lost, both when
+    config.json is rewritten in place and when updates go through the journal. Exits
+    with status 1 if any update is lost.
+    """
+    parser = argparse.ArgumentParser(description="Stress tests concurrent configuration updates.")
+    parser.add_argument("--workers", type=int, default=8, help="number of writer processes")
+    parser.add_argument("--updates", type=int, default=50, help="updates made by every writer")
+    arguments = parser.parse_args()
+
+    failures = []
+    for size in (SMALL_SIZE, LARGE_SIZE):
+        found = stress(size, arguments.workers, arguments.updates)
+        print(f"config[{size}]: {'ok' if not found else 'FAILED'}")
+        failures.extend(found)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
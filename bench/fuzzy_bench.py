@@ -0,0 +1,118 @@
+import os
+import random
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from common import measure
+from utils import fuzzy
+from utils.config import HOME_VARIABLE
+from utils.fuzzy import build_index, get_index, search, similarity_score, subsequence_score
+
+WORDS = [
+    "api", "web", "service", "backend", "frontend", "auth", "billing", "search", "gateway",
+    "worker", "scheduler", "mobile", "payments", "profile", "catalog", "orders", "docs",
+    "infra", "deploy", "metrics", "logging", "storage", "cache", "queue", "admin",
+]
+QUERIES = ["billing-api", "biling-api", "paymnets", "srch-gw", "orders-worker-12", "zzzz"]
+
+
+def generate_aliases(count: int, seed: int = 42) -> Dict[str, str]:
+    """
+    Generates synthetic aliases made of two or three words and a number.
+
+    Parameters:
+        count (int): Number of aliases to generate.
+        seed (int): Seed of the random generator. Default is 42.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping aliases to fake directories.
+    """
+    generator = random.Random(seed)
+    aliases: Dict[str, str] = {}
+    while len(aliases) < count:
+        words = generator.sample(WORDS, generator.choice([2, 3]))
+        alias = f"{'-'.join(words)}-{generator.randint(0, 999)}"
+        aliases[alias] = f"/src/{alias}"
+    return aliases
+
+
+def linear_search(aliases: Dict[str, str], query: str, limit: int = 5) -> List[Tuple[str, float]]:
+    """
+    Baseline: scores every alias of the dictionary, without any index.
+
+    Parameters:
+        aliases (Dict[str, str]): The aliases to search.
+        query (str): The search query.
+        limit (int): Maximum number of matches to return. Default is 5.
+
+    Returns:
+        List[Tuple[str, float]]: (alias, score) pairs, sorted from best to worst.
+    """
+    query, matches = query.lower(), []
+    for alias in aliases:
+        score = subsequence_score(query, alias.lower())
+        if score is None:
+            score = similarity_score(query, alias.lower())
+        if score is not None:
+            matches.append((alias, score))
+    return sorted(matches, key=lambda match: match[1], reverse=True)[:limit]
+
+
+def cold_index(aliases: Dict[str, str], signature: Tuple[str, int]) -> Dict[str, Any]:
+    """
+    Returns the index of the aliases as a new process would, without the in-process cache.
+
+    Parameters:
+        aliases (Dict[str, str]): The aliases to index.
+        signature (Tuple[str, int]): Signature of the aliases.
+
+    Returns:
+        Dict[str, Any]: The search index, loaded from disk when it was persisted.
+    """
+    fuzzy._indexes.clear()
+    return get_index("bench", aliases, signature)
+
+
+def run(sizes: List[int] = [1000, 10000, 50000]) -> Dict[str, float]:
+    """
+    Benchmarks the fuzzy index against the linear scan baseline.
+
+    Searches are measured warm, with the index in memory, and cold, loading the index
+    persisted by a previous process first, as a new ikein process does.
+
+    Parameters:
+        sizes (List[int]): Numbers of aliases to benchmark.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median duration in milliseconds.
+    """
+    results = {}
+    previous = os.environ.get(HOME_VARIABLE)
+    with tempfile.TemporaryDirectory() as home:
+        os.environ[HOME_VARIABLE] = home
+        try:
+            for size in sizes:
+                aliases, signature = generate_aliases(size), ("bench", size)
+                index = build_index(aliases)
+                results[f"fuzzy.build[{size}]"] = measure(lambda: build_index(aliases), 3)
+                cold_index(aliases, signature)
+                results[f"fuzzy.load[{size}]"] = measure(lambda: cold_index(aliases, signature), 5)
+                for query in QUERIES:
+                    results[f"fuzzy.search[{size}:{query}]"] = measure(lambda: search(index, query), 20)
+                    results[f"fuzzy.cold[{size}:{query}]"] = measure(
+                        lambda: search(cold_index(aliases, signature), query), 5
+                    )
+                    results[f"fuzzy.linear[{size}:{query}]"] = measure(
+                        lambda: linear_search(aliases, query), 3
+                    )
+        finally:
+            if previous is None:
+                os.environ.pop(HOME_VARIABLE, None)
+            else:
+                os.environ[HOME_VARIABLE] = previous
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+from common import measure
+from plugins.git.cleanup import scan_branches
+from plugins.git.git import _get_current_branch
+from utils.git_refs import checked_out_branches, find_repository, local_branches
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@ikein",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@ikein",
+}
+
+
+def create_repository(path: str, branches: int) -> None:
+    """
+    Creates a repository with a single commit and many branches, half packed and half loose.
+
+    Parameters:
+        path (str): Directory of the repository.
+        branches (int): Number of branches to create besides main.
+    """
+    env = {**os.environ, **GIT_ENV}
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True, env=env)
+    subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", "init"], cwd=path, check=True, env=env)
+    commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=path).decode("utf-8").strip()
+
+    def update_refs(names: range) -> None:
+        commands = "".join(f"create refs/heads/feature/branch-{i} {commit}\n" for i in names)
+        subprocess.run(["git", "update-ref", "--stdin"], cwd=path, input=commands.encode(), check=True)
+
+    update_refs(range(branches // 2))
+    subprocess.run(["git", "pack-refs", "--all"], cwd=path, check=True)
+    update_refs(range(branches // 2, branches))
+
+
+def native_branches() -> List[str]:
+    """
+    The branches except the checked out ones, read with the native ref reader.
+
+    Returns:
+        List[str]: The branch names.
+    """
+    common_dir = find_repository(os.getcwd())["common_dir"]
+    checked_out = checked_out_branches(common_dir)
+    return [branch for branch in local_branches(common_dir) if branch not in checked_out]
+
+
+def legacy_current_branch() -> Optional[str]:
+    """
+    Baseline: the current branch as retrieved before the native ref reader.
+
+    Returns:
+        Optional[str]: The name of the current branch.
+    """
+    return subprocess.check_output(["git", "symbolic-ref", "--short", "-q", "HEAD"]).strip().decode("utf-8")
+
+
+def legacy_all_branches() -> List[str]:
+    """
+    Baseline: the branches except the current one, as retrieved before the native ref reader.
+
+    Returns:
+        List[str]: The branch names.
+    """
+    return (
+        subprocess.check_output("git branch | grep -v \\* | xargs", shell=True)
+        .decode("utf-8")
+        .strip()
+        .replace("*", "")
+        .split()
+    )
+
+
+def run(sizes: List[int] = [100, 10000]) -> Dict[str, float]:
+    """
+    Benchmarks the native ref reader against the git subprocess baseline, and the gbclean
+    branch scan.
+
+    Parameters:
+        sizes (List[int]): Numbers of branches to benchmark.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median duration in milliseconds.
+    """
+    results, cwd = {}, os.getcwd()
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            create_repository(path, size)
+            os.chdir(path)
+            try:
+                assert native_branches() == sorted(legacy_all_branches())
+                results[f"git.current[{size}]"] = measure(_get_current_branch, 20)
+                results[f"git.current.legacy[{size}]"] = measure(legacy_current_branch, 20)
+                results[f"git.branches[{size}]"] = measure(native_branches, 10)
+                results[f"git.branches.legacy[{size}]"] = measure(legacy_all_branches, 10)
+                results[f"git.gbclean.scan[{size}]"] = measure(lambda: scan_branches("HEAD"), 5)
+            finally:
+                os.chdir(cwd)
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
@@ -0,0 +1,103 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from common import SRC_DIRECTORY, write_config
+from utils.config import HOME_VARIABLE
+
+sys.path.insert(0, os.path.dirname(SRC_DIRECTORY))
+import installer  # noqa: E402
+
+COMMANDS = [["list"], ["goto", "project-0"], ["run", "task-0"]]
+REPEAT = 10
+
+
+def import_ms(args: List[str], env: Dict[str, str]) -> float:
+    """
+    Runs an ikein entry point with -X importtime and sums the time spent importing modules.
+
+    Parameters:
+        args (List[str]): The entry point and its arguments.
+        env (Dict[str, str]): The environment of the process.
+
+    Returns:
+        float: The total import time reported by the interpreter, in milliseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return sum(
+        int(line.split("|")[0].split(":")[1]) / 1000
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and not line.endswith("imported package")
+    )
+
+
+def median_import_ms(args: List[str], env: Dict[str, str]) -> float:
+    """
+    Returns the median import time of an ikein entry point over REPEAT runs.
+
+    Parameters:
+        args (List[str]): The entry point and its arguments.
+        env (Dict[str, str]): The environment of the process.
+
+    Returns:
+        float: The median import time in milliseconds.
+    """
+    durations = sorted(import_ms(args, env) for _ in range(REPEAT))
+    return durations[len(durations) // 2]
+
+
+def run() -> Dict[str, float]:
+    """
+    Benchmarks the time spent importing modules for a few commands, as installed from
+    source without bytecode, with the modules precompiled, and from the zip bundle.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median import time in milliseconds.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as home:
+        shutil.copy(os.path.join(SRC_DIRECTORY, "ikein.py"), root)
+        for directory in installer.DIRECTORIES_TO_COPY:
+            shutil.copytree(
+                os.path.join(SRC_DIRECTORY, directory),
+                os.path.join(root, directory),
+                ignore=shutil.ignore_patterns("__pycache__"),
+            )
+        write_config(home, 10)
+        env = {**os.environ, HOME_VARIABLE: home}
+        script = os.path.join(root, "ikein.py")
+        subprocess.run(
+            [sys.executable, "-B", script, "--build-manifest"], env=env, stderr=subprocess.DEVNULL, check=True
+        )
+
+        for command in COMMANDS:
+            results[f"import.source.{command[0]}"] = median_import_ms(["-B", script, *command], env)
+
+        with open(os.devnull, "w") as devnull:
+            sys.stdout, stdout = devnull, sys.stdout
+            try:
+                installer.compile_sources(root, installer.DIRECTORIES_TO_COPY)
+                installer.build_bundle(root)
+            finally:
+                sys.stdout = stdout
+        for command in COMMANDS:
+            results[f"import.compiled.{command[0]}"] = median_import_ms([script, *command], env)
+            results[f"import.bundle.{command[0]}"] = median_import_ms(
+                [os.path.join(root, installer.BUNDLE_FILE), *command], env
+            )
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
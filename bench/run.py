@@ -0,0 +1,158 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+
+BENCH_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(BENCH_DIRECTORY, "results.json")
+BASELINE_FILE = os.path.join(BENCH_DIRECTORY, "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_ROUNDS = 3
+MIN_DIFFERENCE_MS = 0.1
+
+
+def discover() -> List[str]:
+    """
+    Lists the benchmark modules of the bench directory.
+
+    Every module named *_bench.py must expose a run() function returning a dictionary
+    that maps benchmark names to their median duration in milliseconds.
+
+    Returns:
+        List[str]: The module names, sorted.
+    """
+    return sorted(
+        os.path.basename(path)[: -len(".py")]
+        for path in glob.glob(os.path.join(BENCH_DIRECTORY, "*_bench.py"))
+    )
+
+
+def run_benchmarks(modules: List[str], rounds: int) -> Dict[str, float]:
+    """
+    Runs the given benchmark modules several times, keeping the best median of every benchmark.
+
+    Keeping the best round filters out the slowdowns caused by other processes, which
+    makes the results comparable between runs.
+
+    Parameters:
+        modules (List[str]): Names of the benchmark modules to run.
+        rounds (int): Number of times every module is run.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their best median duration in milliseconds.
+    """
+    sys.path.insert(0, BENCH_DIRECTORY)
+    results: Dict[str, float] = {}
+    for module in modules:
+        start = time.perf_counter()
+        print(f"Running {module}...", file=sys.stderr, flush=True)
+        for _ in range(rounds):
+            for name, duration in importlib.import_module(module).run().items():
+                results[name] = min(duration, results.get(name, duration))
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr, flush=True)
+    return results
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[str]:
+    """
+    Prints every benchmark next to its baseline and returns the regressions.
+
+    A benchmark regresses when it is slower than its baseline by more than the threshold
+    ratio and by more than MIN_DIFFERENCE_MS, which filters out noise on tiny timings.
+
+    Parameters:
+        results (Dict[str, float]): The current results.
+        baseline (Dict[str, float]): The baseline results.
+        threshold (float): Relative slowdown tolerated, e.g. 0.25 for 25%.
+
+    Returns:
+        List[str]: The names of the regressed benchmarks.
+    """
+    regressions = []
+    for name, duration in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<50} {duration:10.3f} ms {'(new)':>22}")
+            continue
+        change = (duration - previous) / previous if previous else 0.0
+        regressed = change > threshold and duration - previous > MIN_DIFFERENCE_MS
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<50} {duration:10.3f} ms {previous:10.3f} ms {change:+8.1%}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def write_results(path: str, results: Dict[str, float]) -> None:
+    """
+    Writes benchmark results, with the environment they were measured in, as JSON.
+
+    Parameters:
+        path (str): The output file.
+        results (Dict[str, float]): The benchmark results.
+    """
+    document: Dict[str, Any] = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w") as out_file:
+        json.dump(document, out_file, indent=4)
+
+
+def read_results(path: str) -> Dict[str, float]:
+    """
+    Reads the results of a previous benchmark run.
+
+    Parameters:
+        path (str): The results file.
+
+    Returns:
+        Dict[str, float]: The benchmark results, or an empty dictionary if the file does not exist.
+    """
+    try:
+        with open(path, "r") as in_file:
+            return json.load(in_file)["results"]
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == "__main__":
+    """
+    Benchmark runner.
+    Runs every benchmark module, or the given ones, writes the results to results.json
+    and compares them against baseline.json, exiting with status 1 on regressions.
+    """
+    parser = argparse.ArgumentParser(description="Runs the I.K.E.I.N. benchmarks.")
+    parser.add_argument("modules", nargs="*", help="benchmark modules to run, e.g. config_bench")
+    parser.add_argument("--output", default=RESULTS_FILE, help="file the results are written to")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="times every module is run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="tolerated slowdown ratio")
+    arguments = parser.parse_args()
+
+    modules = arguments.modules or discover()
+    unknown = sorted(set(modules) - set(discover()))
+    if unknown:
+        parser.error(f"unknown benchmark modules: {', '.join(unknown)}")
+
+    results = run_benchmarks(modules, arguments.rounds)
+    write_results(arguments.output, results)
+    if arguments.save_baseline:
+        write_results(arguments.baseline, results)
+        print(f"Baseline saved to {arguments.baseline}")
+        sys.exit(0)
+
+    regressions = compare(results, read_results(arguments.baseline), arguments.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed by more than {arguments.threshold:.0%}.")
+        sys.exit(1)
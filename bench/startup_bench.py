@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from common import CONFIG_SIZES, SRC_DIRECTORY, measure, write_config
+from utils.config import HOME_VARIABLE
+
+COMMANDS = [["list"], ["goto", "project-0"], ["run", "task-0"]]
+BATCH_SIZE = 30
+
+
+def run(sizes: List[int] = CONFIG_SIZES) -> Dict[str, float]:
+    """
+    Benchmarks cold ikein.py invocations, from interpreter start to exit, and a batch of
+    BATCH_SIZE goto commands run by a single invocation.
+
+    Parameters:
+        sizes (List[int]): Numbers of goto and run aliases in the configuration.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median duration in milliseconds.
+    """
+    script = os.path.join(SRC_DIRECTORY, "ikein.py")
+    results = {
+        "startup.python": measure(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), 10)
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as home:
+            write_config(home, size)
+            env = {**os.environ, HOME_VARIABLE: home}
+            for command in COMMANDS:
+
+                def invoke() -> None:
+                    subprocess.run(
+                        [sys.executable, script, *command],
+                        env=env,
+                        stdout=subprocess.DEVNULL,
+                        check=True,
+                    )
+
+                invoke()
+                results[f"startup.{command[0]}[{size}]"] = measure(invoke, 10 if size < 100000 else 3)
+
+            batch = "".join(f"goto project-{i}\n" for i in range(BATCH_SIZE))
+
+            def invoke_batch() -> None:
+                subprocess.run(
+                    [sys.executable, script, "--batch"],
+                    input=batch,
+                    text=True,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+
+            results[f"startup.batch{BATCH_SIZE}.goto[{size}]"] = measure(
+                invoke_batch, 10 if size < 100000 else 3
+            )
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+from common import SRC_DIRECTORY
+
+PRODUCER = """
+import sys
+sys.path.insert(0, {src!r})
+from utils.bash import printsh
+from utils.wrapper import emit_command
+for i in range(int(sys.argv[1])):
+    printsh(f"\\t- alias-{{i}}: /home/user/projects/alias-{{i}}")
+emit_command("cd /tmp")
+"""
+
+LEGACY_WRAPPER = """
+in_command_block=false
+command=""
+python3 "$producer" "$@" | while read -r line; do
+    if [[ "$line" == "<<START_COMMAND>>" ]]; then
+        in_command_block=true
+        command=""
+    elif [[ "$line" == "<<END_COMMAND>>" ]]; then
+        in_command_block=false
+    else
+        if [[ "$in_command_block" == false ]]; then
+            echo "$line"
+        else
+            command+="$line"$'\\n'
+        fi
+    fi
+done
+eval "$command"
+"""
+
+FRAMED_WRAPPER = """
+command=""
+{ command=$(IKEIN_COMMAND_FD=3 python3 "$producer" "$@" 3>&1 1>&4 4>&-); } 4>&1
+eval "$command"
+"""
+
+
+def measure(wrapper: str, producer: str, lines: int, repeat: int) -> float:
+    """
+    Returns the median duration of a wrapper run, in milliseconds.
+
+    Parameters:
+        wrapper (str): The bash source of the wrapper.
+        producer (str): Path of the script producing the output and the command.
+        lines (int): Number of output lines the producer prints.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: The median duration in milliseconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            ["bash", "-c", wrapper, "wrapper", str(lines)],
+            env={**os.environ, "producer": producer},
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        durations.append((time.perf_counter() - start) * 1000)
+    return sorted(durations)[len(durations) // 2]
+
+
+def run(sizes: List[int] = [0, 100, 1000, 10000]) -> Dict[str, float]:
+    """
+    Benchmarks the fd-based command protocol against the legacy marker scanning loop.
+
+    Parameters:
+        sizes (List[int]): Numbers of output lines to benchmark.
+
+    Returns:
+        Dict[str, float]: Dictionary mapping benchmark names to their median duration in milliseconds.
+    """
+    results = {}
+    with tempfile.NamedTemporaryFile("w", suffix=".py") as producer:
+        producer.write(PRODUCER.format(src=SRC_DIRECTORY))
+        producer.flush()
+        for size in sizes:
+            results[f"wrapper.markers[{size}]"] = measure(LEGACY_WRAPPER, producer.name, size, 5)
+            results[f"wrapper.fd[{size}]"] = measure(FRAMED_WRAPPER, producer.name, size, 5)
+    return results
+
+
+if __name__ == "__main__":
+    for name, duration in run().items():
+        print(f"{name:<50} {duration:10.3f} ms")
@@ -1,82 +1,265 @@
 import argparse
+import compileall
+import hashlib
 import json
 import os
 import shutil
 import subprocess
-from typing import List
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
-SRC_DIRECTORY = "src"
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
 CONSOLE_FILE = ".zshrc"
 
-FILES_TO_COPY = ["ikein.py", "ikein.sh"]
+FILES_TO_COPY = ["ikein.py", "ikein.sh", "client.py", "complete.py", "completion.sh"]
 DIRECTORIES_TO_COPY = ["plugins", "utils"]
 ALIAS_NAME = "ikein"
 CONFIGURATION_FILE = "config.json"
+BUNDLE_FILE = "ikein.pyz"
+INSTALL_MANIFEST = "install.json"
+INSTALL_WORKERS = 8
+STAGING_SUFFIX = ".staging"
+PREVIOUS_SUFFIX = ".previous"
 
+sys.path.insert(0, SRC_DIRECTORY)
+from utils import config  # noqa: E402
+from utils.migrations import merge_defaults  # noqa: E402
 
-def initialize(root_path: str, purge: bool) -> None:
+
+def hash_file(file_path: str) -> str:
+    """
+    Computes the SHA-256 digest of a file.
+
+    Parameters:
+        file_path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
     """
-    Initializes the setup by creating the root directory and copying required files and directories.
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    If the 'purge' flag is set, it will delete the existing root directory before creating it again.
+
+def list_sources(base_path: str) -> List[str]:
+    """
+    Lists the files to install, FILES_TO_COPY and every file of DIRECTORIES_TO_COPY except bytecode.
 
     Parameters:
-        root_path (str): The path where the root directory will be created.
-        purge (bool): Flag to indicate if the existing directory should be deleted before creating a new one.
+        base_path (str): The directory holding the files, i.e. the sources or an installation.
 
     Returns:
-        None
+        List[str]: The existing file paths, relative to the base path and '/'-separated, sorted.
     """
-    create_root_directory(root_path, purge)
-    copy(root_path, FILES_TO_COPY, is_directory=False)
-    copy(root_path, DIRECTORIES_TO_COPY, is_directory=True)
+    files = [item_path for item_path in FILES_TO_COPY if os.path.isfile(os.path.join(base_path, item_path))]
+    for directory in DIRECTORIES_TO_COPY:
+        for current, directories, filenames in os.walk(os.path.join(base_path, directory)):
+            directories[:] = [name for name in directories if name != "__pycache__"]
+            relative = os.path.relpath(current, base_path).replace(os.sep, "/")
+            files.extend(f"{relative}/{filename}" for filename in filenames if not filename.endswith(".pyc"))
+    return sorted(files)
 
 
-def create_root_directory(root_path: str, purge: bool) -> None:
+def hash_files(base_path: str, file_paths: List[str]) -> Dict[str, str]:
     """
-    Creates the root directory at the specified path. If the directory exists and 'purge' is True,
-    it will be deleted and recreated.
+    Hashes several files concurrently.
 
     Parameters:
-        root_path (str): The path where the root directory will be created.
-        purge (bool): Flag to indicate if the existing directory should be deleted before creating a new one.
+        base_path (str): The directory holding the files.
+        file_paths (List[str]): The file paths, relative to the base path.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping every file path to its SHA-256 digest.
+    """
+    with ThreadPoolExecutor(max_workers=INSTALL_WORKERS) as executor:
+        digests = executor.map(lambda file_path: hash_file(os.path.join(base_path, file_path)), file_paths)
+        return dict(zip(file_paths, digests))
+
+
+def read_installed_hashes(root_path: str, file_paths: List[str]) -> Dict[str, str]:
+    """
+    Reads the digests of the installed files from the install manifest.
+
+    Installations made before the install manifest existed are hashed instead, limited to
+    the files about to be installed, since the other files were added by the user.
+
+    Parameters:
+        root_path (str): The root path where IKEIN is installed.
+        file_paths (List[str]): The files about to be installed.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping every file installed by the installer to its SHA-256 digest.
+    """
+    try:
+        with open(os.path.join(root_path, INSTALL_MANIFEST), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        existing = [file_path for file_path in file_paths if os.path.isfile(os.path.join(root_path, file_path))]
+        return hash_files(root_path, existing)
+
+
+def install_file(source_path: str, target_path: str) -> None:
+    """
+    Copies a file with its metadata, creating its parent directories.
+
+    Parameters:
+        source_path (str): The path of the file to copy.
+        target_path (str): The path of the copy.
 
     Returns:
         None
     """
-    if os.path.exists(root_path) and purge:
-        shutil.rmtree(root_path)
-        print(f"Deleting '{root_path}' directory...")
-    if not os.path.exists(root_path):
-        os.makedirs(root_path)
-    print(f"Creating '{root_path}' directory...")
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    shutil.copy2(source_path, target_path)
 
 
-def copy(root_path: str, item_paths: List[str], is_directory: bool) -> None:
+def link_file(source_path: str, target_path: str) -> None:
     """
-    Copies files or directories from the source to the root path.
+    Hard-links an unchanged installed file into the staging directory, copying it if linking fails.
 
     Parameters:
-        root_path (str): The root path where the items will be copied.
-        item_paths (List[str]): A list of file or directory names to copy.
-        is_directory (bool): Flag to indicate if the items are directories (True) or files (False).
+        source_path (str): The path of the installed file.
+        target_path (str): The path in the staging directory.
 
     Returns:
         None
     """
-    for item_path in item_paths:
-        print(f"Copying '{item_path}' to {root_path}...")
-        if is_directory:
-            shutil.copytree(
-                os.path.join(SRC_DIRECTORY, item_path),
-                os.path.join(root_path, item_path),
-                dirs_exist_ok=True,
-            )
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copy2(source_path, target_path)
+
+
+def stage(
+    root_path: str,
+    staging_path: str,
+    sources: Dict[str, str],
+    installed: Dict[str, str],
+    items: List[str],
+    keep_user_files: bool,
+) -> None:
+    """
+    Builds the new version of the given top-level files and directories in the staging directory.
+
+    Changed files are copied from the sources, and unchanged files, together with their
+    bytecode, are linked from the installation, both with a pool of threads. Files the
+    installer did not install, such as the user's own plugins, are linked too. The staged
+    directories are then compiled, which only compiles the changed modules.
+
+    Parameters:
+        root_path (str): The root path where IKEIN is installed.
+        staging_path (str): The staging directory, next to the root path.
+        sources (Dict[str, str]): Dictionary mapping every file to install to its digest.
+        installed (Dict[str, str]): Dictionary mapping every installed file to its digest.
+        items (List[str]): The top-level files and directories to stage.
+        keep_user_files (bool): Flag to indicate if the files added by the user to the installation should be kept.
+
+    Returns:
+        None
+    """
+    tasks = []
+    for file_path, digest in sources.items():
+        if file_path.split("/")[0] not in items:
+            continue
+        target_path = os.path.join(staging_path, file_path)
+        if installed.get(file_path) == digest:
+            tasks.append((link_file, os.path.join(root_path, file_path), target_path))
+            cache_path = os.path.join(os.path.dirname(file_path), "__pycache__")
+            module = os.path.splitext(os.path.basename(file_path))[0]
+            if file_path.endswith(".py") and os.path.isdir(os.path.join(root_path, cache_path)):
+                for cached in os.listdir(os.path.join(root_path, cache_path)):
+                    if cached.split(".")[0] == module:
+                        tasks.append(
+                            (
+                                link_file,
+                                os.path.join(root_path, cache_path, cached),
+                                os.path.join(staging_path, cache_path, cached),
+                            )
+                        )
         else:
-            shutil.copy(
-                os.path.join(SRC_DIRECTORY, item_path),
-                os.path.join(root_path, item_path),
-            )
+            tasks.append((install_file, os.path.join(SRC_DIRECTORY, file_path), target_path))
+    for file_path in list_sources(root_path) if keep_user_files else []:
+        if file_path.split("/")[0] in items and file_path not in sources and file_path not in installed:
+            tasks.append((link_file, os.path.join(root_path, file_path), os.path.join(staging_path, file_path)))
+
+    with ThreadPoolExecutor(max_workers=INSTALL_WORKERS) as executor:
+        for future in [executor.submit(*task) for task in tasks]:
+            future.result()
+    compile_sources(staging_path, [item for item in items if item in DIRECTORIES_TO_COPY])
+
+
+def initialize(root_path: str, purge: bool) -> None:
+    """
+    Installs or updates the files of IKEIN, copying only the files that changed.
+
+    The sources are hashed and compared with the install manifest of the installation.
+    The top-level files and directories holding changes are built in a staging directory
+    next to the root path, and only then swapped in, each with a rename, so a failed
+    update leaves the installation untouched and running calls never see a half-copied
+    directory. User data such as config.json is left in place.
+
+    If the 'purge' flag is set, the whole root directory is staged anew and swapped in,
+    which also discards the user data.
+
+    Parameters:
+        root_path (str): The path where the root directory will be created.
+        purge (bool): Flag to indicate if the existing directory should be deleted before creating a new one.
+
+    Returns:
+        None
+    """
+    staging_path, previous_path = f"{root_path}{STAGING_SUFFIX}", f"{root_path}{PREVIOUS_SUFFIX}"
+    for path in (staging_path, previous_path):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+
+    sources = hash_files(SRC_DIRECTORY, list_sources(SRC_DIRECTORY))
+    fresh = purge or not os.path.exists(root_path)
+    installed = {} if fresh else read_installed_hashes(root_path, list(sources))
+    changed = {
+        file_path.split("/")[0]
+        for file_path in {*sources, *installed}
+        if sources.get(file_path) != installed.get(file_path)
+    }
+    if not changed:
+        print(f"'{root_path}' is up to date.")
+        return
+
+    print(f"Staging {len(changed)} changed item(s) in '{staging_path}'...")
+    os.makedirs(staging_path)
+    stage(root_path, staging_path, sources, installed, sorted(changed), not fresh)
+    with open(os.path.join(staging_path, INSTALL_MANIFEST), "w") as f:
+        json.dump(sources, f, indent=4)
+
+    if fresh:
+        if os.path.exists(root_path):
+            print(f"Deleting '{root_path}' directory...")
+            os.rename(root_path, previous_path)
+        os.rename(staging_path, root_path)
+        print(f"Created '{root_path}' directory.")
+    else:
+        os.makedirs(previous_path)
+        for item in sorted(changed, key=lambda item: item in FILES_TO_COPY):
+            print(f"Updating '{item}'...")
+            if item in DIRECTORIES_TO_COPY:
+                if os.path.exists(os.path.join(root_path, item)):
+                    os.rename(os.path.join(root_path, item), os.path.join(previous_path, item))
+                if os.path.exists(os.path.join(staging_path, item)):
+                    os.rename(os.path.join(staging_path, item), os.path.join(root_path, item))
+            elif os.path.exists(os.path.join(staging_path, item)):
+                os.replace(os.path.join(staging_path, item), os.path.join(root_path, item))
+            elif os.path.exists(os.path.join(root_path, item)):
+                os.remove(os.path.join(root_path, item))
+        os.replace(os.path.join(staging_path, INSTALL_MANIFEST), os.path.join(root_path, INSTALL_MANIFEST))
+        shutil.rmtree(staging_path)
+    if os.path.exists(previous_path):
+        shutil.rmtree(previous_path)
 
 
 def add_execution_permision(script_path: str) -> None:
@@ -150,11 +333,127 @@ def clear_alias(alias_name: str) -> None:
         print(f"The alias '{alias_name}' does not exist in the {CONSOLE_FILE} file.")
 
 
+def add_completion(completion_path: str) -> None:
+    """
+    Adds the ikein tab completion to the shell configuration file.
+
+    The completion script is sourced from the .zshrc file, unless it already is.
+
+    Parameters:
+        completion_path (str): The path of the completion script.
+
+    Returns:
+        None
+    """
+    source_command = f"source {completion_path}"
+    with open(os.path.expanduser(f"~/{CONSOLE_FILE}"), "r") as f:
+        if any(line.strip() == source_command for line in f):
+            print(f"Completion is already enabled in the {CONSOLE_FILE} file.")
+            return
+    print(f"Enabling completion with '{source_command}'...")
+    subprocess.run(f"echo \"{source_command}\" >> ~/{CONSOLE_FILE}", shell=True)
+
+
+def build_manifest(script_path: str) -> None:
+    """
+    Generates the command manifest used to import only the plugin that owns a command.
+
+    Parameters:
+        script_path (str): The path of the installed ikein.py script.
+
+    Returns:
+        None
+    """
+    print("Building command manifest...")
+    subprocess.run(f"python3 {script_path} --build-manifest", shell=True)
+
+
+def compile_sources(root_path: str, directories: List[str]) -> None:
+    """
+    Precompiles the installed modules, so the first call after an install does not compile them.
+
+    The bytecode is written to the __pycache__ directories next to the sources, for the
+    optimization level of the plain python3 interpreter the wrapper runs. Modules whose
+    bytecode is up to date are not compiled again.
+
+    Parameters:
+        root_path (str): The directory holding the module directories, i.e. an installation or a staging directory.
+        directories (List[str]): The module directories to compile.
+
+    Returns:
+        None
+    """
+    if directories:
+        print("Compiling modules...")
+    for directory in directories:
+        compileall.compile_dir(os.path.join(root_path, directory), quiet=1, workers=0)
+
+
+def build_bundle(root_path: str) -> None:
+    """
+    Packs ikein.py, the utilities and the plugins into a single zip application.
+
+    Every module is stored with its compiled bytecode next to its source, so the bundle is
+    imported without compiling anything and without looking up many small files. The
+    source is only compiled if the bytecode does not match the running interpreter.
+    ikein.sh runs the bundle instead of ikein.py when it exists. The bundle is a snapshot
+    of the installed modules and is rebuilt by the installer.
+
+    Parameters:
+        root_path (str): The root path where IKEIN is installed.
+
+    Returns:
+        None
+    """
+    print(f"Building '{BUNDLE_FILE}'...")
+    with tempfile.TemporaryDirectory() as build_path:
+        shutil.copy(os.path.join(root_path, "ikein.py"), os.path.join(build_path, "__main__.py"))
+        for directory in DIRECTORIES_TO_COPY:
+            shutil.copytree(
+                os.path.join(root_path, directory),
+                os.path.join(build_path, directory),
+                ignore=shutil.ignore_patterns("__pycache__"),
+            )
+            # zipimport does not support namespace packages.
+            open(os.path.join(build_path, directory, "__init__.py"), "a").close()
+        bundle_path = os.path.join(root_path, BUNDLE_FILE)
+        compileall.compile_dir(build_path, quiet=1, legacy=True, ddir=bundle_path)
+
+        with zipfile.ZipFile(f"{bundle_path}.tmp", "w", zipfile.ZIP_STORED) as bundle:
+            for directory, _, files in sorted(os.walk(build_path)):
+                for filename in sorted(files):
+                    if filename.endswith((".py", ".pyc")):
+                        path = os.path.join(directory, filename)
+                        bundle.write(path, os.path.relpath(path, build_path))
+        os.replace(f"{bundle_path}.tmp", bundle_path)
+
+
+def remove_bundle(root_path: str) -> None:
+    """
+    Removes the zip application left by a previous install, which would run outdated modules.
+
+    Parameters:
+        root_path (str): The root path where IKEIN is installed.
+
+    Returns:
+        None
+    """
+    bundle_path = os.path.join(root_path, BUNDLE_FILE)
+    if os.path.exists(bundle_path):
+        print(f"Removing '{BUNDLE_FILE}'...")
+        os.remove(bundle_path)
+
+
 def update_configuration_file(root_path: str) -> None:
     """
-    Updates the configuration file by merging the local and existing configuration files.
+    Updates the configuration file, upgrading it to the current configuration version.
 
-    If the configuration file doesn't exist, it is created.
+    If the configuration file doesn't exist, it is created from the local one. Otherwise
+    it goes through the same migrations as at runtime, and the settings of the local
+    configuration it lacks are merged into it, section by section. The configuration is
+    read with its journaled updates and saved under the configuration lock, like any
+    other update, so a running ikein or daemon never loses changes. The file is only
+    rewritten if it changed.
 
     Parameters:
         root_path (str): The root path where the configuration file will be updated.
@@ -163,30 +462,35 @@ def update_configuration_file(root_path: str) -> None:
         None
     """
     ikein_config_file = os.path.join(root_path, CONFIGURATION_FILE)
-    local_config_file = os.path.join("src", CONFIGURATION_FILE)
+    local_config_file = os.path.join(SRC_DIRECTORY, CONFIGURATION_FILE)
 
     if not os.path.exists(ikein_config_file):
         print("Creating configuration file...")
         os.makedirs(os.path.dirname(ikein_config_file), exist_ok=True)
         with open(local_config_file, "r") as src:
-            with open(ikein_config_file, "w") as dest:
-                dest.write(src.read())
+            config.atomic_write(ikein_config_file, src.read())
         return
 
     with open(local_config_file, "r") as src:
         local_config = json.load(src)
 
-    with open(ikein_config_file, "r") as dest:
-        ikein_config = json.load(dest)
-
-    merged_config = {
-        **local_config,
-        **ikein_config,
-    }
-
-    with open(ikein_config_file, "w") as dest:
-        print("Updating configuration file...")
-        json.dump(merged_config, dest, indent=4)
+    previous_home = os.environ.get(config.HOME_VARIABLE)
+    os.environ[config.HOME_VARIABLE] = root_path
+    try:
+        with config.config_lock():
+            ikein_config = config.reload()
+            merge_defaults(ikein_config, local_config)
+            if not config.is_dirty(ikein_config):
+                print("Configuration file is up to date.")
+                return
+
+            print("Updating configuration file...")
+            config.save_config(ikein_config)
+    finally:
+        if previous_home is None:
+            os.environ.pop(config.HOME_VARIABLE, None)
+        else:
+            os.environ[config.HOME_VARIABLE] = previous_home
 
 
 if __name__ == "__main__":
@@ -194,10 +498,11 @@ if __name__ == "__main__":
     Main entry point for the script.
 
     This script initializes the setup by creating the root directory, copying necessary files and directories,
-    adding execution permissions to the main script, setting up an alias for easy access, and updating the configuration file.
+    adding execution permissions to the main script, precompiling the modules, setting up an alias for easy access, enabling tab completion, and updating the configuration file.
 
     Command-line Arguments:
         --purge (optional): If set, deletes the existing root directory before creating a new one.
+        --bundle (optional): If set, also packs the modules into a zip application for faster startup.
 
     Returns:
         None
@@ -206,6 +511,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--purge", action="store_true", help="Activates purge mode", required=False
     )
+    parser.add_argument(
+        "--bundle", action="store_true", help="Builds a zip application", required=False
+    )
     args = parser.parse_args()
 
     entry_point = "ikein.sh"
@@ -213,5 +521,11 @@ if __name__ == "__main__":
     script_path = os.path.join(root_path, entry_point)
     initialize(root_path, args.purge)
     add_execution_permision(script_path)
+    if args.bundle:
+        build_bundle(root_path)
+    else:
+        remove_bundle(root_path)
+    build_manifest(os.path.join(root_path, "ikein.py"))
     add_alias(script_path)
+    add_completion(os.path.join(root_path, "completion.sh"))
     update_configuration_file(root_path)
@@ -0,0 +1,54 @@
+import json
+import os
+import socket
+import sys
+
+from utils.wrapper import emit_command, get_socket_path, is_own_socket
+
+
+def request(args: list[str], cwd: str) -> dict | None:
+    """
+    Sends a command to the running daemon and returns its response.
+
+    The environment of the client is sent along, so the command runs with the same
+    variables as it would in a fresh ikein.py process. It runs on every command while the
+    daemon is up, so neither typing nor the rest of ikein is imported.
+
+    Parameters:
+        args (list[str]): Command-line arguments, without the program name.
+        cwd (str): Working directory in which the command must be executed.
+
+    Returns:
+        dict | None: The decoded response, or None if the daemon is not reachable or its socket is not owned by the current user.
+    """
+    path = get_socket_path()
+    if not is_own_socket(path):
+        return None
+    payload = {"args": args, "cwd": cwd, "env": dict(os.environ)}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            client.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with client.makefile("rb") as reader:
+                return json.loads(reader.readline())
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    """
+    Thin client for the ikein daemon.
+    Forwards the command line to the daemon and prints its output. When the daemon is not
+    reachable, or the command needs interactive input or must run in the foreground, it
+    replaces itself with ikein.py.
+    """
+    response = request(sys.argv[1:], os.getcwd())
+
+    if response is None or response["fallback"]:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ikein.py")
+        os.execv(sys.executable, [sys.executable, script, *sys.argv[1:]])
+
+    sys.stderr.write(response["error"])
+    sys.stdout.write(response["output"])
+    if response.get("command") is not None:
+        emit_command(response["command"])
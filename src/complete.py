@@ -0,0 +1,14 @@
+import os
+import sys
+
+from utils.completion import complete
+
+if __name__ == "__main__":
+    """
+    Tab completion backend called by completion.sh.
+    Prints the candidates of the word at the given position of an ikein command line, one
+    per line. Candidates come from the completion cache, so no plugin is imported.
+    Usage: complete.py <position> [words...]
+    """
+    candidates = complete(int(sys.argv[1]), sys.argv[2:], os.getcwd())
+    sys.stdout.write("".join(f"{candidate}\n" for candidate in candidates))
@@ -0,0 +1,47 @@
+#!/bin/bash
+
+# Tab completion for ikein in zsh and bash. The candidates are printed by complete.py,
+# which reads them from a precomputed cache instead of importing the plugins.
+
+if [[ -n "$ZSH_VERSION" ]]; then
+    ikein_completion_dir="${${(%):-%x}:A:h}"
+else
+    ikein_completion_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+fi
+
+# Usage: _ikein_candidates <position> [words...], where words follow 'ikein'.
+_ikein_candidates() {
+    python3 -S "$ikein_completion_dir/complete.py" "$@" 2>/dev/null
+}
+
+if [[ -n "$ZSH_VERSION" ]]; then
+    _ikein() {
+        local -a candidates
+        candidates=(${(f)"$(_ikein_candidates $((CURRENT - 2)) "${(@)words[2,CURRENT]}")"})
+        compadd -a candidates
+    }
+
+    # Unless complete_aliases is set, zsh expands the ikein alias before completing, so
+    # the command line being completed is 'source ~/ikein/ikein.sh ...'.
+    _ikein_source() {
+        if [[ "${words[2]}" == */ikein.sh ]]; then
+            shift words
+            (( CURRENT-- ))
+            _ikein
+        else
+            _source
+        fi
+    }
+
+    if (( $+functions[compdef] )); then
+        compdef _ikein ikein
+        compdef _ikein_source source
+    fi
+else
+    _ikein() {
+        local IFS=$'\n'
+        COMPREPLY=($(_ikein_candidates $((COMP_CWORD - 1)) "${COMP_WORDS[@]:1:COMP_CWORD}"))
+    }
+
+    complete -o default -F _ikein ikein
+fi
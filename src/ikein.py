@@ -1,39 +1,97 @@
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from utils import profile
 from utils.core import LIST_METHOD
-from utils.loads import load
+from utils.loads import build_manifest, load
+from utils.wrapper import emit_command
 
+SERVE_FLAG = "--serve"
+BUILD_MANIFEST_FLAG = "--build-manifest"
+BATCH_FLAG = "--batch"
 
-def main(ikein_info: Dict, ikein_methods: Dict, methods: Dict, args: List[str]) -> None:
+
+def execute(ikein_info: Dict, ikein_methods: Dict, methods: Dict, args: List[str]) -> str:
     """
-    Main function that executes a command based on the provided arguments.
+    Executes a command based on the provided arguments and returns the shell command to run.
 
     Parameters:
         ikein_info (Dict): General information about the available methods.
         ikein_methods (Dict): Dictionary containing application-specific methods.
         methods (Dict): Dictionary containing other general available methods.
         args (List[str]): List of command-line arguments.
+
+    Returns:
+        str: The shell command produced by the executed method.
     """
     command: str = args[1] if len(args) > 1 else LIST_METHOD
 
+    if command in ikein_methods:
+        return ikein_methods[command]["method"](ikein_info, *args[2:])
+    return methods[command]["method"](*args[2:])
+
+
+def run(ikein_info: Dict, ikein_methods: Dict, methods: Dict, args: List[str]) -> Optional[str]:
+    """
+    Executes a command based on the provided arguments, printing the error if it fails.
+
+    Parameters:
+        ikein_info (Dict): General information about the available methods.
+        ikein_methods (Dict): Dictionary containing application-specific methods.
+        methods (Dict): Dictionary containing other general available methods.
+        args (List[str]): List of command-line arguments.
+
+    Returns:
+        Optional[str]: The shell command produced by the executed method, or None if it failed.
+    """
     try:
-        if command in ikein_methods:
-            output_command = ikein_methods[command]["method"](ikein_info, *args[2:])
-        else:
-            output_command = methods[command]["method"](*args[2:])
-
-        print("<<START_COMMAND>>")
-        print(output_command)
-        print("<<END_COMMAND>>")
+        with profile.phase("dispatch"):
+            return execute(ikein_info, ikein_methods, methods, args)
     except Exception as e:
         print(e)
+        return None
+    finally:
+        profile.flush(args[1] if len(args) > 1 else LIST_METHOD)
+
+
+def main(ikein_info: Dict, ikein_methods: Dict, methods: Dict, args: List[str]) -> None:
+    """
+    Main function that executes a command based on the provided arguments.
+
+    Parameters:
+        ikein_info (Dict): General information about the available methods.
+        ikein_methods (Dict): Dictionary containing application-specific methods.
+        methods (Dict): Dictionary containing other general available methods.
+        args (List[str]): List of command-line arguments.
+    """
+    output_command = run(ikein_info, ikein_methods, methods, args)
+    if output_command is not None:
+        emit_command(output_command)
 
 
 if __name__ == "__main__":
     """
     Program entry point.
     Loads methods and information from the plugins module and executes main().
+    Only the plugin that owns the requested command is imported.
+    With --serve, keeps the loaded methods resident and serves commands over a Unix socket.
+    With --build-manifest, regenerates the command manifest.
+    With --batch, runs the commands read from stdin, one per line, and writes a JSON result per command.
     """
-    ikein_info, ikein_methods, methods = load("plugins")
-    main(ikein_info, ikein_methods, methods, sys.argv)
+    if sys.argv[1:] == [SERVE_FLAG]:
+        from utils.server import serve
+
+        serve("plugins", load, lambda registry, args: run(*registry, args))
+    elif sys.argv[1:] == [BUILD_MANIFEST_FLAG]:
+        build_manifest("plugins")
+    elif sys.argv[1:] == [BATCH_FLAG]:
+        from utils.batch import run_batch
+
+        failed = run_batch("plugins", load, lambda registry, args: run(*registry, args), sys.stdin, sys.stdout)
+        sys.exit(1 if failed else 0)
+    else:
+        with profile.phase("load"):
+            ikein_info, ikein_methods, methods = load(
+                "plugins", sys.argv[1] if len(sys.argv) > 1 else LIST_METHOD
+            )
+        main(ikein_info, ikein_methods, methods, sys.argv)
@@ -3,22 +3,25 @@
 version="v0.0.1"
 echo -e $'[I.K.E.I.N.] Interactive Knowledge-based Electronic Intelligent Network - '"$version"$'\n'
 
-in_command_block=false
 command=""
 
-python3 $(dirname "$0")/ikein.py "$@" | while read -r line; do
-    if [[ "$line" == "<<START_COMMAND>>" ]]; then
-        in_command_block=true
-        command=""
-    elif [[ "$line" == "<<END_COMMAND>>" ]]; then
-        in_command_block=false
-    else
-        if [[ "$in_command_block" == false ]]; then
-            echo "$line"
-        else
-            command+="$line"$'\n'
-        fi
-    fi
-done
+if [[ "$IKEIN_PROFILE" == 1 ]]; then
+    zmodload zsh/datetime 2>/dev/null
+    export IKEIN_T0="$EPOCHREALTIME"
+fi
+
+ikein_socket="${IKEIN_SOCKET:-${XDG_RUNTIME_DIR:-${TMPDIR:-/tmp}}/ikein-$UID.sock}"
+# Only a socket owned by the current user is trusted, as its answers are evaluated below.
+if [[ -S "$ikein_socket" && -O "$ikein_socket" ]]; then
+    ikein_entry=(python3 -S "$(dirname "$0")/client.py")
+elif [[ -f "$(dirname "$0")/ikein.pyz" ]]; then
+    ikein_entry=(python3 "$(dirname "$0")/ikein.pyz")
+else
+    ikein_entry=(python3 "$(dirname "$0")/ikein.py")
+fi
+
+# The command to run is written to fd 3 and captured whole, while the displayed output
+# goes straight to the terminal through fd 4.
+{ command=$(IKEIN_COMMAND_FD=3 "${ikein_entry[@]}" "$@" 3>&1 1>&4 4>&-); } 4>&1
 
 eval "$command"
@@ -6,7 +6,9 @@ from .git import (
     create_new_feature_branch,
     delete_all_local_branches,
     ignore_tracked_file,
+    run_workspace,
     show_git_tree,
+    show_status,
     squash,
     undo,
     update_current_branch,
@@ -40,8 +42,25 @@ methods = {
     },
     "gbclean": {
         "method": delete_all_local_branches,
-        "info": "Delete all local branches except the current one.",
-        "usage": "ikein gbclean",
+        "info": "Delete the local branches merged into the current one, or those matching the given filters.",
+        "usage": "ikein gbclean [--merged-into <ref>] [--gone] [--older-than <days>] [--all] [--dry-run]",
+        "complete": {
+            "": ["--merged-into", "--gone", "--older-than", "--all", "--dry-run"],
+            "--merged-into": ["@branches"],
+            "--older-than": [],
+        },
+    },
+    "gstatus": {
+        "method": show_status,
+        "info": "Summarize the working tree and compare the current branch with every remote.",
+        "usage": "ikein gstatus [--fetch]",
+        "complete": {"": ["--fetch"]},
+    },
+    "gws": {
+        "method": run_workspace,
+        "info": "Run a git action across every repository under a directory or goto alias, concurrently.",
+        "usage": "ikein gws <alias|directory> [-j <workers>] <fetch|gstatus [--fetch]|gclean|gupdate|gbclean> [args]",
+        "complete": {"": ["@goto.dirs"]},
     },
     "gtree": {
         "method": show_git_tree,
@@ -67,5 +86,6 @@ methods = {
         "method": configure_user,
         "info": "Update the Git user configuration (name and email) with the specified profile.",
         "usage": "ikein guser [profile]",
+        "complete": {"": ["@git.profiles"]},
     },
 }
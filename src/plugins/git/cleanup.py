@@ -0,0 +1,161 @@
+import os
+import shlex
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.git_refs import HEADS_PREFIX
+from utils.profile import phase
+
+SCAN_FORMAT = "%(refname)%00%(upstream:track)%00%(committerdate:unix)%00%(worktreepath)"
+MAX_COMMAND_BYTES = 128 * 1024
+
+MERGED = "merged"
+GONE = "gone"
+
+
+def scan_branches(merged_into: str) -> List[Dict[str, Any]]:
+    """
+    Scans every local branch in bulk.
+
+    One 'git for-each-ref' call reads the upstream status, commit time and worktree of
+    every branch, and another one finds the merged ones, as the git versions without
+    %(ahead-behind) cannot report it in the same format.
+
+    Parameters:
+        merged_into (str): The ref the branches are checked to be merged into.
+
+    Returns:
+        List[Dict[str, Any]]: The name, commit time, and gone, merged and checked out status of every local branch.
+
+    Raises:
+        subprocess.CalledProcessError: If git fails, e.g. because merged_into is not a valid ref.
+    """
+    with phase("git", command="for-each-ref"):
+        output = subprocess.check_output(
+            ["git", "for-each-ref", f"--format={SCAN_FORMAT}", "refs/heads"],
+            stderr=subprocess.DEVNULL,
+        ).decode("utf-8")
+
+    with phase("git", command="for-each-ref --merged"):
+        merged = {
+            ref[len(HEADS_PREFIX) :]
+            for ref in subprocess.check_output(
+                ["git", "for-each-ref", f"--merged={merged_into}", "--format=%(refname)", "refs/heads"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode("utf-8")
+            .splitlines()
+        }
+
+    branches = []
+    for line in output.splitlines():
+        ref, track, committed, worktree = line.split("\0")
+        name = ref[len(HEADS_PREFIX) :]
+        branches.append(
+            {
+                "name": name,
+                "committed": int(committed or 0),
+                GONE: track == "[gone]",
+                MERGED: name in merged and name != merged_into,
+                "checked_out": bool(worktree),
+            }
+        )
+    return branches
+
+
+def select_branches(
+    branches: List[Dict[str, Any]],
+    merged: bool,
+    gone: bool,
+    older_than: Optional[float],
+    now: float,
+) -> List[Dict[str, Any]]:
+    """
+    Selects the branches matching every requested filter. Checked out branches are never selected.
+
+    Parameters:
+        branches (List[Dict[str, Any]]): The scanned branches.
+        merged (bool): If True, only branches merged into the target are selected.
+        gone (bool): If True, only branches whose upstream was deleted are selected.
+        older_than (Optional[float]): If given, only branches whose last commit is older than this number of days are selected.
+        now (float): The current time, as a Unix timestamp.
+
+    Returns:
+        List[Dict[str, Any]]: The selected branches.
+    """
+    cutoff = now - older_than * 86400 if older_than is not None else None
+    return [
+        branch
+        for branch in branches
+        if not branch["checked_out"]
+        and (not merged or branch[MERGED])
+        and (not gone or branch[GONE])
+        and (cutoff is None or branch["committed"] < cutoff)
+    ]
+
+
+def _max_command_bytes() -> int:
+    """
+    Returns the maximum length of a single delete command.
+
+    The limit leaves room for the environment within the system argument limit.
+
+    Returns:
+        int: The maximum length in bytes.
+    """
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (ValueError, OSError):
+        arg_max = MAX_COMMAND_BYTES
+    environment = sum(len(key) + len(value) + 2 for key, value in os.environ.items())
+    return max(4096, min(MAX_COMMAND_BYTES, (arg_max - environment) // 2))
+
+
+def delete_commands(names: List[str], max_bytes: Optional[int] = None) -> List[str]:
+    """
+    Builds the 'git branch -D' commands deleting the given branches, split so every command
+    fits within the system argument limit.
+
+    Parameters:
+        names (List[str]): The branches to delete.
+        max_bytes (Optional[int]): Maximum length of a command. Defaults to a limit derived from ARG_MAX.
+
+    Returns:
+        List[str]: The delete commands.
+    """
+    max_bytes = max_bytes or _max_command_bytes()
+    prefix = "git branch -D"
+    commands, chunk, size = [], [], len(prefix)
+    for name in names:
+        quoted = shlex.quote(name)
+        if chunk and size + 1 + len(quoted) > max_bytes:
+            commands.append(f"{prefix} {' '.join(chunk)}")
+            chunk, size = [], len(prefix)
+        chunk.append(quoted)
+        size += 1 + len(quoted)
+    if chunk:
+        commands.append(f"{prefix} {' '.join(chunk)}")
+    return commands
+
+
+def summarize(
+    branches: List[Dict[str, Any]], selected: List[Dict[str, Any]], start: float
+) -> str:
+    """
+    Describes the outcome of a branch selection.
+
+    Parameters:
+        branches (List[Dict[str, Any]]): The scanned branches.
+        selected (List[Dict[str, Any]]): The selected branches.
+        start (float): The time.perf_counter() value when the scan started.
+
+    Returns:
+        str: The number of selected branches, merged and gone among them, and the scan duration.
+    """
+    merged = sum(1 for branch in selected if branch[MERGED])
+    gone = sum(1 for branch in selected if branch[GONE])
+    return (
+        f"{len(selected)} of {len(branches)} branches selected "
+        f"({merged} merged, {gone} gone) in {(time.perf_counter() - start) * 1000:.0f} ms."
+    )
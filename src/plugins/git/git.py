@@ -1,10 +1,21 @@
+import contextlib
+import io
+import os
 import random
 import string
 import subprocess
-from typing import List, Optional
+import time
+from typing import Any, Dict, List, Optional
 
-from utils.bash import confirm, echo
+from utils.bash import confirm, echo, printsh, require_foreground
 from utils.config import get_config
+from utils.git_refs import find_repository, head_branch
+from utils.profile import phase
+
+from .cleanup import delete_commands, scan_branches, select_branches, summarize
+
+GWS_USAGE = "ikein gws <alias|directory> [-j <workers>] <fetch|gstatus [--fetch]|gclean|gupdate|gbclean> [args]"
+GBCLEAN_USAGE = "ikein gbclean [--merged-into <ref>] [--gone] [--older-than <days>] [--all] [--dry-run]"
 
 
 def _generate_tmp(length: int = 5) -> str:
@@ -24,42 +35,25 @@ def _get_current_branch() -> Optional[str]:
     """
     Retrieves the current git branch.
 
+    HEAD is read directly from the git directory, and git is only run for repository
+    layouts the ref reader does not support.
+
     Returns:
         str: The name of the current branch, or None if there is an error retrieving the branch.
     """
-    try:
-        return (
-            subprocess.check_output(
-                ["git", "symbolic-ref", "--short", "-q", "HEAD"],
-            )
-            .strip()
-            .decode("utf-8")
-        )
-    except Exception:
-        return None
-
-
-def _get_all_branches(exclude_current: bool = True) -> Optional[List[str]]:
-    """
-    Retrieves a list of all git branches.
-
-    Parameters:
-        exclude_current (bool): If True, the current branch will be excluded from the list. Default is True.
+    repository = find_repository(os.getcwd())
+    if repository is not None:
+        return head_branch(repository["git_dir"])
 
-    Returns:
-        List[str]: A list of branch names, or None if there was an error retrieving the branches.
-    """
     try:
-        return (
-            subprocess.check_output(
-                "git branch | grep -v \* | xargs" if exclude_current else "git branch",
-                shell=True,
+        with phase("git", command="symbolic-ref"):
+            return (
+                subprocess.check_output(
+                    ["git", "symbolic-ref", "--short", "-q", "HEAD"],
+                )
+                .strip()
+                .decode("utf-8")
             )
-            .decode("utf-8")
-            .strip()
-            .replace("*", "")
-            .split()
-        )
     except Exception:
         return None
 
@@ -174,15 +168,97 @@ def undo(*args: str) -> str:
     return f"git checkout {' '.join(args)}"
 
 
-def delete_all_local_branches() -> str:
+def delete_all_local_branches(*args: str) -> str:
     """
-    Deletes all local git branches except for the current branch.
+    Deletes the local git branches matching the given filters, except the checked out ones.
+
+    Without filters, the branches merged into the current branch are deleted. The filters
+    are combined, so a branch must match all of them to be deleted:
+        --merged-into <ref>: branches merged into the given ref.
+        --gone: branches whose upstream branch was deleted.
+        --older-than <days>: branches whose last commit is older than the given number of days.
+    --all selects every branch, as long as it is not checked out, and --dry-run only
+    reports the branches that would be deleted.
+
+    Parameters:
+        args (str): The filters and options.
 
     Returns:
-        str: The git command to delete all local branches.
+        str: The git commands to delete the branches, split to fit the system argument limit, or a message describing the selection.
+    """
+    start = time.perf_counter()
+    arguments, options = list(args), {}
+    while arguments:
+        option = arguments.pop(0)
+        if option in ("--merged-into", "--older-than") and arguments:
+            options[option] = arguments.pop(0)
+        elif option in ("--all", "--gone", "--dry-run"):
+            options[option] = True
+        else:
+            return echo(f"Unknown option: '{option}'. Usage: {GBCLEAN_USAGE}")
+
+    try:
+        older_than = float(options["--older-than"]) if "--older-than" in options else None
+    except ValueError:
+        return echo(f"Invalid number of days: '{options['--older-than']}'.")
+    if options.get("--all") and len(options) > 1 + ("--dry-run" in options):
+        return echo("--all cannot be combined with other filters.")
+
+    merged_into = options.get("--merged-into", "HEAD")
+    try:
+        branches = scan_branches(merged_into)
+    except Exception:
+        return echo(f"Could not read the branches merged into '{merged_into}'.")
+
+    filtered = "--merged-into" in options or "--gone" in options or older_than is not None
+    selected = select_branches(
+        branches,
+        merged=not options.get("--all") and ("--merged-into" in options or not filtered),
+        gone="--gone" in options,
+        older_than=older_than,
+        now=time.time(),
+    )
+    summary = summarize(branches, selected, start)
+
+    if options.get("--dry-run"):
+        for branch in selected:
+            printsh(branch["name"])
+        return echo(f"Dry run: {summary}")
+    commands = delete_commands([branch["name"] for branch in selected])
+    return "\n".join([*commands, echo(summary)])
+
+
+def show_status(*args: str) -> str:
     """
-    branches = _get_all_branches(exclude_current=True)
-    return f"git branch -D {' '.join(branches)}" if branches else ""
+    Summarizes the working tree and compares the current branch with every remote.
+
+    The git commands run concurrently. With --fetch, every remote is fetched first, also
+    concurrently.
+
+    Parameters:
+        args (str): The options.
+
+    Returns:
+        str: A message summarizing the status, or an error message.
+    """
+    from .status import describe_status, fetch_remotes, list_remotes, repository_status
+
+    if args not in ((), ("--fetch",)):
+        return echo("Invalid usage. Use: ikein gstatus [--fetch]")
+    if args:
+        require_foreground()
+
+    remotes = list_remotes()
+    lines = []
+    if args:
+        for remote, result in zip(remotes, fetch_remotes(remotes)):
+            if result["returncode"] != 0:
+                lines.append(f"Could not fetch '{remote}': {result['error'] or result['stderr'].strip()}")
+
+    status = repository_status(remotes)
+    if "error" in status:
+        return echo(f"Could not read the repository status: {status['error']}")
+    return echo("\n".join([*describe_status(status), *lines]))
 
 
 def show_git_tree() -> str:
@@ -262,7 +338,7 @@ def configure_user(*args: str) -> str:
     Returns:
         str: The git commands to configure the user, or an error message if the profile is not found.
     """
-    profiles = get_config().get("git", {}).get("profiles", {})
+    profiles = get_config()["git"]["profiles"]
 
     if len(args) == 1 and args[0] in profiles.keys():
         user = profiles[args[0]]
@@ -272,3 +348,138 @@ def configure_user(*args: str) -> str:
             {echo(f'New user: {user["name"]} ({user["email"]})')}
         """
     return echo(f"Profile not found. Available profiles: {', '.join(profiles.keys())}")
+
+
+# Actions of gws, mapped to the git command whose script they run in every repository, or
+# to None for the actions gws runs itself.
+WORKSPACE_ACTIONS: Dict[str, Any] = {
+    "fetch": None,
+    "gstatus": None,
+    "gclean": clean_and_go_main,
+    "gupdate": update_current_branch,
+    "gbclean": delete_all_local_branches,
+}
+# Actions acting on the branches of a repository, run once for all its worktrees.
+REPOSITORY_ACTIONS = ("gbclean",)
+
+
+def run_workspace(*args: str) -> str:
+    """
+    Runs a git action across every repository under a directory or goto alias, concurrently.
+
+    The actions are:
+        fetch: fetches every remote.
+        gstatus [--fetch]: summarizes the working tree and compares the current branch with every remote.
+        gclean, gupdate, gbclean [args]: runs the script of the git command in every repository.
+    Remotes are fetched once per repository, even when several worktrees of it are found
+    or the script of an action fetches them, and a repository whose fetch fails is not
+    touched further. gbclean runs once per repository rather than once per worktree. At
+    most -j git commands run at the same time.
+
+    Parameters:
+        args (str): The workspace, the options, the action and its arguments.
+
+    Returns:
+        str: A message summarizing the run, after a table with the outcome in every repository is printed.
+    """
+    from .workspace import (
+        WORKSPACE_WORKERS,
+        action_scripts,
+        discover_repositories,
+        fetch_all,
+        format_table,
+        last_line,
+        list_all_remotes,
+        resolve_root,
+        run_scripts,
+        shared_repositories,
+        status_cells,
+        workspace_status,
+    )
+
+    arguments = list(args)
+    if len(arguments) < 2:
+        return echo(f"Invalid usage. Use: {GWS_USAGE}")
+    target, workers = arguments.pop(0), WORKSPACE_WORKERS
+    if arguments[0] == "-j":
+        try:
+            workers = max(1, int(arguments[1]))
+        except (IndexError, ValueError):
+            return echo(f"Invalid number of workers. Use: {GWS_USAGE}")
+        arguments = arguments[2:]
+    if not arguments or arguments[0] not in WORKSPACE_ACTIONS:
+        return echo(f"Invalid action. Use: {GWS_USAGE}")
+    action, action_args = arguments[0], arguments[1:]
+
+    root = resolve_root(target)
+    if root is None:
+        return echo(f"Workspace not found: '{target}'")
+    require_foreground()
+    repositories = discover_repositories(root)
+    if not repositories:
+        return echo(f"No git repositories found under '{root}'.")
+
+    start, fetch_count = time.perf_counter(), 0
+    if WORKSPACE_ACTIONS[action] is None:
+        remotes = list_all_remotes(repositories, workers)
+        errors: Dict[str, List[str]] = {repository: [] for repository in repositories}
+        if action == "fetch" or "--fetch" in action_args:
+            fetch_count, errors = fetch_all(remotes, workers)
+        if action == "fetch":
+            rows = [["repository", "remotes", "result"]]
+            rows.extend(
+                [repository, ", ".join(remotes[repository]) or "-", "; ".join(errors[repository]) or "ok"]
+                for repository in repositories
+            )
+        else:
+            rows = [["repository", "branch", "changes", "remotes"]]
+            statuses = workspace_status(remotes, workers)
+            for repository in repositories:
+                cells = status_cells(statuses[repository])
+                if errors[repository]:
+                    cells[2] = "; ".join(errors[repository])
+                if "error" in statuses[repository]:
+                    errors[repository].append(statuses[repository]["error"])
+                rows.append([repository, *cells])
+        failed = sum(1 for repository in repositories if errors[repository])
+    else:
+        shared = shared_repositories(repositories)
+        targets = [
+            repository
+            for repository in repositories
+            if action not in REPOSITORY_ACTIONS or shared[repository] == repository
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scripts = action_scripts(targets, WORKSPACE_ACTIONS[action], action_args)
+        fetch_count, errors = fetch_all(
+            {repository: script["remotes"] for repository, script in scripts.items()}, workers
+        )
+        results = run_scripts(
+            {repository: script["script"] for repository, script in scripts.items() if not errors[repository]},
+            workers,
+        )
+        rows, failed = [["repository", "result", "output"]], 0
+        for repository in repositories:
+            if repository not in scripts:
+                rows.append([repository, "skipped", f"same repository as {os.path.relpath(shared[repository], root)}"])
+                continue
+            if errors[repository]:
+                rows.append([repository, "failed", "; ".join(errors[repository])])
+                failed += 1
+                continue
+            result = results[repository]
+            if result["returncode"] == 0:
+                rows.append([repository, "ok", last_line(result)])
+            else:
+                rows.append([repository, f"exit {result['returncode']}", last_line(result)])
+                failed += 1
+
+    for row in rows[1:]:
+        row[0] = os.path.relpath(row[0], root)
+    for line in format_table(rows):
+        printsh(line)
+    return echo(
+        f"{action} on {len(repositories)} repositories in {time.perf_counter() - start:.2f}s "
+        f"({fetch_count} fetches, {failed} failed)."
+    )
+
@@ -0,0 +1,151 @@
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.git_refs import find_repository, head_branch
+from utils.processes import run_command, run_commands
+
+FETCH_TIMEOUT = 30.0
+STATUS_TIMEOUT = 10.0
+
+STATUS_ARGS = ["git", "status", "--porcelain=v2", "--branch"]
+
+
+def parse_status(output: str) -> Dict[str, Any]:
+    """
+    Counts the changes reported by 'git status --porcelain=v2 --branch'.
+
+    Parameters:
+        output (str): The output of the status command.
+
+    Returns:
+        Dict[str, Any]: The 'branch' (None if HEAD is detached) and the number of 'staged', 'modified', 'unmerged' and 'untracked' files.
+    """
+    status: Dict[str, Any] = {"branch": None, "staged": 0, "modified": 0, "unmerged": 0, "untracked": 0}
+    for line in output.splitlines():
+        if line.startswith("# branch.head "):
+            head = line[len("# branch.head ") :]
+            status["branch"] = None if head == "(detached)" else head
+        elif line[:2] in ("1 ", "2 "):
+            status["staged"] += line[2] != "."
+            status["modified"] += line[3] != "."
+        elif line.startswith("u "):
+            status["unmerged"] += 1
+        elif line.startswith("? "):
+            status["untracked"] += 1
+    return status
+
+
+def list_remotes(cwd: Optional[str] = None) -> List[str]:
+    """
+    Lists the remotes of a repository.
+
+    Parameters:
+        cwd (Optional[str]): A directory of the repository. Defaults to the current one.
+
+    Returns:
+        List[str]: The remote names, or an empty list if git fails.
+    """
+    result = run_command(["git", "remote"], cwd, STATUS_TIMEOUT)
+    return result["stdout"].split() if result["returncode"] == 0 else []
+
+
+def fetch_remotes(remotes: List[str], cwd: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fetches several remotes of a repository concurrently.
+
+    Parameters:
+        remotes (List[str]): The remotes to fetch.
+        cwd (Optional[str]): A directory of the repository. Defaults to the current one.
+
+    Returns:
+        List[Dict[str, Any]]: The result of every fetch, in the order of the remotes.
+    """
+    return run_commands(
+        [{"args": ["git", "fetch", "--quiet", remote], "cwd": cwd} for remote in remotes],
+        timeout=FETCH_TIMEOUT,
+    )
+
+
+def status_commands(remotes: List[str], cwd: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Builds the git commands reading the status of a repository: the working tree status,
+    and a comparison of the current branch with the branch of the same name on every remote.
+
+    Parameters:
+        remotes (List[str]): The remotes to compare the current branch with.
+        cwd (Optional[str]): A directory of the repository. Defaults to the current one.
+
+    Returns:
+        List[Dict[str, Any]]: The commands, to be run with utils.processes.run_commands. The comparisons are left out when HEAD is detached.
+    """
+    repository = find_repository(cwd or os.getcwd())
+    if repository is not None:
+        branch = head_branch(repository["git_dir"])
+    else:
+        result = run_command(["git", "symbolic-ref", "--short", "-q", "HEAD"], cwd, STATUS_TIMEOUT)
+        branch = result["stdout"].strip() if result["returncode"] == 0 else None
+
+    commands = [{"args": STATUS_ARGS, "cwd": cwd}]
+    if branch:
+        commands.extend(
+            {"args": ["git", "rev-list", "--left-right", "--count", f"HEAD...{remote}/{branch}"], "cwd": cwd}
+            for remote in remotes
+        )
+    return commands
+
+
+def read_status(remotes: List[str], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reads the status of a repository from the results of its status_commands.
+
+    Parameters:
+        remotes (List[str]): The remotes the current branch was compared with.
+        results (List[Dict[str, Any]]): The results of the status commands, in order.
+
+    Returns:
+        Dict[str, Any]: The counts returned by parse_status, an 'error' message if the status could not be read, and the 'remotes' comparison, mapping every remote to its 'ahead' and 'behind' counts, or None if it has no such branch.
+    """
+    status_result, *comparisons = results
+    status = parse_status(status_result["stdout"])
+    if status_result["returncode"] != 0:
+        status["error"] = status_result["error"] or status_result["stderr"].strip()
+    status["remotes"] = {remote: None for remote in remotes}
+    for remote, result in zip(remotes, comparisons):
+        if result["returncode"] == 0:
+            ahead, behind = result["stdout"].split()
+            status["remotes"][remote] = {"ahead": int(ahead), "behind": int(behind)}
+    return status
+
+
+def repository_status(remotes: List[str], cwd: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Reads the status of a repository, running the git commands concurrently.
+
+    Parameters:
+        remotes (List[str]): The remotes to compare the current branch with.
+        cwd (Optional[str]): A directory of the repository. Defaults to the current one.
+
+    Returns:
+        Dict[str, Any]: The status, as returned by read_status.
+    """
+    return read_status(remotes, run_commands(status_commands(remotes, cwd), timeout=STATUS_TIMEOUT))
+
+
+def describe_status(status: Dict[str, Any]) -> List[str]:
+    """
+    Describes a repository status in a few lines.
+
+    Parameters:
+        status (Dict[str, Any]): The status returned by repository_status.
+
+    Returns:
+        List[str]: A line for the working tree and a line for every remote.
+    """
+    counts = [f"{status[key]} {key}" for key in ("staged", "modified", "unmerged", "untracked") if status[key]]
+    lines = [f"{status['branch'] or 'detached HEAD'}: {', '.join(counts) or 'clean'}"]
+    for remote, comparison in status["remotes"].items():
+        if comparison is None:
+            lines.append(f"  {remote}: no branch '{status['branch']}'" if status["branch"] else f"  {remote}: -")
+        else:
+            lines.append(f"  {remote}/{status['branch']}: {comparison['ahead']} ahead, {comparison['behind']} behind")
+    return lines
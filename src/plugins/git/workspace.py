@@ -0,0 +1,266 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.alias_store import lookup
+from utils.bash import IKEIN_NAME
+from utils.config import get_config
+from utils.git_refs import find_repository
+from utils.indexer import REPOSITORY, find_directories, load_index, scan
+from utils.processes import run_commands
+
+from .status import FETCH_TIMEOUT, STATUS_TIMEOUT, read_status, status_commands
+
+WORKSPACE_DEPTH = 3
+WORKSPACE_WORKERS = 8
+SCRIPT_TIMEOUT = 300.0
+
+
+def resolve_root(target: str) -> Optional[str]:
+    """
+    Resolves the root directory of a workspace from a goto alias or a directory.
+
+    Parameters:
+        target (str): A goto alias, or the path of a directory.
+
+    Returns:
+        Optional[str]: The absolute path of the workspace root, or None if the target is neither an alias nor a directory.
+    """
+    answered, directory = lookup("goto.dirs", target)
+    if not answered:
+        directory = get_config()["goto"]["dirs"].get(target)
+    if directory is None:
+        directory = target
+    directory = os.path.abspath(os.path.expanduser(directory))
+    return directory if os.path.isdir(directory) else None
+
+
+def discover_repositories(root: str, max_depth: int = WORKSPACE_DEPTH) -> List[str]:
+    """
+    Finds the git repositories under a directory with the directory indexer.
+
+    The search does not descend into repositories, hidden or pruned directories such as
+    node_modules, or symbolic links, and stops max_depth levels below the root.
+    Directories unchanged since they were indexed with 'goto -i' are not listed again.
+
+    Parameters:
+        root (str): The directory to search.
+        max_depth (int): Maximum depth of a repository below the root.
+
+    Returns:
+        List[str]: The repository paths, sorted.
+    """
+    entries = scan([root], max_depth, previous=load_index()["entries"])
+    return find_directories(entries, REPOSITORY)
+
+
+def shared_repositories(repositories: List[str]) -> Dict[str, str]:
+    """
+    Groups the repositories sharing their git directory, such as linked worktrees of the
+    same repository, which share their branches and remote-tracking branches.
+
+    Parameters:
+        repositories (List[str]): The repository paths.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping every repository to the first one sharing its git directory, possibly itself.
+    """
+    first: Dict[str, str] = {}
+    shared = {}
+    for repository in repositories:
+        found = find_repository(repository)
+        shared[repository] = first.setdefault(found["common_dir"] if found else repository, repository)
+    return shared
+
+
+def list_all_remotes(repositories: List[str], workers: int) -> Dict[str, List[str]]:
+    """
+    Lists the remotes of several repositories concurrently.
+
+    Parameters:
+        repositories (List[str]): The repository paths.
+        workers (int): Maximum number of git commands running at the same time.
+
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping every repository to its remotes.
+    """
+    results = run_commands(
+        [{"args": ["git", "remote"], "cwd": repository} for repository in repositories],
+        timeout=STATUS_TIMEOUT,
+        max_concurrency=workers,
+    )
+    return {
+        repository: result["stdout"].split() if result["returncode"] == 0 else []
+        for repository, result in zip(repositories, results)
+    }
+
+
+def fetch_all(
+    fetches: Dict[str, List[str]], workers: int
+) -> Tuple[int, Dict[str, List[str]]]:
+    """
+    Fetches the remotes of several repositories concurrently, fetching every remote once.
+
+    Repositories sharing their git directory, such as linked worktrees of the same
+    repository, share their remote-tracking branches, so a remote fetched for one of them
+    is not fetched again for the others.
+
+    Parameters:
+        fetches (Dict[str, List[str]]): Dictionary mapping every repository to the remotes to fetch.
+        workers (int): Maximum number of fetches running at the same time.
+
+    Returns:
+        Tuple[int, Dict[str, List[str]]]: The number of fetches run, and a dictionary mapping every repository to its failed fetches.
+    """
+    shared = shared_repositories(list(fetches))
+    unique: Dict[Tuple[str, str], List[str]] = {}
+    for repository, remotes in fetches.items():
+        for remote in remotes:
+            unique.setdefault((shared[repository], remote), []).append(repository)
+
+    results = run_commands(
+        [
+            {"args": ["git", "fetch", "--quiet", remote], "cwd": sharing[0]}
+            for (_, remote), sharing in unique.items()
+        ],
+        timeout=FETCH_TIMEOUT,
+        max_concurrency=workers,
+    )
+    errors: Dict[str, List[str]] = {repository: [] for repository in fetches}
+    for ((_, remote), sharing), result in zip(unique.items(), results):
+        if result["returncode"] != 0:
+            for repository in sharing:
+                errors[repository].append(f"fetch {remote}: {last_line(result)}")
+    return len(unique), errors
+
+
+def workspace_status(
+    remotes: Dict[str, List[str]], workers: int
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the status of several repositories, running all their git commands concurrently.
+
+    Parameters:
+        remotes (Dict[str, List[str]]): Dictionary mapping every repository to its remotes.
+        workers (int): Maximum number of git commands running at the same time.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Dictionary mapping every repository to its status, as returned by read_status.
+    """
+    commands = {repository: status_commands(names, repository) for repository, names in remotes.items()}
+    results = run_commands(
+        [command for batch in commands.values() for command in batch],
+        timeout=STATUS_TIMEOUT,
+        max_concurrency=workers,
+    )
+    statuses, position = {}, 0
+    for repository, batch in commands.items():
+        statuses[repository] = read_status(remotes[repository], results[position : position + len(batch)])
+        position += len(batch)
+    return statuses
+
+
+def action_scripts(
+    repositories: List[str], action: Callable[..., str], args: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds the shell script of a git plugin command for every repository.
+
+    The command is called from each repository in turn, and the 'git fetch <remote>' lines
+    of its script are set apart so the fetches can be deduplicated.
+
+    Parameters:
+        repositories (List[str]): The repository paths.
+        action (Callable[..., str]): The git plugin command, e.g. the one behind gclean.
+        args (List[str]): The arguments of the command.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Dictionary mapping every repository to the 'remotes' its script fetches and the rest of the 'script'.
+    """
+    scripts, previous_directory = {}, os.getcwd()
+    try:
+        for repository in repositories:
+            os.chdir(repository)
+            remotes, lines = [], []
+            for line in action(*args).strip().splitlines():
+                words = line.split()
+                if words[:2] == ["git", "fetch"] and len(words) == 3:
+                    remotes.append(words[2])
+                elif line.strip():
+                    lines.append(line.strip())
+            scripts[repository] = {"remotes": remotes, "script": "\n".join(lines)}
+    finally:
+        os.chdir(previous_directory)
+    return scripts
+
+
+def run_scripts(scripts: Dict[str, str], workers: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs a shell script in every repository concurrently.
+
+    Parameters:
+        scripts (Dict[str, str]): Dictionary mapping every repository to the script to run in it.
+        workers (int): Maximum number of scripts running at the same time.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Dictionary mapping every repository to the result of its script.
+    """
+    repositories = list(scripts)
+    results = run_commands(
+        [{"args": ["sh", "-c", scripts[repository]], "cwd": repository} for repository in repositories],
+        timeout=SCRIPT_TIMEOUT,
+        max_concurrency=workers,
+    )
+    return dict(zip(repositories, results))
+
+
+def last_line(result: Dict[str, Any]) -> str:
+    """
+    Describes the outcome of a command with the last line it printed.
+
+    Parameters:
+        result (Dict[str, Any]): The result of the command, as returned by utils.processes.run_commands.
+
+    Returns:
+        str: The error message of the command, the git error or last line of its error output if it failed, or the last line of its standard output.
+    """
+    if result["error"]:
+        return result["error"]
+    if result["returncode"] != 0 and result["stderr"].strip():
+        errors = result["stderr"].strip().splitlines()
+        return next((line for line in errors if line.startswith(("fatal:", "error:"))), errors[-1])
+    lines = result["stdout"].strip().splitlines()
+    return lines[-1].replace(f"{IKEIN_NAME}: ", "") if lines else ""
+
+
+def format_table(rows: List[List[str]]) -> List[str]:
+    """
+    Aligns the columns of a table.
+
+    Parameters:
+        rows (List[List[str]]): The rows, the first one being the header.
+
+    Returns:
+        List[str]: The formatted lines.
+    """
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+
+
+def status_cells(status: Dict[str, Any]) -> List[str]:
+    """
+    Describes a repository status in the cells of a workspace table row.
+
+    Parameters:
+        status (Dict[str, Any]): The status returned by read_status.
+
+    Returns:
+        List[str]: The branch, the working tree changes and the comparison with every remote.
+    """
+    if "error" in status:
+        return ["-", status["error"], ""]
+    counts = [f"{status[key]} {key}" for key in ("staged", "modified", "unmerged", "untracked") if status[key]]
+    remotes = [
+        f"{remote} +{comparison['ahead']}/-{comparison['behind']}" if comparison else f"{remote} -"
+        for remote, comparison in status["remotes"].items()
+    ]
+    return [status["branch"] or "(detached)", ", ".join(counts) or "clean", ", ".join(remotes)]
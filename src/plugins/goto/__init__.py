@@ -4,6 +4,11 @@ methods = {
     "goto": {
         "method": goto,
         "info": "Manage and navigate to predefined directory aliases.",
-        "usage": "ikein goto [-a <alias> <directory>] | [<alias>] | [-l] | [-o <alias>] | [-r <alias>]",
+        "usage": "ikein goto [-a <alias> <directory>] | [<alias>] | [-l] | [-o <alias>] | [-r <alias>] | [-i [directory]]",
+        "complete": {
+            "": ["-a", "-l", "-o", "-r", "-i", "@goto.dirs"],
+            "-o": ["@goto.dirs"],
+            "-r": ["@goto.dirs"],
+        },
     }
 }
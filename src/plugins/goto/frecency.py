@@ -0,0 +1,179 @@
+import fcntl
+import json
+import os
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from utils.config import atomic_write, get_path
+
+VISITS_LOG_FILE = "visits.log"
+VISITS_INDEX_FILE = "visits.json"
+
+HALF_LIFE_SECONDS = 7 * 24 * 60 * 60
+COMPACT_THRESHOLD = 256
+MIN_SCORE = 0.01
+
+
+def _decay(score: float, reference: float, now: float) -> float:
+    """
+    Decays a score computed at a reference time to its value at the given time.
+
+    Parameters:
+        score (float): The score at the reference time.
+        reference (float): The reference timestamp, in seconds.
+        now (float): The timestamp at which the score is evaluated, in seconds.
+
+    Returns:
+        float: The decayed score.
+    """
+    return score * 0.5 ** (max(now - reference, 0) / HALF_LIFE_SECONDS)
+
+
+def _replay(index: Dict[str, List[float]], lines: List[str]) -> Dict[str, List[float]]:
+    """
+    Applies the visits recorded in the log to an index of scores.
+
+    Every visit decays the previous score to the visit time and adds one to it, so the
+    score combines how often and how recently a directory was visited.
+
+    Parameters:
+        index (Dict[str, List[float]]): Dictionary mapping directories to their [score, reference] pair.
+        lines (List[str]): Lines of the visits log, formatted as "<timestamp>\\t<directory>".
+
+    Returns:
+        Dict[str, List[float]]: The updated index.
+    """
+    for line in lines:
+        timestamp, _, directory = line.rstrip("\n").partition("\t")
+        if not directory:
+            continue
+        visited_at = float(timestamp)
+        score, reference = index.get(directory, (0.0, visited_at))
+        index[directory] = [_decay(score, reference, visited_at) + 1, visited_at]
+    return index
+
+
+def _read_index() -> Dict[str, List[float]]:
+    """
+    Reads the compacted index of scores.
+
+    Returns:
+        Dict[str, List[float]]: Dictionary mapping directories to their [score, reference] pair.
+    """
+    try:
+        with open(get_path(VISITS_INDEX_FILE), "r") as in_file:
+            return json.load(in_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _compact(log_file: TextIO) -> Dict[str, List[float]]:
+    """
+    Folds the visits log into the index file and truncates the log.
+
+    Directories whose score has decayed below MIN_SCORE are dropped, so neither file grows
+    without bound. The caller must hold an exclusive lock on the log.
+
+    Parameters:
+        log_file (TextIO): The visits log, opened for reading and writing.
+
+    Returns:
+        Dict[str, List[float]]: The compacted index.
+    """
+    log_file.seek(0)
+    index = _replay(_read_index(), log_file.readlines())
+    now = round(time.time(), 3)
+    index = {
+        directory: [round(_decay(score, reference, now), 4), now]
+        for directory, (score, reference) in index.items()
+        if _decay(score, reference, now) >= MIN_SCORE
+    }
+    atomic_write(get_path(VISITS_INDEX_FILE), json.dumps(index))
+    log_file.truncate(0)
+    return index
+
+
+def record_visit(directory: str) -> None:
+    """
+    Appends a visit to the given directory to the visits log.
+
+    The log is compacted into the index once it holds COMPACT_THRESHOLD visits.
+
+    Parameters:
+        directory (str): The visited directory.
+    """
+    with open(get_path(VISITS_LOG_FILE), "a+") as log_file:
+        fcntl.flock(log_file.fileno(), fcntl.LOCK_EX)
+        try:
+            log_file.write(f"{time.time():.3f}\t{directory}\n")
+            log_file.flush()
+            log_file.seek(0)
+            if sum(1 for _ in log_file) >= COMPACT_THRESHOLD:
+                _compact(log_file)
+        finally:
+            fcntl.flock(log_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_visits() -> Dict[str, List[float]]:
+    """
+    Returns the index of scores, including the visits not yet compacted.
+
+    Returns:
+        Dict[str, List[float]]: Dictionary mapping directories to their [score, reference] pair.
+    """
+    index = _read_index()
+    try:
+        with open(get_path(VISITS_LOG_FILE), "r") as log_file:
+            fcntl.flock(log_file.fileno(), fcntl.LOCK_SH)
+            try:
+                index = _replay(index, log_file.readlines())
+            finally:
+                fcntl.flock(log_file.fileno(), fcntl.LOCK_UN)
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def score(index: Dict[str, List[float]], directory: str, now: float) -> float:
+    """
+    Returns the frecency score of a directory at the given time.
+
+    Parameters:
+        index (Dict[str, List[float]]): The index of scores.
+        directory (str): The directory to score.
+        now (float): The timestamp at which the score is evaluated, in seconds.
+
+    Returns:
+        float: The frecency score, or 0 if the directory was never visited.
+    """
+    if directory not in index:
+        return 0.0
+    return _decay(*index[directory], now)
+
+
+def best_match(partial: str, dirs: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """
+    Finds the highest ranked alias matching a partial name.
+
+    An alias matches when the partial name is contained in the alias or in the name of its
+    directory, ignoring case. Matches are ranked by the frecency of their directory, and
+    ties are broken by the shortest alias.
+
+    Parameters:
+        partial (str): The partial alias or directory name.
+        dirs (Dict[str, str]): Dictionary mapping aliases to directories.
+
+    Returns:
+        Optional[Tuple[str, str]]: The matching (alias, directory) pair, or None if nothing matches.
+    """
+    partial = partial.lower()
+    matches = [
+        (alias, directory)
+        for alias, directory in dirs.items()
+        if partial in alias.lower() or partial in os.path.basename(directory).lower()
+    ]
+    if not matches:
+        return None
+
+    index, now = read_visits(), time.time()
+    return max(matches, key=lambda match: (score(index, match[1], now), -len(match[0])))
@@ -1,8 +1,22 @@
 import os
-from typing import Callable, Dict, List
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
+from utils.alias_store import lookup, sync
 from utils.bash import echo, precho
-from utils.config import get_config, save_config
+from utils.config import DELETE, SET, get_config, get_config_key, update_config
+from utils.fuzzy import get_index, resolve, search
+from utils.indexer import (
+    PROJECT,
+    REPOSITORY,
+    find_directories,
+    get_index_key,
+    indexed_names,
+    load_index,
+    refresh,
+)
+
+from .frecency import best_match, read_visits, record_visit, score
 
 
 def goto(*args: str) -> str:
@@ -29,20 +43,25 @@ def _load_goto_aliases() -> Dict[str, str]:
     Returns:
         dict: A dictionary of directory aliases where the key is the alias and the value is the directory path.
     """
-    return get_config().get("goto", {}).get("dirs", {})
+    return get_config()["goto"]["dirs"]
 
 
-def _save_goto_aliases(dirs: Dict[str, str]) -> None:
+def _save_goto_aliases(dirs: Dict[str, Optional[str]]) -> None:
     """
-    Saves the updated directory aliases to the configuration.
+    Saves changes to the directory aliases in the configuration.
+
+    Only the given aliases are merged into the configuration on disk, so aliases saved
+    concurrently by other ikein processes are preserved.
 
     Parameters:
-        dirs (dict): A dictionary of directory aliases to save.
+        dirs (dict): A dictionary of directory aliases to save, where a None value removes the alias.
     """
-    config = get_config()
-    config.setdefault("goto", {})["dirs"] = dirs
-    dirs.pop("key", None)  # Ensures 'key' is not mistakenly stored
-    save_config(config)
+    operations = []
+    for alias, value in dirs.items():
+        operation = DELETE if value is None else SET
+        operations.append((operation, ["goto", "dirs", alias], value))
+    update_config(operations)
+    sync()
 
 
 def _add_alias(*args: str) -> str:
@@ -58,10 +77,8 @@ def _add_alias(*args: str) -> str:
     if len(args) != 2:
         return echo("Invalid format. Use: goto -a <alias>")
 
-    dirs = _load_goto_aliases()
     alias, directory = args[1], os.getcwd()
-    dirs[alias] = directory
-    _save_goto_aliases(dirs)
+    _save_goto_aliases({alias: directory})
 
     return echo(f"Alias added: {alias} → {directory}")
 
@@ -83,8 +100,7 @@ def _remove_alias(*args: str) -> str:
     alias = args[1]
 
     if alias in dirs:
-        del dirs[alias]
-        _save_goto_aliases(dirs)
+        _save_goto_aliases({alias: None})
         return echo(f"Alias removed: {alias}")
 
     return echo(f"Alias not found: '{alias}'")
@@ -131,10 +147,78 @@ def _open_directory(*args: str) -> str:
     return echo(f"Alias not found: '{alias}'")
 
 
+def _index_directories(*args: str) -> str:
+    """
+    Indexes the repositories and projects under the index roots, so goto can navigate to
+    them by name without an alias.
+
+    Unchanged directories are not listed again, so refreshing the index is incremental.
+
+    Parameters:
+        args (str): Optionally, a directory to add to the index roots.
+
+    Returns:
+        str: A message summarizing the index, or an error message.
+    """
+    if len(args) > 2:
+        return echo("Invalid format. Use: goto -i [directory]")
+
+    roots = get_config()["goto"]["roots"]
+    if len(args) == 2:
+        root = os.path.abspath(os.path.expanduser(args[1]))
+        if not os.path.isdir(root):
+            return echo(f"Directory not found: '{root}'")
+        if root not in roots:
+            roots = [*roots, root]
+            update_config([(SET, ["goto", "roots"], roots)])
+    if not roots:
+        return echo("No directories to index. Use: goto -i <directory>")
+
+    start = time.perf_counter()
+    index = refresh(roots)
+    repositories = find_directories(index["entries"], REPOSITORY)
+    projects = find_directories(index["entries"], PROJECT)
+    return echo(
+        f"Indexed {len(repositories)} repositories and {len(projects)} projects "
+        f"under {len(roots)} directories in {time.perf_counter() - start:.2f}s."
+    )
+
+
+def _find_alias(alias: str, dirs: Dict[str, str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Looks up the alias a mistyped or partial name refers to.
+
+    Aliases are matched with the fuzzy matcher and ties between the closest matches are
+    broken by frecency. When nothing matches, the partial name is looked up in the
+    directory names too.
+
+    Parameters:
+        alias (str): The mistyped or partial alias.
+        dirs (Dict[str, str]): Dictionary mapping aliases, and the names of indexed directories, to directories.
+
+    Returns:
+        Tuple[Optional[str], List[str]]: The resolved alias, or None, and the closest aliases found.
+    """
+    matches = search(get_index("goto", dirs, (get_config_key(), get_index_key())), alias)
+    if not matches:
+        match = best_match(alias, dirs)
+        return (match[0], []) if match else (None, [])
+
+    visits, now = read_visits(), time.time()
+    resolved = resolve(matches, rank=lambda key: score(visits, dirs[key], now))
+    return resolved, [key for key, _ in matches]
+
+
 def _navigate(*args: str) -> str:
     """
     Navigates to a directory associated with a given alias.
 
+    Exact aliases are looked up in the alias store when there is one, so config.json is
+    only parsed when there is no alias with the given name. The repositories and projects
+    indexed with 'goto -i' are then looked up by name. Otherwise, the name is treated as
+    a mistyped or partial alias or indexed name and resolved to the closest one, using
+    frecency to break ties. Every navigation is recorded as a visit.
+
     Parameters:
         args (str): The alias to navigate to.
 
@@ -144,14 +228,27 @@ def _navigate(*args: str) -> str:
     if len(args) != 1:
         return echo("Invalid format. Use: goto <alias>")
 
-    dirs = _load_goto_aliases()
     alias = args[0]
-
-    if alias in dirs:
-        precho(f"Navigating to: {dirs[alias]}")
-        return f"cd {dirs[alias]}"
-
-    return echo(f"Alias not found: '{alias}'")
+    answered, directory = lookup("goto.dirs", alias)
+
+    if directory is None:
+        dirs = _load_goto_aliases()
+        if not answered:
+            sync()
+        if alias not in dirs:
+            dirs = {**indexed_names(load_index()), **dirs}
+        if alias not in dirs:
+            resolved, candidates = _find_alias(alias, dirs)
+            if resolved is None and candidates:
+                return echo(f"Alias not found: '{alias}'. Did you mean: {', '.join(candidates)}?")
+            if resolved is None:
+                return echo(f"Alias not found: '{alias}'")
+            alias = resolved
+        directory = dirs[alias]
+
+    record_visit(directory)
+    precho(f"Navigating to: {directory}")
+    return f"cd {directory}"
 
 
 methods: Dict[str, Callable[..., str]] = {
@@ -159,4 +256,5 @@ methods: Dict[str, Callable[..., str]] = {
     "-l": _list_aliases,
     "-r": _remove_alias,
     "-o": _open_directory,
+    "-i": _index_directories,
 }
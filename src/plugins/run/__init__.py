@@ -4,6 +4,12 @@ methods = {
     "run": {
         "method": run,
         "info": "Manage and run to predefined command aliases.",
-        "usage": "ikein run [-a <alias> <command>] | [<alias>] | [-l] | [-r <alias>]",
+        "usage": "ikein run [-a <alias> <command>] | [<alias>] | [-l] | [-r <alias>] | [-p [-j <workers>] <alias> ...] | [--cache-stats]",
+        "complete": {
+            "": ["-a", "-l", "-r", "-p", "--cache-stats", "@run.commands"],
+            "-r": ["@run.commands"],
+            "-p": ["-j", "@run.commands"],
+            "-j": [],
+        },
     }
 }
@@ -0,0 +1,378 @@
+import contextlib
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.bash import printsh
+from utils.config import atomic_write, get_path
+
+from .inputs import input_files
+from .parallel import run_alias
+
+CACHE_DIRECTORY = os.path.join("cache", "run")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+LOCK_FILE = "cache.lock"
+
+
+def _cache_path(*parts: str) -> str:
+    """
+    Returns the absolute path of a file inside the run cache.
+
+    Parameters:
+        parts (str): Path components relative to the run cache directory.
+
+    Returns:
+        str: The absolute path.
+    """
+    return get_path(os.path.join(CACHE_DIRECTORY, *parts))
+
+
+@contextlib.contextmanager
+def cache_lock() -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock on the run cache while the block runs.
+
+    Stores and evictions are serialized with it, so an eviction never deletes the objects
+    of an entry that is still being saved.
+
+    Yields:
+        None
+    """
+    os.makedirs(_cache_path(), exist_ok=True)
+    with open(_cache_path(LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _object_path(digest: str) -> str:
+    """
+    Returns the path of the object with the given digest in the content-addressed store.
+
+    Parameters:
+        digest (str): The SHA-256 digest of the object contents.
+
+    Returns:
+        str: The absolute path of the object.
+    """
+    return _cache_path("objects", digest[:2], digest)
+
+
+def file_digest(path: str) -> str:
+    """
+    Computes the SHA-256 digest of a file's contents.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    with open(path, "rb") as in_file:
+        return hashlib.file_digest(in_file, "sha256").hexdigest()
+
+
+def _store(data: bytes) -> str:
+    """
+    Stores data in the content-addressed store, unless an identical object exists.
+
+    Parameters:
+        data (bytes): The data to store.
+
+    Returns:
+        str: The digest of the stored object.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, data)
+    return digest
+
+
+def is_cacheable(entry: Dict[str, Any]) -> bool:
+    """
+    Tells whether the runs of an alias go through the run cache.
+
+    Only aliases declaring both 'outputs' and 'inputs' are cached: without inputs, the
+    cache key would never change and the first run would be replayed forever.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+
+    Returns:
+        bool: True if the alias is cacheable, otherwise False.
+    """
+    return bool(entry.get("outputs")) and bool(entry.get("inputs"))
+
+
+def outputs_exist(entry: Dict[str, Any]) -> bool:
+    """
+    Tells whether every output pattern of a run alias matches at least one file.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+
+    Returns:
+        bool: True if all the declared outputs exist, or the alias declares none, otherwise False.
+    """
+    return all(
+        any(
+            os.path.isfile(os.path.join(entry["directory"], path))
+            for path in glob.glob(pattern, root_dir=entry["directory"], recursive=True)
+        )
+        for pattern in entry.get("outputs", [])
+    )
+
+
+def cache_key(entry: Dict[str, Any]) -> Optional[str]:
+    """
+    Computes the cache key of a run alias from its command, directory and input contents.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+
+    Returns:
+        Optional[str]: The cache key, or None if the inputs of the alias match no file.
+    """
+    files = input_files(entry)
+    if not files:
+        return None
+
+    digest = hashlib.sha256(f"{entry['directory']}\0{entry['command']}".encode("utf-8"))
+    for path in files:
+        content_digest = file_digest(os.path.join(entry["directory"], path))
+        digest.update(f"\0{path}\0{content_digest}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _replay(alias: str, entry: Dict[str, Any], record: Dict[str, Any], width: int, lock: threading.Lock) -> bool:
+    """
+    Replays a cached run: prints its output and restores its output files.
+
+    Output files whose contents already match the cached ones are left untouched. Nothing
+    is replayed if an object of the entry is missing, e.g. deleted by a concurrent
+    eviction.
+
+    Parameters:
+        alias (str): The alias being replayed.
+        entry (Dict[str, Any]): The alias configuration.
+        record (Dict[str, Any]): The cache entry of the run.
+        width (int): Width the alias is padded to in the output prefix.
+        lock (threading.Lock): Lock serializing the output of all the aliases.
+
+    Returns:
+        bool: True if the run was replayed, False if an object of the entry is missing.
+    """
+    if not all(os.path.isfile(_object_path(digest)) for digest in _referenced(record)):
+        return False
+
+    for path, (digest, mode) in record["outputs"].items():
+        target = os.path.join(entry["directory"], path)
+        if os.path.isfile(target) and file_digest(target) == digest:
+            continue
+        with open(_object_path(digest), "rb") as in_file:
+            data = in_file.read()
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        atomic_write(target, data)
+        os.chmod(target, mode)
+
+    with open(_object_path(record["stdout"]), "r", errors="replace") as in_file:
+        for line in in_file:
+            with lock:
+                printsh(f"[{alias:<{width}}] {line.rstrip()}")
+    return True
+
+
+def _save(entry: Dict[str, Any], key: str, output: List[str]) -> None:
+    """
+    Stores the output and output files of a successful run in the cache.
+
+    The cache lock is held, so the stored objects cannot be evicted before the entry
+    referring to them is written.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+        key (str): The cache key of the run.
+        output (List[str]): The output lines of the run.
+    """
+    with cache_lock():
+        outputs, size = {}, 0
+        for pattern in entry["outputs"]:
+            for path in glob.glob(pattern, root_dir=entry["directory"], recursive=True):
+                source = os.path.join(entry["directory"], path)
+                if os.path.isfile(source):
+                    with open(source, "rb") as in_file:
+                        data = in_file.read()
+                    outputs[path] = [_store(data), os.stat(source).st_mode & 0o777]
+                    size += len(data)
+
+        stdout = "".join(output).encode("utf-8")
+        record = {"stdout": _store(stdout), "outputs": outputs, "size": size + len(stdout)}
+        os.makedirs(_cache_path("entries"), exist_ok=True)
+        atomic_write(_cache_path("entries", f"{key}.json"), json.dumps(record))
+
+
+def run_with_cache(
+    alias: str, entry: Dict[str, Any], width: int, lock: threading.Lock
+) -> Tuple[str, int, float, bool]:
+    """
+    Runs a cacheable run alias, replaying a cached run when its inputs did not change.
+
+    The alias runs without the cache when its inputs match no file, and executes when
+    its cached run cannot be replayed.
+
+    Parameters:
+        alias (str): The alias to run.
+        entry (Dict[str, Any]): The alias configuration.
+        width (int): Width the alias is padded to in the output prefix.
+        lock (threading.Lock): Lock serializing the output of all the aliases.
+
+    Returns:
+        Tuple[str, int, float, bool]: The alias, its exit code, its duration in seconds and whether the run was replayed from the cache.
+    """
+    start = time.perf_counter()
+    key = cache_key(entry)
+    if key is None:
+        return (*run_alias(alias, entry, width, lock), False)
+
+    entry_path = _cache_path("entries", f"{key}.json")
+    try:
+        with open(entry_path, "r") as in_file:
+            record = json.load(in_file)
+        if _replay(alias, entry, record, width, lock):
+            os.utime(entry_path)
+            return alias, 0, time.perf_counter() - start, True
+    except (OSError, ValueError):
+        pass
+
+    output: List[str] = []
+    _, returncode, duration = run_alias(alias, entry, width, lock, output)
+    if returncode == 0:
+        _save(entry, key, output)
+    return alias, returncode, duration, False
+
+
+def _entries() -> List[Tuple[float, str, Dict[str, Any]]]:
+    """
+    Lists the cache entries, from the least to the most recently used.
+
+    Returns:
+        List[Tuple[float, str, Dict[str, Any]]]: The last use time, path and contents of every entry.
+    """
+    entries = []
+    if not os.path.isdir(_cache_path("entries")):
+        return entries
+    with os.scandir(_cache_path("entries")) as scanner:
+        for item in scanner:
+            try:
+                with open(item.path, "r") as in_file:
+                    entries.append((item.stat().st_mtime, item.path, json.load(in_file)))
+            except (OSError, ValueError):
+                continue
+    return sorted(entries, key=lambda cached: cached[0])
+
+
+def _objects() -> Dict[str, int]:
+    """
+    Lists the objects of the content-addressed store.
+
+    Returns:
+        Dict[str, int]: Dictionary mapping object digests to their size in bytes.
+    """
+    objects = {}
+    for path in glob.glob(_cache_path("objects", "*", "*")):
+        if not path.endswith(".tmp"):
+            with contextlib.suppress(FileNotFoundError):
+                objects[os.path.basename(path)] = os.stat(path).st_size
+    return objects
+
+
+def _referenced(record: Dict[str, Any]) -> List[str]:
+    """
+    Returns the digests of the objects a cache entry refers to.
+
+    Parameters:
+        record (Dict[str, Any]): The cache entry.
+
+    Returns:
+        List[str]: The referenced object digests.
+    """
+    return [record["stdout"], *(digest for digest, _ in record["outputs"].values())]
+
+
+def evict(max_bytes: int) -> None:
+    """
+    Evicts the least recently used entries until the store fits in max_bytes, and deletes
+    the objects no entry refers to anymore.
+
+    The cache lock is held, and files already deleted by another process are skipped.
+
+    Parameters:
+        max_bytes (int): Maximum size of the content-addressed store, in bytes.
+    """
+    with cache_lock():
+        entries, objects = _entries(), _objects()
+        references: Dict[str, int] = {}
+        for _, _, record in entries:
+            for digest in _referenced(record):
+                references[digest] = references.get(digest, 0) + 1
+
+        size = sum(objects[digest] for digest in references if digest in objects)
+        for _, path, record in entries:
+            if size <= max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            for digest in _referenced(record):
+                references[digest] -= 1
+                if references[digest] == 0 and digest in objects:
+                    size -= objects[digest]
+
+        for digest in objects:
+            if references.get(digest, 0) == 0:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(_object_path(digest))
+
+
+def update_stats(hits: int, misses: int) -> None:
+    """
+    Adds the hits and misses of a run to the cache statistics.
+
+    Parameters:
+        hits (int): Number of runs replayed from the cache.
+        misses (int): Number of cacheable runs that had to execute.
+    """
+    if not hits and not misses:
+        return
+    with cache_lock():
+        stats = get_stats()
+        atomic_write(
+            _cache_path("stats.json"),
+            json.dumps({"hits": stats["hits"] + hits, "misses": stats["misses"] + misses}),
+        )
+
+
+def get_stats() -> Dict[str, int]:
+    """
+    Returns the cache statistics, including its current contents.
+
+    Returns:
+        Dict[str, int]: The hits, misses, entries, objects and size in bytes of the cache.
+    """
+    try:
+        with open(_cache_path("stats.json"), "r") as in_file:
+            stats = json.load(in_file)
+    except (OSError, ValueError):
+        stats = {"hits": 0, "misses": 0}
+
+    objects = _objects()
+    stats.update(entries=len(_entries()), objects=len(objects), size=sum(objects.values()))
+    return stats
@@ -0,0 +1,215 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.bash import precho
+
+from .cache import evict, is_cacheable, outputs_exist, run_with_cache, update_stats
+from .inputs import fingerprint, load_state, save_state
+from .parallel import run_alias
+
+SUCCEEDED = "ok"
+FAILED = "failed"
+UNCHANGED = "unchanged"
+CACHED = "cached"
+BLOCKED = "blocked"
+
+
+def build_graph(alias: str, commands: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Builds the dependency graph of a run alias from the 'depends_on' lists of the aliases.
+
+    Parameters:
+        alias (str): The alias to run.
+        commands (Dict[str, Dict[str, Any]]): Dictionary mapping every alias to its configuration.
+
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping every alias the given one depends on, directly or not, to its dependencies, in topological order.
+
+    Raises:
+        ValueError: If an alias is not found or the dependencies contain a cycle.
+    """
+    graph: Dict[str, List[str]] = {}
+
+    def visit(node: str, path: List[str]) -> None:
+        if node in path:
+            cycle = " → ".join(path[path.index(node) :] + [node])
+            raise ValueError(f"Dependency cycle found: {cycle}")
+        if node in graph:
+            return
+        if node not in commands:
+            required_by = f" (required by '{path[-1]}')" if path else ""
+            raise ValueError(f"Alias not found: '{node}'{required_by}")
+
+        dependencies = commands[node].get("depends_on", [])
+        for dependency in dependencies:
+            visit(dependency, path + [node])
+        graph[node] = list(dependencies)
+
+    visit(alias, [])
+    return graph
+
+
+def _execute(
+    alias: str, entry: Dict[str, Any], width: int, lock: threading.Lock
+) -> Tuple[str, int, float, bool]:
+    """
+    Runs an alias, through the run cache if it declares 'outputs' and 'inputs'.
+
+    Parameters:
+        alias (str): The alias to run.
+        entry (Dict[str, Any]): The alias configuration.
+        width (int): Width the alias is padded to in the output prefix.
+        lock (threading.Lock): Lock serializing the output of all the aliases.
+
+    Returns:
+        Tuple[str, int, float, bool]: The alias, its exit code, its duration in seconds and whether the run was replayed from the cache.
+    """
+    if is_cacheable(entry):
+        return run_with_cache(alias, entry, width, lock)
+    return (*run_alias(alias, entry, width, lock), False)
+
+
+def run_graph(
+    graph: Dict[str, List[str]],
+    commands: Dict[str, Dict[str, Any]],
+    max_workers: int,
+    cache_max_bytes: int,
+) -> Dict[str, Tuple[str, Optional[int], float]]:
+    """
+    Runs the aliases of a dependency graph, running independent aliases concurrently.
+
+    An alias starts once all its dependencies have succeeded, and is blocked if any of them
+    fails. An alias declaring 'inputs' is skipped when neither its command nor its inputs
+    changed since its last successful run, none of its dependencies had to run and all
+    its declared 'outputs' exist. An alias declaring 'outputs' and 'inputs' is replayed
+    from the run cache when an identical run exists.
+
+    Parameters:
+        graph (Dict[str, List[str]]): Dictionary mapping aliases to their dependencies.
+        commands (Dict[str, Dict[str, Any]]): Dictionary mapping every alias to its configuration.
+        max_workers (int): Maximum number of aliases running at the same time.
+        cache_max_bytes (int): Maximum size of the run cache, in bytes.
+
+    Returns:
+        Dict[str, Tuple[str, Optional[int], float]]: Dictionary mapping every alias to its status, exit code and duration in seconds.
+    """
+    state, fingerprints = load_state(), {}
+    pending = dict(graph)
+    results: Dict[str, Tuple[str, Optional[int], float]] = {}
+    running: Dict[Any, Tuple[str, Optional[str]]] = {}
+    lock, width = threading.Lock(), max(len(alias) for alias in graph)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [
+                alias
+                for alias, dependencies in pending.items()
+                if all(dependency in results for dependency in dependencies)
+            ]
+            for alias in ready:
+                statuses = [results[dependency][0] for dependency in pending.pop(alias)]
+                if FAILED in statuses or BLOCKED in statuses:
+                    results[alias] = (BLOCKED, None, 0.0)
+                    continue
+
+                current = fingerprint(commands[alias])
+                if (
+                    current is not None
+                    and state.get(alias) == current
+                    and SUCCEEDED not in statuses
+                    and outputs_exist(commands[alias])
+                ):
+                    results[alias] = (UNCHANGED, 0, 0.0)
+                    continue
+
+                future = executor.submit(_execute, alias, commands[alias], width, lock)
+                running[future] = (alias, current)
+
+            if ready and not running:
+                continue
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                alias, current = running.pop(future)
+                _, returncode, duration, cached = future.result()
+                status = CACHED if cached else SUCCEEDED if returncode == 0 else FAILED
+                results[alias] = (status, returncode, duration)
+                if returncode == 0 and current is not None:
+                    fingerprints[alias] = current
+
+    save_state(fingerprints)
+    cacheable = [alias for alias in results if is_cacheable(commands[alias])]
+    hits = sum(1 for alias in cacheable if results[alias][0] == CACHED)
+    misses = sum(1 for alias in cacheable if results[alias][0] in (SUCCEEDED, FAILED))
+    update_stats(hits, misses)
+    if misses:
+        evict(cache_max_bytes)
+    return results
+
+
+def critical_path(
+    graph: Dict[str, List[str]], results: Dict[str, Tuple[str, Optional[int], float]]
+) -> Tuple[float, List[str]]:
+    """
+    Finds the chain of dependent aliases that took the longest to run.
+
+    Parameters:
+        graph (Dict[str, List[str]]): Dictionary mapping aliases to their dependencies, in topological order.
+        results (Dict[str, Tuple[str, Optional[int], float]]): The status, exit code and duration of every alias.
+
+    Returns:
+        Tuple[float, List[str]]: The duration of the critical path, in seconds, and its aliases in execution order.
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for alias, dependencies in graph.items():
+        slowest = max(dependencies, key=lambda dependency: finish[dependency], default=None)
+        finish[alias] = results[alias][2] + (finish[slowest] if slowest else 0.0)
+        previous[alias] = slowest
+
+    node: Optional[str] = max(finish, key=lambda alias: finish[alias])
+    total, path = finish[node], []
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    return total, path[::-1]
+
+
+def report(
+    graph: Dict[str, List[str]],
+    results: Dict[str, Tuple[str, Optional[int], float]],
+    elapsed: float,
+) -> int:
+    """
+    Prints the outcome of every alias of the graph and the critical path timing.
+
+    Parameters:
+        graph (Dict[str, List[str]]): Dictionary mapping aliases to their dependencies, in topological order.
+        results (Dict[str, Tuple[str, Optional[int], float]]): The status, exit code and duration of every alias.
+        elapsed (float): Wall-clock time of the whole run, in seconds.
+
+    Returns:
+        int: The aggregated exit status: the first non-zero exit code, or 0 if no alias failed.
+    """
+    for alias in graph:
+        status, returncode, duration = results[alias]
+        if status == FAILED:
+            precho(f"{alias}: failed (exit {returncode}) in {duration:.2f}s")
+        elif status == BLOCKED:
+            precho(f"{alias}: not run, a dependency failed")
+        elif status == UNCHANGED:
+            precho(f"{alias}: skipped, inputs unchanged")
+        elif status == CACHED:
+            precho(f"{alias}: replayed from cache in {duration:.2f}s")
+        else:
+            precho(f"{alias}: ok in {duration:.2f}s")
+
+    total, path = critical_path(graph, results)
+    precho(f"Critical path ({total:.2f}s): {' → '.join(path)}")
+    precho(f"{len(graph)} aliases finished in {elapsed:.2f}s.")
+
+    failed = [results[alias][1] for alias in graph if results[alias][0] == FAILED]
+    return failed[0] if failed else 0
@@ -0,0 +1,77 @@
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.config import atomic_write, get_path
+
+STATE_FILE = "run_state.json"
+
+
+def input_files(entry: Dict[str, Any]) -> List[str]:
+    """
+    Expands the input patterns of a run alias into the files they match.
+
+    Patterns are glob patterns relative to the alias directory, and '**' matches any
+    number of directories.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+
+    Returns:
+        List[str]: The matching files, relative to the alias directory and sorted.
+    """
+    files = set()
+    for pattern in entry.get("inputs", []):
+        for path in glob.glob(pattern, root_dir=entry["directory"], recursive=True):
+            if os.path.isfile(os.path.join(entry["directory"], path)):
+                files.add(path)
+    return sorted(files)
+
+
+def fingerprint(entry: Dict[str, Any]) -> Optional[str]:
+    """
+    Computes a fingerprint of the command of a run alias and the state of its inputs.
+
+    The state of every input file is given by its path, size and modification time.
+
+    Parameters:
+        entry (Dict[str, Any]): The alias configuration.
+
+    Returns:
+        Optional[str]: The fingerprint, or None if the alias does not declare any inputs.
+    """
+    if not entry.get("inputs"):
+        return None
+
+    digest = hashlib.sha256(f"{entry['directory']}\0{entry['command']}".encode("utf-8"))
+    for path in input_files(entry):
+        stat = os.stat(os.path.join(entry["directory"], path))
+        digest.update(f"\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_state() -> Dict[str, str]:
+    """
+    Loads the fingerprints of the last successful run of every alias.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping aliases to fingerprints.
+    """
+    try:
+        with open(get_path(STATE_FILE), "r") as in_file:
+            return json.load(in_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(fingerprints: Dict[str, str]) -> None:
+    """
+    Records the fingerprints of aliases that have just run successfully.
+
+    Parameters:
+        fingerprints (Dict[str, str]): Dictionary mapping aliases to fingerprints.
+    """
+    if fingerprints:
+        atomic_write(get_path(STATE_FILE), json.dumps({**load_state(), **fingerprints}, indent=4))
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils.bash import precho, printsh
+
+
+def run_alias(
+    alias: str,
+    entry: Dict[str, str],
+    width: int,
+    lock: threading.Lock,
+    output: Optional[List[str]] = None,
+) -> Tuple[str, int, float]:
+    """
+    Runs the command of a run alias in its directory, prefixing every output line with the alias.
+
+    Parameters:
+        alias (str): The alias being run.
+        entry (Dict[str, str]): The alias configuration, with its directory and command.
+        width (int): Width the alias is padded to in the output prefix.
+        lock (threading.Lock): Lock serializing the output of all the aliases.
+        output (Optional[List[str]]): If given, every output line is also appended to it.
+
+    Returns:
+        Tuple[str, int, float]: The alias, its exit code and its duration in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            entry["command"],
+            shell=True,
+            cwd=entry["directory"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        )
+    except OSError as e:
+        with lock:
+            printsh(f"[{alias:<{width}}] {e}")
+        return alias, 127, time.perf_counter() - start
+
+    for line in process.stdout:
+        if output is not None:
+            output.append(line)
+        with lock:
+            printsh(f"[{alias:<{width}}] {line.rstrip()}")
+    return alias, process.wait(), time.perf_counter() - start
+
+
+def run_parallel(entries: Dict[str, Dict[str, str]], max_workers: int) -> List[Tuple[str, int, float]]:
+    """
+    Runs several run aliases concurrently, with at most max_workers at the same time.
+
+    The output of every alias is printed as it is produced, one line at a time.
+
+    Parameters:
+        entries (Dict[str, Dict[str, str]]): Dictionary mapping the aliases to run to their configuration.
+        max_workers (int): Maximum number of aliases running at the same time.
+
+    Returns:
+        List[Tuple[str, int, float]]: The alias, exit code and duration in seconds of every alias, in the given order.
+    """
+    lock = threading.Lock()
+    width = max(len(alias) for alias in entries)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(run_alias, alias, entry, width, lock)
+            for alias, entry in entries.items()
+        ]
+        return [future.result() for future in futures]
+
+
+def summarize(results: List[Tuple[str, int, float]], elapsed: float) -> int:
+    """
+    Prints the outcome of every alias and the total wall-clock time.
+
+    Parameters:
+        results (List[Tuple[str, int, float]]): The alias, exit code and duration of every alias.
+        elapsed (float): Wall-clock time of the whole run, in seconds.
+
+    Returns:
+        int: The aggregated exit status: the first non-zero exit code, or 0 if every alias succeeded.
+    """
+    for alias, returncode, duration in results:
+        status = "ok" if returncode == 0 else f"failed (exit {returncode})"
+        precho(f"{alias}: {status} in {duration:.2f}s")
+
+    failed = [returncode for _, returncode, _ in results if returncode != 0]
+    precho(
+        f"{len(results)} aliases finished in {elapsed:.2f}s "
+        f"(sum {sum(duration for _, _, duration in results):.2f}s), {len(failed)} failed."
+    )
+    return failed[0] if failed else 0
+
+
+def default_workers() -> int:
+    """
+    Returns the default number of aliases run at the same time.
+
+    Returns:
+        int: The number of CPUs available.
+    """
+    return os.cpu_count() or 1
@@ -1,9 +1,19 @@
 import os
 import subprocess
-from typing import Callable, Dict, List
+import time
+from typing import Any, Callable, Dict, List, Optional
 
-from utils.bash import echo, precho
-from utils.config import get_config, save_config
+from utils.alias_store import lookup, sync
+from utils.bash import echo, precho, require_foreground
+from utils.config import DELETE, SET, get_config, get_config_key, update_config
+from utils.fuzzy import get_index, resolve, search
+
+from .cache import DEFAULT_MAX_BYTES, get_stats
+from .graph import build_graph, report, run_graph
+from .parallel import default_workers, run_parallel, summarize
+
+# Keys of the aliases that are run from Python, together with their dependencies.
+GRAPH_KEYS = ("depends_on", "inputs", "outputs")
 
 
 def run(*args: str) -> str:
@@ -30,20 +40,25 @@ def _load_run_aliases() -> Dict[str, Dict[str, str]]:
     Returns:
         dict: A dictionary of run aliases where the key is the alias and the value is a dictionary containing the directory and command.
     """
-    return get_config().get("run", {}).get("commands", {})
+    return get_config()["run"]["commands"]
 
 
-def _save_run_aliases(commands: Dict[str, Dict[str, str]]) -> None:
+def _save_run_aliases(commands: Dict[str, Optional[Dict[str, str]]]) -> None:
     """
-    Saves the updated run aliases to the configuration.
+    Saves changes to the run aliases in the configuration.
+
+    Only the given aliases are merged into the configuration on disk, so aliases saved
+    concurrently by other ikein processes are preserved.
 
     Parameters:
-        commands (dict): A dictionary of run aliases to save.
+        commands (dict): A dictionary of run aliases to save, where a None value removes the alias.
     """
-    config = get_config()
-    config.setdefault("run", {})["commands"] = commands
-    commands.pop("key", None)  # Ensures 'key' is not mistakenly stored
-    save_config(config)
+    operations = []
+    for alias, value in commands.items():
+        operation = DELETE if value is None else SET
+        operations.append((operation, ["run", "commands", alias], value))
+    update_config(operations)
+    sync()
 
 
 def _add_alias(*args: str) -> str:
@@ -59,10 +74,8 @@ def _add_alias(*args: str) -> str:
     if len(args) < 2:
         return echo("Invalid format. Use: run -a <alias> <command>")
 
-    commands = _load_run_aliases()
     alias, directory, command = args[1], os.getcwd(), " ".join(args[2:])
-    commands[alias] = {"directory": directory, "command": command}
-    _save_run_aliases(commands)
+    _save_run_aliases({alias: {"directory": directory, "command": command}})
 
     return echo(f"Alias added: {alias} → {directory} {command}")
 
@@ -84,8 +97,7 @@ def _remove_alias(*args: str) -> str:
     alias = args[1]
 
     if alias in commands:
-        del commands[alias]
-        _save_run_aliases(commands)
+        _save_run_aliases({alias: None})
         return echo(f"Alias removed: {alias}")
 
     return echo(f"Alias not found: '{alias}'")
@@ -116,6 +128,11 @@ def _execute_command(*args: str) -> str:
     """
     Executes a command associated with a given alias.
 
+    A mistyped alias is resolved to the closest match when it is unambiguous; otherwise
+    the closest aliases are suggested. Aliases declaring 'depends_on', 'inputs' or 'outputs'
+    are run from Python together with their dependencies. Plain aliases are looked up in
+    the alias store when there is one, without parsing config.json.
+
     Parameters:
         args (str): The alias to execute.
 
@@ -125,17 +142,126 @@ def _execute_command(*args: str) -> str:
     if len(args) != 1:
         return echo("Invalid format. Use: run <alias>")
 
-    commands = _load_run_aliases()
     alias = args[0]
+    answered, entry = lookup("run.commands", alias)
+    if entry is not None and not any(entry.get(key) for key in GRAPH_KEYS):
+        return f"cd {entry['directory']}; {entry['command']}; cd {os.getcwd()};"
 
-    if alias in commands:
-        return f"cd {commands[alias]['directory']}; {commands[alias]['command']}; cd {os.getcwd()};"
+    commands = _load_run_aliases()
+    if not answered:
+        sync()
 
-    return echo(f"Alias not found: '{alias}'")
+    if alias not in commands:
+        matches = search(get_index("run", commands, get_config_key()), alias)
+        resolved = resolve(matches)
+        if resolved is None and matches:
+            candidates = ", ".join(key for key, _ in matches)
+            return echo(f"Alias not found: '{alias}'. Did you mean: {candidates}?")
+        if resolved is None:
+            return echo(f"Alias not found: '{alias}'")
+        alias = resolved
+        precho(f"Running alias: {alias}")
+
+    if any(commands[alias].get(key) for key in GRAPH_KEYS):
+        return _execute_graph(alias, commands)
+
+    return f"cd {commands[alias]['directory']}; {commands[alias]['command']}; cd {os.getcwd()};"
+
+
+def _execute_graph(alias: str, commands: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Executes an alias together with the aliases it depends on.
+
+    Independent aliases run concurrently, aliases whose inputs did not change are skipped
+    or replayed from the run cache, and the critical path of the run is reported at the end.
+
+    Parameters:
+        alias (str): The alias to execute.
+        commands (Dict[str, Dict[str, Any]]): Dictionary mapping every alias to its configuration.
+
+    Returns:
+        str: A command that sets the aggregated exit status, or an error message if the dependencies are invalid.
+    """
+    try:
+        graph = build_graph(alias, commands)
+    except ValueError as e:
+        return echo(str(e))
+
+    require_foreground()
+    start = time.perf_counter()
+    cache_max_bytes = get_config()["run"].get("cacheMaxBytes", DEFAULT_MAX_BYTES)
+    results = run_graph(graph, commands, _max_workers(), cache_max_bytes)
+    return f"(exit {report(graph, results, time.perf_counter() - start)})"
+
+
+def _max_workers() -> int:
+    """
+    Returns the maximum number of aliases run at the same time.
+
+    Returns:
+        int: The 'maxParallel' setting of the run configuration, or the number of CPUs.
+    """
+    return get_config()["run"].get("maxParallel", default_workers())
+
+
+def _execute_parallel(*args: str) -> str:
+    """
+    Executes the commands of several aliases concurrently.
+
+    Every alias runs in its own directory and its output is printed line by line, prefixed
+    with the alias. The number of aliases running at the same time is taken from the -j
+    option, the 'maxParallel' setting of the run configuration or the number of CPUs.
+
+    Parameters:
+        args (str): The -p flag, an optional -j <workers> option and the aliases to execute.
+
+    Returns:
+        str: A command that sets the aggregated exit status, or an error message if an alias is not found.
+    """
+    aliases, max_workers = list(args[1:]), _max_workers()
+    if aliases[:1] == ["-j"]:
+        if len(aliases) < 2 or not aliases[1].isdigit() or int(aliases[1]) < 1:
+            return echo("Invalid format. Use: run -p [-j <workers>] <alias> [<alias> ...]")
+        max_workers, aliases = int(aliases[1]), aliases[2:]
+    if not aliases:
+        return echo("Invalid format. Use: run -p [-j <workers>] <alias> [<alias> ...]")
+
+    commands = _load_run_aliases()
+    missing = [alias for alias in aliases if alias not in commands]
+    if missing:
+        return echo(f"Alias not found: {', '.join(missing)}")
+
+    require_foreground()
+    start = time.perf_counter()
+    results = run_parallel({alias: commands[alias] for alias in aliases}, max_workers)
+    return f"(exit {summarize(results, time.perf_counter() - start)})"
+
+
+def _cache_stats(_) -> str:
+    """
+    Shows the statistics of the run cache.
+
+    Parameters:
+        _: Unused argument to match function signature.
+
+    Returns:
+        str: A message with the hits, misses and size of the run cache.
+    """
+    stats = get_stats()
+    max_bytes = get_config()["run"].get("cacheMaxBytes", DEFAULT_MAX_BYTES)
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{100 * stats['hits'] / lookups:.0f}%" if lookups else "n/a"
+    return echo(
+        f"Run cache: {stats['entries']} entries, {stats['objects']} objects, "
+        f"{stats['size'] / 1024 / 1024:.1f} MB of {max_bytes / 1024 / 1024:.1f} MB.\n"
+        f"Hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {hit_rate}."
+    )
 
 
 methods: Dict[str, Callable[..., str]] = {
     "-a": _add_alias,
     "-l": _list_aliases,
     "-r": _remove_alias,
+    "-p": _execute_parallel,
+    "--cache-stats": _cache_stats,
 }
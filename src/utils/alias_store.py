@@ -0,0 +1,220 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import CONFIG_FILE, DELETE, atomic_write, get_config, get_path, read_journal
+
+STORE_FILE = "aliases.store"
+STORE_THRESHOLD = 10000
+
+# Tables of the configuration mirrored in the store, by name and path in config.json.
+TABLES: Dict[str, List[str]] = {
+    "goto.dirs": ["goto", "dirs"],
+    "run.commands": ["run", "commands"],
+}
+
+MAGIC = b"IKAS"
+VERSION = 1
+# Magic, version, and the mtime and size of the config.json the store was built from.
+HEADER = struct.Struct("<4sIQQI")
+# Table name, number of entries and offset of its index.
+TABLE = struct.Struct("<16sQQ")
+OFFSET = struct.Struct("<Q")
+# Key length and value length of a record, followed by the key and the JSON value.
+RECORD = struct.Struct("<II")
+
+
+def _table(configuration: Dict[str, Any], path: List[str]) -> Dict[str, Any]:
+    """
+    Returns a table of the configuration, or an empty one if it does not exist.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data.
+        path (List[str]): The keys leading to the table.
+
+    Returns:
+        Dict[str, Any]: The table.
+    """
+    table = configuration
+    for key in path:
+        table = table.get(key, {}) if isinstance(table, dict) else {}
+    return table if isinstance(table, dict) else {}
+
+
+def build_store(configuration: Dict[str, Any], config_key: Tuple[int, int]) -> bytes:
+    """
+    Serializes the alias tables of a configuration into the binary store format.
+
+    Every table holds its records sorted by the UTF-8 bytes of their keys, and an index of
+    fixed-size record offsets, so a key is found with a binary search that only touches
+    the pages of the records it compares.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data.
+        config_key (Tuple[int, int]): The (mtime_ns, size) key of the configuration file.
+
+    Returns:
+        bytes: The store contents.
+    """
+    mtime_ns, size = config_key
+    tables = {
+        name: sorted(
+            (key.encode("utf-8"), json.dumps(value).encode("utf-8"))
+            for key, value in _table(configuration, path).items()
+        )
+        for name, path in TABLES.items()
+    }
+
+    offset = HEADER.size + TABLE.size * len(tables)
+    directory, chunks = [], []
+    for name, records in tables.items():
+        index_offset = offset
+        offset += OFFSET.size * len(records)
+        offsets = []
+        for key, value in records:
+            offsets.append(OFFSET.pack(offset))
+            offset += RECORD.size + len(key) + len(value)
+        directory.append(TABLE.pack(name.encode("utf-8"), len(records), index_offset))
+        chunks.append(b"".join(offsets))
+        chunks.extend(RECORD.pack(len(key), len(value)) + key + value for key, value in records)
+
+    header = HEADER.pack(MAGIC, VERSION, mtime_ns, size, len(tables))
+    return b"".join([header, *directory, *chunks])
+
+
+def sync() -> None:
+    """
+    Brings the store in line with config.json.
+
+    The store is only kept when the alias tables hold at least STORE_THRESHOLD entries;
+    smaller configurations are parsed quickly enough and the store is removed. Updates
+    held in the journal do not change config.json, so they leave the store current.
+    """
+    path = get_path(STORE_FILE)
+    try:
+        config_stat = os.stat(get_path(CONFIG_FILE))
+    except FileNotFoundError:
+        return
+    config_key = config_stat.st_mtime_ns, config_stat.st_size
+    if _store_key(path) == config_key:
+        return
+
+    configuration = get_config()
+    entries = sum(len(_table(configuration, path)) for path in TABLES.values())
+    if entries < STORE_THRESHOLD:
+        if os.path.exists(path):
+            os.unlink(path)
+        return
+    atomic_write(path, build_store(configuration, config_key))
+
+
+def _store_key(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Reads the version of config.json a store file was built from.
+
+    Parameters:
+        path (str): The path of the store file.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (mtime_ns, size) of config.json, or None if the store is missing or invalid.
+    """
+    try:
+        with open(path, "rb") as in_file:
+            magic, version, mtime_ns, size, _ = HEADER.unpack(in_file.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or version != VERSION:
+        return None
+    return mtime_ns, size
+
+
+def _journaled(table: str, key: str) -> Optional[Tuple[bool, Optional[Any]]]:
+    """
+    Looks up a key in the updates held in the configuration journal.
+
+    Parameters:
+        table (str): The table name, e.g. "goto.dirs".
+        key (str): The key to look up.
+
+    Returns:
+        Optional[Tuple[bool, Optional[Any]]]: None if the journal does not change the key, otherwise the lookup result: whether it can be answered without the configuration, which is not the case when the whole table was changed, and the latest value, or None if the key was deleted.
+    """
+    target = TABLES[table] + [key]
+    result = None
+    for operation, path, value in read_journal()[1]:
+        if path == target:
+            result = (True, None if operation == DELETE else value)
+        elif target[: len(path)] == path:
+            result = (False, None)
+    return result
+
+
+def lookup(table: str, key: str) -> Tuple[bool, Optional[Any]]:
+    """
+    Looks up a key in a table of the store without parsing config.json.
+
+    Updates held in the configuration journal take precedence over the store. The journal
+    is read before config.json is checked, so a compaction in between is never missed.
+
+    Parameters:
+        table (str): The table name, e.g. "goto.dirs".
+        key (str): The key to look up.
+
+    Returns:
+        Tuple[bool, Optional[Any]]: Whether the store could answer, i.e. it exists and matches config.json, and the value found, or None if the key does not exist.
+    """
+    journaled = _journaled(table, key)
+    try:
+        config_stat = os.stat(get_path(CONFIG_FILE))
+        with open(get_path(STORE_FILE), "rb") as in_file:
+            data = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False, None
+
+    with data:
+        try:
+            magic, version, mtime_ns, size, table_count = HEADER.unpack_from(data)
+        except struct.error:
+            return False, None
+        if (magic, version, mtime_ns, size) != (MAGIC, VERSION, config_stat.st_mtime_ns, config_stat.st_size):
+            return False, None
+        if journaled is not None:
+            return journaled
+
+        for position in range(table_count):
+            name, count, index_offset = TABLE.unpack_from(data, HEADER.size + position * TABLE.size)
+            if name.rstrip(b"\0").decode("utf-8") == table:
+                return True, _search(data, count, index_offset, key.encode("utf-8"))
+    return True, None
+
+
+def _search(data: mmap.mmap, count: int, index_offset: int, key: bytes) -> Optional[Any]:
+    """
+    Binary searches a table of the store for a key.
+
+    Parameters:
+        data (mmap.mmap): The mapped store.
+        count (int): Number of records of the table.
+        index_offset (int): Offset of the table index.
+        key (bytes): The UTF-8 encoded key.
+
+    Returns:
+        Optional[Any]: The decoded value, or None if the key does not exist.
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        (offset,) = OFFSET.unpack_from(data, index_offset + middle * OFFSET.size)
+        key_length, value_length = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        current = data[start : start + key_length]
+        if current == key:
+            value_start = start + key_length
+            return json.loads(data[value_start : value_start + value_length])
+        if current < key:
+            low = middle + 1
+        else:
+            high = middle
+    return None
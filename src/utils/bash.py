@@ -4,6 +4,10 @@ from typing import Dict
 
 IKEIN_NAME = "- [I.K.E.I.N.]"
 
+# State of the command being run by utils.server.run_captured, i.e. by the daemon or in
+# a batch. "foreground" is set when the command asked to run in its own process instead.
+captured: Dict[str, bool] = {"active": False, "foreground": False}
+
 
 def __escape_special_characters(text: str) -> str:
     """
@@ -43,22 +47,25 @@ def echo(message: str) -> str:
 
 def precho(message: str) -> None:
     """
-    Prints a formatted message with escaped characters.
+    Prints a formatted message.
+
+    The output is displayed as is, since the command to run is handed over separately
+    by utils.wrapper.emit_command.
 
     Parameters:
         message (str): The message to print.
     """
-    print(__escape_special_characters(f"{IKEIN_NAME}: {message}"))
+    print(f"{IKEIN_NAME}: {message}")
 
 
 def printsh(message: str) -> None:
     """
-    Prints a message with escaped characters.
+    Prints a message.
 
     Parameters:
         message (str): The message to print.
     """
-    print(__escape_special_characters(message))
+    print(message)
 
 
 def secure_input(prompt: str) -> str:
@@ -97,3 +104,19 @@ def confirm(prompt: str) -> bool:
         flush=True,
     )
     return input().lower() == "y"
+
+
+def require_foreground() -> None:
+    """
+    Makes a command run in the foreground ikein.py process instead of the daemon.
+
+    Commands running child processes for long call it before starting them, so their
+    output is streamed, Ctrl-C reaches them and the daemon keeps serving other clients.
+    The daemon then answers with a fallback, as for commands reading user input.
+
+    Raises:
+        EOFError: If the command is run by utils.server.run_captured.
+    """
+    if captured["active"]:
+        captured["foreground"] = True
+        raise EOFError("This command must run in the foreground, not in server mode.")
@@ -0,0 +1,96 @@
+import json
+import os
+import shlex
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from . import config
+from .server import run_captured
+
+
+def parse_line(line: str, cwd: str) -> Dict[str, Any]:
+    """
+    Parses a line of a batch into a command.
+
+    A line is either a JSON array of arguments, a JSON object with the 'args' and
+    optionally the 'cwd' and 'id' of the command, or a command line split like a shell
+    would, e.g. 'goto project' or "run 'my task'".
+
+    Parameters:
+        line (str): The line, without its trailing newline.
+        cwd (str): Working directory of the command when the line does not set one.
+
+    Returns:
+        Dict[str, Any]: The command, with its 'args', 'cwd' and 'id', the latter None unless set by the line.
+
+    Raises:
+        ValueError: If the line is neither valid JSON nor a valid command line, or its arguments or working directory are not strings.
+    """
+    if line.startswith(("[", "{")):
+        payload = json.loads(line)
+        if isinstance(payload, list):
+            payload = {"args": payload}
+        if not isinstance(payload, dict) or not isinstance(payload.get("args"), list):
+            raise ValueError("Expected a JSON array of arguments or an object with 'args'.")
+        if not all(isinstance(arg, str) for arg in payload["args"]):
+            raise ValueError("Expected every argument to be a string.")
+        if not isinstance(payload.get("cwd", cwd), str):
+            raise ValueError("Expected 'cwd' to be a string.")
+        return {"args": payload["args"], "cwd": payload.get("cwd", cwd), "id": payload.get("id")}
+    return {"args": shlex.split(line), "cwd": cwd, "id": None}
+
+
+def run_batch(
+    plugins_path: str,
+    load: Callable[[str], Tuple],
+    dispatch: Callable[[Tuple, List[str]], Optional[str]],
+    in_stream: TextIO,
+    out_stream: TextIO,
+) -> int:
+    """
+    Runs the commands read from a stream, one per line, against a single loaded registry.
+
+    The plugins are loaded once and the configuration is parsed once, then shared by
+    every command until a command changes it. Every command runs as in server mode: its
+    output is captured and reading user input fails. A JSON line is written and flushed
+    for every non-empty input line, before the next command runs, holding the 'id' of
+    the command (its line number unless the line sets one), its 'args', and the
+    'fallback', 'output', 'error' and 'command' of utils.server.run_captured. A line
+    that cannot be parsed, or whose working directory does not exist, gets a frame with
+    the error and a None 'command'.
+
+    Parameters:
+        plugins_path (str): Name of the plugins package.
+        load (Callable[[str], Tuple]): Loader returning the ikein registry for the package.
+        dispatch (Callable[[Tuple, List[str]], Optional[str]]): Executes a command line against the registry and returns the shell command to run.
+        in_stream (TextIO): The stream to read the commands from.
+        out_stream (TextIO): The stream to write the results to.
+
+    Returns:
+        int: The number of commands that could not be run, because their line is invalid or they need interactive input.
+    """
+    registry = load(plugins_path)
+    cwd, failed = os.getcwd(), 0
+    for number, line in enumerate(in_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        frame: Dict[str, Any] = {"id": number, "args": None}
+        try:
+            command = parse_line(line, cwd)
+            frame.update(id=number if command["id"] is None else command["id"], args=command["args"])
+            frame.update(run_captured(command["args"], command["cwd"], lambda args: dispatch(registry, args)))
+        except (ValueError, OSError) as e:
+            frame.update(fallback=False, output="", error=f"Invalid batch line: {e}\n", command=None)
+            failed += 1
+        else:
+            failed += frame["fallback"]
+        # A command that changed the cached configuration without saving it must not leak
+        # those changes into the next command.
+        if config.is_dirty():
+            config.reload()
+        out_stream.write(json.dumps(frame) + "\n")
+        out_stream.flush()
+
+    config.compact()
+    return failed
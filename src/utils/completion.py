@@ -0,0 +1,192 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .config import CONFIG_FILE, JOURNAL_FILE, atomic_write, get_path
+from .git_refs import find_repository, local_branches, refs_signature
+from .loads import MANIFEST_FILE, get_manifest
+
+COMPLETION_FILE = "completion.json"
+BRANCHES_FILE = "completion.branches.json"
+MAX_REPOSITORIES = 32
+
+# Candidate sources a command can list in the 'complete' entry of its plugin methods.
+# Any other source starting with '@' names a table of config.json, e.g. '@goto.dirs'.
+COMMANDS_SOURCE = "@commands"
+BRANCHES_SOURCE = "@branches"
+
+# Candidates of the core commands, which are not part of any plugin.
+CORE_COMPLETIONS: Dict[str, Dict[str, List[str]]] = {
+    "usage": {"": [COMMANDS_SOURCE]},
+    "stats": {"": [COMMANDS_SOURCE]},
+}
+
+
+def _file_key(filename: str) -> Optional[List[int]]:
+    """
+    Builds the version key of a file of the IKEIN home.
+
+    Parameters:
+        filename (str): The name of the file.
+
+    Returns:
+        Optional[List[int]]: The [mtime_ns, size] key, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(get_path(filename))
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _read(filename: str) -> Dict[str, Any]:
+    """
+    Reads a completion cache file.
+
+    Parameters:
+        filename (str): The name of the cache file.
+
+    Returns:
+        Dict[str, Any]: The cache contents, or an empty dictionary if it is missing or invalid.
+    """
+    try:
+        with open(get_path(filename), "r") as in_file:
+            return json.load(in_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_index(key: List[Optional[List[int]]]) -> Dict[str, Any]:
+    """
+    Precomputes the completion candidates of every command and writes them to the cache.
+
+    Commands and their 'complete' entries are read from the command manifest, so plugins
+    are only imported when the manifest itself is out of date. The aliases and profiles
+    the commands refer to are read from the configuration.
+
+    Parameters:
+        key (List[Optional[List[int]]]): The versions of the manifest, config.json and the journal the index is built from.
+
+    Returns:
+        Dict[str, Any]: The completion index.
+    """
+    from .config import get_config
+    from .core import methods as core_methods
+
+    manifest = get_manifest("plugins")
+    completions = dict(CORE_COMPLETIONS)
+    for commands in manifest["plugins"].values():
+        completions.update(
+            {command: entry["complete"] for command, entry in commands.items() if entry.get("complete")}
+        )
+    commands = sorted({*manifest["commands"], *core_methods["ikein"]})
+
+    sources = {}
+    configuration = get_config()
+    for spec in completions.values():
+        for source in (source for candidates in spec.values() for source in candidates):
+            if source.startswith("@") and source not in (COMMANDS_SOURCE, BRANCHES_SOURCE):
+                table: Any = configuration
+                for name in source[1:].split("."):
+                    table = table.get(name, {}) if isinstance(table, dict) else {}
+                names = table if isinstance(table, dict) else {}
+                sources[source] = "\n".join(sorted(names))
+
+    index = {
+        "key": key,
+        "commands": "\n".join(commands),
+        "completions": completions,
+        "sources": sources,
+    }
+    atomic_write(get_path(COMPLETION_FILE), json.dumps(index))
+    return index
+
+
+def get_index() -> Dict[str, Any]:
+    """
+    Returns the completion index, rebuilding it if the manifest or the configuration changed.
+
+    Returns:
+        Dict[str, Any]: The completion index.
+    """
+    key = [_file_key(MANIFEST_FILE), _file_key(CONFIG_FILE), _file_key(JOURNAL_FILE)]
+    index = _read(COMPLETION_FILE)
+    if index.get("key") == key:
+        return index
+    return build_index(key)
+
+
+def get_branches(path: str) -> List[str]:
+    """
+    Returns the local branches of the repository containing a directory.
+
+    The branch list of every repository is cached and reused while its refs are unchanged.
+
+    Parameters:
+        path (str): The directory to start searching the repository from.
+
+    Returns:
+        List[str]: The branch names, or an empty list outside a supported repository.
+    """
+    repository = find_repository(path)
+    if repository is None:
+        return []
+
+    common_dir = repository["common_dir"]
+    signature = refs_signature(common_dir)
+    repositories = _read(BRANCHES_FILE)
+    cached = repositories.get(common_dir)
+    if cached and cached["signature"] == signature:
+        return cached["names"].split("\n") if cached["names"] else []
+
+    names = local_branches(common_dir)
+    repositories.pop(common_dir, None)
+    repositories[common_dir] = {"signature": signature, "names": "\n".join(names)}
+    while len(repositories) > MAX_REPOSITORIES:
+        repositories.pop(next(iter(repositories)))
+    atomic_write(get_path(BRANCHES_FILE), json.dumps(repositories))
+    return names
+
+
+def complete(position: int, words: List[str], cwd: str) -> List[str]:
+    """
+    Lists the completion candidates of a word of an ikein command line.
+
+    The candidates of an argument come from the 'complete' entry of the command, a
+    dictionary mapping a preceding word to its candidate sources: the previous word is
+    tried first, then the first argument, and the '' entry lists the candidates of the
+    first argument itself.
+
+    Parameters:
+        position (int): Index of the word being completed, 0 being the command.
+        words (List[str]): The words of the command line after 'ikein', up to the one being completed.
+        cwd (str): The directory ikein is called from, used to find the repository branches.
+
+    Returns:
+        List[str]: The candidates starting with the word being completed.
+    """
+    prefix = words[position] if position < len(words) else ""
+    index = get_index()
+    if position == 0:
+        sources = [COMMANDS_SOURCE]
+    else:
+        spec = index["completions"].get(words[0], {})
+        if position > 1 and words[position - 1] in spec:
+            sources = spec[words[position - 1]]
+        elif position > 1 and words[1] in spec:
+            sources = spec[words[1]]
+        else:
+            sources = spec.get("", []) if position == 1 else []
+
+    candidates: List[str] = []
+    for source in sources:
+        if source == COMMANDS_SOURCE:
+            candidates.extend(index["commands"].split("\n"))
+        elif source == BRANCHES_SOURCE:
+            candidates.extend(get_branches(cwd))
+        elif source.startswith("@"):
+            names = index["sources"].get(source, "")
+            candidates.extend(names.split("\n") if names else [])
+        else:
+            candidates.append(source)
+    return [candidate for candidate in candidates if candidate.startswith(prefix)]
@@ -1,29 +1,370 @@
+import contextlib
+import fcntl
 import json
 import os
-from typing import Any, Dict
+import stat
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .migrations import upgrade
+from .profile import phase
+
+ROOT_DIRECTORY = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+)
+# When running from the ikein.pyz bundle, the IKEIN root is the directory holding it.
+if os.path.isfile(ROOT_DIRECTORY):
+    ROOT_DIRECTORY = os.path.dirname(ROOT_DIRECTORY)
+HOME_VARIABLE = "IKEIN_HOME"
+CONFIG_FILE = "config.json"
+LOCK_FILE = "config.json.lock"
+JOURNAL_FILE = "config.journal"
+
+# Size of config.json from which key-level updates are appended to the journal instead
+# of rewriting the whole file, and size of the journal that triggers its compaction.
+JOURNAL_MIN_BYTES = 256 * 1024
+COMPACT_BYTES = 1024 * 1024
+
+SET = "set"
+DELETE = "delete"
+
+# In-process cache of the configuration document. "key" identifies the versions of
+# config.json and of the journal the document was read from, and "text" is the serialized
+# form last read or written, used to detect unsaved changes. "text" is None while the
+# document includes journaled changes not yet compacted into config.json, or changes
+# made by upgrade(). "snapshot" is "text" parsed again, built on the first is_dirty()
+# call. "upgraded" is True until the upgraded document is saved.
+_cache: Dict[str, Any] = {"key": None, "document": None, "text": None, "snapshot": None, "upgraded": False}
+
+
+def get_path(filename: str) -> str:
+    """
+    Returns the absolute path of a data file, such as config.json, stored in the IKEIN home.
+
+    The IKEIN home is the installation directory, unless the IKEIN_HOME environment
+    variable points to another directory, e.g. to run against an isolated configuration.
+
+    Parameters:
+        filename (str): The file name, relative to the IKEIN home.
+
+    Returns:
+        str: The absolute path of the file.
+    """
+    return os.path.join(os.environ.get(HOME_VARIABLE) or ROOT_DIRECTORY, filename)
+
+
+def _file_key(filepath: str) -> Optional[Tuple[int, int]]:
+    """
+    Builds the version key of a file from its modification time and size.
+
+    Parameters:
+        filepath (str): The path of the file.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (mtime_ns, size) key, or None if the file does not exist.
+    """
+    try:
+        info = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def _config_key() -> Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+    """
+    Builds the cache key of the configuration from the versions of config.json and the journal.
+
+    Returns:
+        Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]: The path of config.json and the (mtime_ns, size) keys of config.json and the journal.
+    """
+    return get_path(CONFIG_FILE), _file_key(get_path(CONFIG_FILE)), _file_key(get_path(JOURNAL_FILE))
+
+
+def _serialize(configuration: Dict[str, Any]) -> str:
+    """
+    Serializes the configuration exactly as it is stored in config.json.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data.
+
+    Returns:
+        str: The serialized configuration.
+    """
+    return json.dumps(configuration, indent=4)
+
+
+def atomic_write(filepath: str, contents: Union[str, bytes]) -> None:
+    """
+    Writes a file atomically so readers never observe a partially written file.
+
+    The contents are written to a temporary file in the same directory, flushed to disk
+    and then renamed over the destination, keeping the permissions of the previous file.
+
+    Parameters:
+        filepath (str): The path of the file to write.
+        contents (Union[str, bytes]): The file contents, written in binary mode if given as bytes.
+    """
+    directory = os.path.dirname(filepath)
+    descriptor, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb" if isinstance(contents, bytes) else "w") as out_file:
+            out_file.write(contents)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        if os.path.exists(filepath):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(filepath).st_mode))
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+    directory_descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_descriptor)
+    finally:
+        os.close(directory_descriptor)
+
+
+@contextlib.contextmanager
+def config_lock() -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock on the configuration while the block runs.
+
+    Yields:
+        None
+    """
+    with open(get_path(LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_journal() -> Tuple[Optional[Tuple[int, int]], List[Tuple[str, List[str], Any]]]:
+    """
+    Reads the key-level updates appended to the journal since the last compaction.
+
+    A trailing line that is still being written is ignored.
+
+    Returns:
+        Tuple[Optional[Tuple[int, int]], List[Tuple[str, List[str], Any]]]: The (mtime_ns, size) key of the journal, or None if there is no journal, and its (operation, path, value) tuples in order.
+    """
+    try:
+        with open(get_path(JOURNAL_FILE), "r") as in_file:
+            info = os.fstat(in_file.fileno())
+            lines = in_file.read().split("\n")
+    except FileNotFoundError:
+        return None, []
+
+    operations = []
+    for line in lines[:-1]:
+        with contextlib.suppress(ValueError):
+            operations.extend(tuple(operation) for operation in json.loads(line))
+    return (info.st_mtime_ns, info.st_size), operations
+
+
+def reload() -> Dict[str, Any]:
+    """
+    Reads and parses config.json and replays the journal, replacing the cached configuration.
+
+    The journal is read first: if it is compacted in the meantime, its updates are
+    replayed over a config.json that already contains them, which leaves it unchanged.
+    The document is then upgraded to the current configuration version in memory.
+
+    Returns:
+        Dict[str, Any]: The configuration data as a dictionary.
+    """
+    filepath = get_path(CONFIG_FILE)
+    journal_key, operations = read_journal()
+    with phase("config.read"), open(filepath, "r") as in_file:
+        info = os.fstat(in_file.fileno())
+        text = in_file.read()
+    with phase("config.parse", bytes=len(text)):
+        document = json.loads(text)
+    if operations:
+        with phase("config.replay", operations=len(operations)):
+            for operation, path, value in operations:
+                _apply(document, operation, path, value)
+    upgraded = upgrade(document)
+    _cache.update(
+        key=(filepath, (info.st_mtime_ns, info.st_size), journal_key),
+        document=document,
+        text=None if operations or upgraded else text,
+        snapshot=None,
+        upgraded=upgraded,
+    )
+    return _cache["document"]
 
 
 def get_config() -> Dict[str, Any]:
     """
     Loads and returns the configuration from the config.json file.
 
+    The parsed document is cached for the whole process and only parsed again when the
+    file changes on disk, so every caller shares the same dictionary. A configuration
+    written by an older version is upgraded and saved once.
+
     Returns:
         Dict[str, Any]: The configuration data as a dictionary.
     """
-    file_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
-    filepath = os.path.join(file_directory, "config.json")
-    with open(filepath, "r") as in_file:
-        return json.load(in_file)
+    if _cache["document"] is None or _cache["key"] != _config_key():
+        reload()
+    if _cache["upgraded"]:
+        with config_lock():
+            save_config(reload())
+    return _cache["document"]
+
+
+def get_config_key() -> Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+    """
+    Returns the key identifying the version of the cached configuration.
+
+    The key changes whenever config.json or the journal is modified, so it can be used to
+    invalidate data derived from the configuration.
+
+    Returns:
+        Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]: The key of the configuration.
+    """
+    get_config()
+    return _cache["key"]
+
+
+def is_dirty(configuration: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Checks whether a configuration differs from the one last read from or written to disk.
+
+    The cached document is compared against a parsed copy of the text it was read from,
+    kept for the next checks, so long-lived processes checking it after every command
+    do not serialize the whole configuration each time.
+
+    Parameters:
+        configuration (Optional[Dict[str, Any]]): The configuration to check. Defaults to the cached one.
+
+    Returns:
+        bool: True if the configuration has unsaved changes, otherwise False.
+    """
+    if configuration is None:
+        configuration = _cache["document"]
+    if configuration is None:
+        return False
+    if _cache["text"] is None:
+        return True
+    if configuration is not _cache["document"]:
+        return _serialize(configuration) != _cache["text"]
+    if _cache["snapshot"] is None:
+        _cache["snapshot"] = json.loads(_cache["text"])
+    return configuration != _cache["snapshot"]
 
 
 def save_config(configuration: Dict[str, Any]) -> None:
     """
     Saves the given configuration to the config.json file.
 
+    Nothing is written if the configuration matches the file contents. The file is
+    replaced atomically, so an interrupted save never leaves a truncated configuration,
+    and the journal is removed since config.json now holds every change.
+
     Parameters:
         configuration (Dict[str, Any]): The configuration data to be saved.
     """
-    file_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
-    filepath = os.path.join(file_directory, "config.json")
-    with open(filepath, "w") as out_file:
-        json.dump(configuration, out_file, indent=4)
+    filepath = get_path(CONFIG_FILE)
+    text = _serialize(configuration)
+    if text == _cache["text"] and _cache["key"] == _config_key():
+        return
+
+    with phase("config.write", bytes=len(text)):
+        atomic_write(filepath, text)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(get_path(JOURNAL_FILE))
+    _cache.update(key=_config_key(), document=configuration, text=text, snapshot=None, upgraded=False)
+
+
+def _apply(configuration: Dict[str, Any], operation: str, path: List[str], value: Any) -> None:
+    """
+    Applies a single key-level operation to a configuration document.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data to modify.
+        operation (str): SET to assign the value or DELETE to remove the key.
+        path (List[str]): The keys leading to the modified entry.
+        value (Any): The value to assign. Ignored for DELETE.
+    """
+    parent = configuration
+    for key in path[:-1]:
+        if operation == DELETE and not isinstance(parent.get(key), dict):
+            return
+        parent = parent.setdefault(key, {})
+
+    if operation == SET:
+        parent[path[-1]] = value
+    else:
+        parent.pop(path[-1], None)
+
+
+def _append_journal(operations: List[Tuple[str, List[str], Any]]) -> int:
+    """
+    Appends key-level changes to the journal as a single line and flushes it to disk.
+
+    Parameters:
+        operations (List[Tuple[str, List[str], Any]]): (operation, path, value) tuples, where operation is SET or DELETE.
+
+    Returns:
+        int: The size of the journal, in bytes.
+    """
+    with phase("config.journal", operations=len(operations)):
+        with open(get_path(JOURNAL_FILE), "a") as out_file:
+            out_file.write(json.dumps(operations) + "\n")
+            out_file.flush()
+            os.fsync(out_file.fileno())
+            return os.fstat(out_file.fileno()).st_size
+
+
+def compact() -> None:
+    """
+    Folds the journal into config.json.
+
+    The result is byte-identical to saving the configuration with every journaled
+    change applied, so the journal never changes what config.json ends up holding.
+    """
+    if _file_key(get_path(JOURNAL_FILE)) is None:
+        return
+    with config_lock():
+        save_config(reload())
+
+
+def update_config(operations: List[Tuple[str, List[str], Any]]) -> None:
+    """
+    Applies key-level changes to the configuration and saves them.
+
+    The changes are merged into the latest configuration on disk while holding the
+    configuration lock, so concurrent updates from other processes are never lost.
+    Small configurations are rewritten in full. From JOURNAL_MIN_BYTES on, the changes
+    are appended to the journal instead, without reading config.json, and the journal is
+    compacted into config.json once it reaches COMPACT_BYTES.
+
+    Parameters:
+        operations (List[Tuple[str, List[str], Any]]): (operation, path, value) tuples, where operation is SET or DELETE.
+    """
+    with config_lock():
+        config_key = _file_key(get_path(CONFIG_FILE))
+        if _file_key(get_path(JOURNAL_FILE)) is None and (
+            config_key is None or config_key[1] < JOURNAL_MIN_BYTES
+        ):
+            configuration = reload()
+            for operation, path, value in operations:
+                _apply(configuration, operation, path, value)
+            save_config(configuration)
+            return
+
+        cached = _cache["document"] is not None and _cache["key"] == _config_key()
+        journal_size = _append_journal(operations)
+        if cached:
+            for operation, path, value in operations:
+                _apply(_cache["document"], operation, path, value)
+            _cache.update(key=_config_key(), text=None, snapshot=None)
+        if journal_size >= COMPACT_BYTES:
+            save_config(reload())
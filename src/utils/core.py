@@ -1,7 +1,9 @@
-import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from .bash import printsh
+from .bash import echo, printsh
+from .config import CONFIG_FILE, compact, get_path
+from .fuzzy import build_index, resolve, search
+from .profile import PROFILE_VARIABLE, percentile, read_profiles
 
 LIST_METHOD = "list"
 
@@ -23,10 +25,30 @@ def list_methods(ikein_info: Dict[str, Dict[str, Any]]) -> str:
     return ""
 
 
+def flatten_info(ikein_info: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Flattens the command categories into a single dictionary of commands.
+
+    Parameters:
+        ikein_info (Dict[str, Dict[str, Any]]): Dictionary containing command categories and their methods.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Dictionary mapping each command to its information.
+    """
+    return {
+        method: information
+        for category in ikein_info.values()
+        for method, information in category.items()
+    }
+
+
 def usage_method(ikein_info: Dict[str, Dict[str, Any]], *args: str) -> str:
     """
     Provides usage details for a specific command.
 
+    A mistyped command is resolved to the closest match when it is unambiguous; otherwise
+    the closest commands are suggested.
+
     Parameters:
         ikein_info (Dict[str, Dict[str, Any]]): Dictionary containing command categories and their methods.
         args (str): Command name to retrieve usage information.
@@ -34,11 +56,73 @@ def usage_method(ikein_info: Dict[str, Dict[str, Any]], *args: str) -> str:
     Returns:
         str: An empty string as output control.
     """
-    for category in ikein_info:
-        for method in ikein_info[category]:
-            if method == args[0]:
-                printsh(f"- {ikein_info[category][method]['info']}:")
-                printsh(f"\t$ {ikein_info[category][method]['usage']}")
+    commands = flatten_info(ikein_info)
+    command = args[0]
+
+    if command not in commands:
+        matches = search(build_index(commands), command)
+        resolved = resolve(matches)
+        if resolved is None and matches:
+            printsh(f"Command not found: '{command}'. Did you mean: {', '.join(key for key, _ in matches)}?")
+            return ""
+        if resolved is None:
+            printsh(f"Command not found: '{command}'")
+            return ""
+        command = resolved
+
+    printsh(f"- {commands[command]['info']}:")
+    printsh(f"\t$ {commands[command]['usage']}")
+    return ""
+
+
+def _print_percentiles(name: str, values: List[float]) -> None:
+    """
+    Prints the count and the p50, p95 and p99 of a list of timings as a table row.
+
+    Parameters:
+        name (str): The row name.
+        values (List[float]): The timings in milliseconds.
+    """
+    p50, p95, p99 = (percentile(values, rank) for rank in (50, 95, 99))
+    printsh(f"{name:<32} {len(values):>6} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+
+def stats_method(_: Any, *args: str) -> str:
+    """
+    Displays the p50, p95 and p99 timings of the commands recorded in the profile log.
+
+    Without arguments, the total time of every command is shown. With a command name,
+    the time of every phase of that command is shown instead.
+
+    Parameters:
+        _ (Any): Placeholder parameter (not used).
+        args (str): Optional command whose phases are shown.
+
+    Returns:
+        str: An empty string as output control, or a message if there is no profile data.
+    """
+    records = read_profiles()
+    if args:
+        records = [record for record in records if record["command"] == args[0]]
+    if not records:
+        return echo(f"No profile data found. Run commands with {PROFILE_VARIABLE}=1 to record it.")
+
+    timings: Dict[str, List[float]] = {}
+    for record in records:
+        if args:
+            if record.get("startup_ms") is not None:
+                timings.setdefault("startup", []).append(record["startup_ms"])
+            for entry in record["phases"]:
+                detail = entry.get("plugin") or entry.get("command")
+                name = f"{entry['phase']}[{detail}]" if detail else entry["phase"]
+                timings.setdefault(name, []).append(entry["ms"])
+            timings.setdefault("total", []).append(record["total_ms"])
+        else:
+            timings.setdefault(record["command"], []).append(record["total_ms"])
+
+    printsh(f"{'phase' if args else 'command':<32} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, values in timings.items():
+        _print_percentiles(name, values)
     return ""
 
 
@@ -46,14 +130,16 @@ def open_configuration(_: Any) -> str:
     """
     Returns the command to open the IKEIN configuration JSON file.
 
+    Pending journaled updates are compacted first, so the file holds every alias.
+
     Parameters:
         _ (Any): Placeholder parameter (not used).
 
     Returns:
         str: Command to open the configuration file.
     """
-    file_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
-    return f"code {os.path.join(file_directory, 'config.json')}"
+    compact()
+    return f"code {get_path(CONFIG_FILE)}"
 
 
 methods: Dict[str, Dict[str, Dict[str, Any]]] = {
@@ -73,5 +159,10 @@ methods: Dict[str, Dict[str, Dict[str, Any]]] = {
             "info": "Open the IKEIN configuration JSON file for editing.",
             "usage": "ikein config",
         },
+        "stats": {
+            "method": stats_method,
+            "info": "Shows the p50/p95/p99 timings recorded with IKEIN_PROFILE=1.",
+            "usage": "ikein stats [command]",
+        },
     }
 }
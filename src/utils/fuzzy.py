@@ -0,0 +1,331 @@
+import heapq
+import marshal
+import os
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .config import atomic_write, get_path
+
+SEPARATORS = " -_./:"
+
+BOUNDARY_BONUS = 2.0
+CONSECUTIVE_BONUS = 1.5
+GAP_PENALTY = 0.2
+LENGTH_PENALTY = 0.01
+
+MIN_SIMILARITY = 0.75
+AMBIGUITY_MARGIN = 0.1
+
+MAX_CANDIDATES = 128
+MAX_NEAR_MISSES = 8
+
+INDEX_FILE = "fuzzy.{name}.marshal"
+# Bumped whenever the layout of the index changes, so older index files are rebuilt.
+INDEX_VERSION = 1
+# Indexes with fewer keys are built quickly enough and are not written to disk.
+PERSIST_THRESHOLD = 1000
+
+# In-process cache of built indexes, keyed by name. Each entry holds the signature of the
+# keys it was built from, so a long-lived process rebuilds an index only when they change.
+_indexes: Dict[str, Tuple[Hashable, Dict[str, Any]]] = {}
+
+
+def _trigrams(text: str) -> Set[str]:
+    """
+    Returns the set of trigrams of a text, padded with start and end markers.
+
+    Parameters:
+        text (str): The lowercase text.
+
+    Returns:
+        Set[str]: The trigrams of the text.
+    """
+    padded = f"^{text}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def build_index(keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Builds a search index over a collection of keys.
+
+    The index keeps the keys sorted by their lowercase form, for prefix lookups, and a
+    trigram posting list, used to find candidates without scanning every key. Postings
+    are packed as native unsigned ints, so a persisted index loads without creating an
+    object per position.
+
+    Parameters:
+        keys (Iterable[str]): The keys to index.
+
+    Returns:
+        Dict[str, Any]: The search index.
+    """
+    sorted_keys = sorted(set(keys), key=str.lower)
+    lowered = [key.lower() for key in sorted_keys]
+    postings: Dict[str, List[int]] = {}
+    for position, key in enumerate(lowered):
+        for trigram in _trigrams(key):
+            postings.setdefault(trigram, []).append(position)
+    trigrams = {trigram: array("I", positions).tobytes() for trigram, positions in postings.items()}
+    return {"keys": sorted_keys, "lowered": lowered, "trigrams": trigrams}
+
+
+def get_index(name: str, keys: Iterable[str], signature: Hashable) -> Dict[str, Any]:
+    """
+    Returns the cached index with the given name, building it if its signature changed.
+
+    Indexes of at least PERSIST_THRESHOLD keys are also written next to the
+    configuration, so a new process loads them instead of building them again.
+
+    Parameters:
+        name (str): Name of the index, e.g. "goto".
+        keys (Iterable[str]): The keys to index.
+        signature (Hashable): Value that changes whenever the keys change. Must be serializable with marshal.
+
+    Returns:
+        Dict[str, Any]: The search index.
+    """
+    cached = _indexes.get(name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    path = get_path(INDEX_FILE.format(name=name))
+    try:
+        with open(path, "rb") as in_file:
+            version, stored_signature, index = marshal.load(in_file)
+        if version == INDEX_VERSION and stored_signature == signature:
+            _indexes[name] = (signature, index)
+            return index
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    index = build_index(keys)
+    if len(index["keys"]) >= PERSIST_THRESHOLD:
+        atomic_write(path, marshal.dumps((INDEX_VERSION, signature, index)))
+    elif os.path.exists(path):
+        os.unlink(path)
+    _indexes[name] = (signature, index)
+    return index
+
+
+def subsequence_score(query: str, key: str) -> Optional[float]:
+    """
+    Scores a key whose characters contain the query as a subsequence.
+
+    The shortest window containing the subsequence is found, and each matched character
+    earns a bonus when it starts a word or follows the previous match. Gaps and extra
+    characters are penalized. Both texts must be lowercase.
+
+    Parameters:
+        query (str): The search query.
+        key (str): The key to score.
+
+    Returns:
+        Optional[float]: A score between 0.5 and 1, or None if the query is not a subsequence of the key.
+    """
+    end = 0
+    for char in query:
+        end = key.find(char, end)
+        if end == -1:
+            return None
+        end += 1
+
+    start = end
+    for char in reversed(query):
+        start = key.rfind(char, 0, start)
+
+    points, previous, position = 0.0, -2, start
+    for char in query:
+        position = key.find(char, position)
+        points += 1
+        if position == 0 or key[position - 1] in SEPARATORS:
+            points += BOUNDARY_BONUS
+        if position == previous + 1:
+            points += CONSECUTIVE_BONUS
+        previous, position = position, position + 1
+
+    points -= GAP_PENALTY * (end - start - len(query))
+    points -= LENGTH_PENALTY * (len(key) - len(query))
+    maximum = len(query) * (1 + BOUNDARY_BONUS + CONSECUTIVE_BONUS)
+    return 0.5 + 0.5 * max(0.0, min(1.0, points / maximum))
+
+
+def edit_distance(source: str, target: str, limit: int) -> int:
+    """
+    Computes the optimal string alignment distance between two texts, up to a limit.
+
+    Insertions, deletions, substitutions and transpositions of adjacent characters count
+    as a single edit each. Only the band of cells that can stay within the limit is
+    computed, and the computation stops as soon as the limit is exceeded.
+
+    Parameters:
+        source (str): The first text.
+        target (str): The second text.
+        limit (int): The maximum distance of interest.
+
+    Returns:
+        int: The number of edits needed to turn the source into the target, or limit + 1 if it exceeds the limit.
+    """
+    exceeded = limit + 1
+    if abs(len(source) - len(target)) > limit:
+        return exceeded
+
+    previous_row, row = [], [j if j <= limit else exceeded for j in range(len(target) + 1)]
+    for i in range(1, len(source) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [i if i <= limit else exceeded] + [exceeded] * len(target)
+        for j in range(max(1, i - limit), min(len(target), i + limit) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and source[i - 1] == target[j - 2]
+                and source[i - 2] == target[j - 1]
+            ):
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+        if min(row) > limit:
+            return exceeded
+    return min(row[-1], exceeded)
+
+
+def similarity_score(query: str, key: str) -> Optional[float]:
+    """
+    Scores a near miss, such as a typo, by the edit distance between the query and the key.
+
+    Parameters:
+        query (str): The search query, lowercase.
+        key (str): The key to score, lowercase.
+
+    Returns:
+        Optional[float]: A score below 0.5, or None if the texts are not similar enough.
+    """
+    longest = max(len(query), len(key))
+    limit = int(longest * (1 - MIN_SIMILARITY))
+    distance = edit_distance(query, key, limit)
+    if distance > limit:
+        return None
+    return 0.5 * (1 - distance / longest)
+
+
+def _candidates(index: Dict[str, Any], query: str) -> List[int]:
+    """
+    Returns the positions of the keys worth scoring for a query.
+
+    Small indexes are scanned entirely, starting with the keys sharing the most trigrams
+    with the query. Larger ones score at most MAX_CANDIDATES keys: first the keys starting
+    with the query, then the keys sharing the most of its rarest trigrams. These are found
+    by intersecting the postings from the rarest one on, until fewer than MAX_CANDIDATES
+    keys are left, so a query never walks the postings of its common trigrams.
+
+    Parameters:
+        index (Dict[str, Any]): The search index.
+        query (str): The search query, lowercase.
+
+    Returns:
+        List[int]: Positions of the candidate keys.
+    """
+    lowered = index["lowered"]
+    postings = sorted(
+        (
+            memoryview(index["trigrams"][trigram]).cast("I")
+            for trigram in _trigrams(query)
+            if trigram in index["trigrams"]
+        ),
+        key=len,
+    )
+
+    if len(lowered) <= MAX_CANDIDATES:
+        shared = Counter(position for posting in postings for position in posting)
+        return sorted(range(len(lowered)), key=lambda position: -shared[position])
+
+    start = bisect_left(lowered, query)
+    end = start
+    while end < len(lowered) and end - start < MAX_CANDIDATES and lowered[end].startswith(query):
+        end += 1
+    candidates = dict.fromkeys(range(start, end))
+    if not postings:
+        return list(candidates)
+
+    # Every step keeps the keys sharing one more trigram with the query. The keys of the
+    # last step that still held enough candidates fill the remaining slots.
+    tiers = [set(postings[0])]
+    for posting in postings[1:]:
+        shared = tiers[-1].intersection(posting)
+        if not shared:
+            break
+        tiers.append(shared)
+        if len(shared) < MAX_CANDIDATES:
+            break
+    for tier in reversed(tiers):
+        for position in sorted(tier):
+            if len(candidates) >= MAX_CANDIDATES:
+                return list(candidates)
+            candidates.setdefault(position)
+    return list(candidates)
+
+
+def search(index: Dict[str, Any], query: str, limit: int = 5) -> List[Tuple[str, float]]:
+    """
+    Searches the index for the keys that best match a query.
+
+    Keys containing the query as a subsequence always rank above near misses, so near
+    misses are only scored when there are not enough subsequence matches, and only for
+    the first MAX_NEAR_MISSES candidates.
+
+    Parameters:
+        index (Dict[str, Any]): The search index.
+        query (str): The search query.
+        limit (int): Maximum number of matches to return. Default is 5.
+
+    Returns:
+        List[Tuple[str, float]]: (key, score) pairs, sorted from best to worst.
+    """
+    query = query.lower()
+    keys, lowered = index["keys"], index["lowered"]
+    candidates = _candidates(index, query)
+
+    matches, misses = [], []
+    for position in candidates:
+        score = subsequence_score(query, lowered[position])
+        if score is None:
+            misses.append(position)
+        else:
+            matches.append((keys[position], score))
+
+    if len(matches) < limit:
+        for position in misses[:MAX_NEAR_MISSES]:
+            score = similarity_score(query, lowered[position])
+            if score is not None:
+                matches.append((keys[position], score))
+    return heapq.nlargest(limit, matches, key=lambda match: match[1])
+
+
+def resolve(
+    matches: List[Tuple[str, float]], rank: Optional[Callable[[str], float]] = None
+) -> Optional[str]:
+    """
+    Picks the match a query unambiguously refers to.
+
+    The best match is picked when no other match scores within AMBIGUITY_MARGIN of it.
+    Otherwise, the optional rank function can break the tie between the closest matches.
+
+    Parameters:
+        matches (List[Tuple[str, float]]): (key, score) pairs, sorted from best to worst.
+        rank (Optional[Callable[[str], float]]): Secondary ranking used to break ties.
+
+    Returns:
+        Optional[str]: The resolved key, or None if there are no matches or they are ambiguous.
+    """
+    if not matches:
+        return None
+
+    closest = [key for key, score in matches if score >= matches[0][1] - AMBIGUITY_MARGIN]
+    if len(closest) == 1:
+        return closest[0]
+    if rank is not None:
+        ranked = sorted(closest, key=rank, reverse=True)
+        if rank(ranked[0]) > rank(ranked[1]):
+            return ranked[0]
+    return None
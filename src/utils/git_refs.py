@@ -0,0 +1,193 @@
+import os
+from typing import Dict, List, Optional, Set
+
+HEADS_PREFIX = "refs/heads/"
+SYMBOLIC_PREFIX = "ref: "
+
+
+def _read_text(path: str) -> Optional[str]:
+    """
+    Reads a small text file, such as a ref.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        Optional[str]: The stripped contents of the file, or None if it cannot be read.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as in_file:
+            return in_file.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def find_repository(path: str) -> Optional[Dict[str, str]]:
+    """
+    Finds the git repository containing a directory by reading the .git entries directly.
+
+    Both regular repositories, where .git is a directory, and linked worktrees, where .git
+    is a file pointing to the worktree git directory, are supported. Layouts this reader
+    does not understand, such as GIT_DIR overrides or the reftable ref storage, are
+    reported as not found so callers can fall back to the git command line.
+
+    Parameters:
+        path (str): The directory to start searching from.
+
+    Returns:
+        Optional[Dict[str, str]]: The 'git_dir' holding HEAD and the 'common_dir' holding the refs, or None if no supported repository was found.
+    """
+    if "GIT_DIR" in os.environ or "GIT_COMMON_DIR" in os.environ:
+        return None
+
+    directory = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(directory, ".git")
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+            break
+        if os.path.isfile(dot_git):
+            content = _read_text(dot_git)
+            if content is None or not content.startswith("gitdir: "):
+                return None
+            git_dir = os.path.join(directory, content[len("gitdir: ") :])
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+    common_dir = git_dir
+    commondir = _read_text(os.path.join(git_dir, "commondir"))
+    if commondir is not None:
+        common_dir = os.path.join(git_dir, commondir)
+
+    if not os.path.isfile(os.path.join(git_dir, "HEAD")) or os.path.isdir(
+        os.path.join(common_dir, "reftable")
+    ):
+        return None
+    return {"git_dir": os.path.normpath(git_dir), "common_dir": os.path.normpath(common_dir)}
+
+
+def head_branch(git_dir: str) -> Optional[str]:
+    """
+    Reads the branch HEAD points to.
+
+    Parameters:
+        git_dir (str): The git directory of the repository or worktree.
+
+    Returns:
+        Optional[str]: The name of the branch, or None if HEAD is detached or cannot be read.
+    """
+    head = _read_text(os.path.join(git_dir, "HEAD"))
+    if head is None or not head.startswith(SYMBOLIC_PREFIX + HEADS_PREFIX):
+        return None
+    return head[len(SYMBOLIC_PREFIX + HEADS_PREFIX) :]
+
+
+def _loose_branches(heads_dir: str, prefix: str, branches: Set[str]) -> None:
+    """
+    Adds the loose branch refs stored under a directory to a set.
+
+    Parameters:
+        heads_dir (str): The directory to scan, inside refs/heads.
+        prefix (str): The branch name prefix of the directory, e.g. "feature/".
+        branches (Set[str]): The set the branch names are added to.
+    """
+    try:
+        scanner = os.scandir(heads_dir)
+    except OSError:
+        return
+    with scanner:
+        for item in scanner:
+            if item.is_dir(follow_symlinks=False):
+                _loose_branches(item.path, f"{prefix}{item.name}/", branches)
+            elif not item.name.endswith(".lock"):
+                branches.add(prefix + item.name)
+
+
+def _packed_branches(common_dir: str, branches: Set[str]) -> None:
+    """
+    Adds the branch refs stored in the packed-refs file to a set.
+
+    Parameters:
+        common_dir (str): The common git directory of the repository.
+        branches (Set[str]): The set the branch names are added to.
+    """
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "r", encoding="utf-8") as in_file:
+            for line in in_file:
+                if line[0] in "#^":
+                    continue
+                _, _, ref = line.rstrip("\n").partition(" ")
+                if ref.startswith(HEADS_PREFIX):
+                    branches.add(ref[len(HEADS_PREFIX) :])
+    except OSError:
+        return
+
+
+def local_branches(common_dir: str) -> List[str]:
+    """
+    Lists the local branches of a repository, both loose and packed.
+
+    Parameters:
+        common_dir (str): The common git directory of the repository.
+
+    Returns:
+        List[str]: The branch names, sorted like 'git branch' does.
+    """
+    branches: Set[str] = set()
+    _packed_branches(common_dir, branches)
+    _loose_branches(os.path.join(common_dir, HEADS_PREFIX), "", branches)
+    return sorted(branches)
+
+
+def checked_out_branches(common_dir: str) -> Set[str]:
+    """
+    Lists the branches checked out in any worktree of a repository, the main one included.
+
+    Parameters:
+        common_dir (str): The common git directory of the repository.
+
+    Returns:
+        Set[str]: The names of the checked out branches.
+    """
+    git_dirs = [common_dir]
+    try:
+        with os.scandir(os.path.join(common_dir, "worktrees")) as scanner:
+            git_dirs.extend(item.path for item in scanner if item.is_dir())
+    except OSError:
+        pass
+    return {branch for branch in map(head_branch, git_dirs) if branch is not None}
+
+
+def refs_signature(common_dir: str) -> List[int]:
+    """
+    Computes a signature of the local branches of a repository from modification times.
+
+    Creating, deleting or renaming a loose branch changes the modification time of the
+    directory holding it, and packing the refs rewrites the packed-refs file, so the
+    signature changes whenever the branch list does, without reading any ref.
+
+    Parameters:
+        common_dir (str): The common git directory of the repository.
+
+    Returns:
+        List[int]: The modification times of packed-refs and of every directory in refs/heads, in nanoseconds.
+    """
+    signature = []
+    try:
+        signature.append(os.stat(os.path.join(common_dir, "packed-refs")).st_mtime_ns)
+    except OSError:
+        signature.append(0)
+
+    directories = [os.path.join(common_dir, HEADS_PREFIX)]
+    while directories:
+        directory = directories.pop()
+        try:
+            signature.append(os.stat(directory).st_mtime_ns)
+            with os.scandir(directory) as scanner:
+                directories.extend(item.path for item in scanner if item.is_dir(follow_symlinks=False))
+        except OSError:
+            signature.append(0)
+    return signature
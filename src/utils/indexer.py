@@ -0,0 +1,196 @@
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import atomic_write, get_path
+from .profile import phase
+
+INDEX_FILE = "directories.json"
+INDEX_DEPTH = 5
+INDEX_WORKERS = 8
+
+REPOSITORY = "repository"
+PROJECT = "project"
+
+# Directories never descended into, besides hidden ones.
+PRUNED_NAMES = {"node_modules", "venv", "__pycache__", "site-packages", "build", "dist", "target", "vendor"}
+# Files marking a directory as a project.
+PROJECT_MARKERS = {
+    "pyproject.toml",
+    "setup.py",
+    "package.json",
+    "Cargo.toml",
+    "go.mod",
+    "pom.xml",
+    "build.gradle",
+    "Gemfile",
+    "composer.json",
+}
+
+
+def _scan_directory(path: str, cached: Optional[List[Any]]) -> Optional[List[Any]]:
+    """
+    Scans a directory, or reuses its cached entry if its modification time did not change.
+
+    A directory's modification time changes whenever an entry is added to it, removed
+    from it or renamed, so an unchanged directory has the same kind and subdirectories.
+
+    Parameters:
+        path (str): The directory to scan.
+        cached (Optional[List[Any]]): The entry of the directory in the previous index, if any.
+
+    Returns:
+        Optional[List[Any]]: The [mtime_ns, kind, subdirectories] entry of the directory, or None if it cannot be read. Repositories have no subdirectories, since they are not descended into.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if cached is not None and cached[0] == mtime_ns:
+            return cached
+        with os.scandir(path) as scanner:
+            items = list(scanner)
+    except OSError:
+        return None
+
+    names = {item.name for item in items}
+    if ".git" in names:
+        return [mtime_ns, REPOSITORY, []]
+    subdirectories = sorted(
+        item.name
+        for item in items
+        if not item.name.startswith(".")
+        and item.name not in PRUNED_NAMES
+        and item.is_dir(follow_symlinks=False)
+    )
+    return [mtime_ns, PROJECT if names & PROJECT_MARKERS else "", subdirectories]
+
+
+def scan(
+    roots: List[str],
+    max_depth: int = INDEX_DEPTH,
+    previous: Optional[Dict[str, List[Any]]] = None,
+    workers: int = INDEX_WORKERS,
+) -> Dict[str, List[Any]]:
+    """
+    Walks directory trees with a pool of threads, recording the repositories and projects found.
+
+    Hidden directories, PRUNED_NAMES and symbolic links are not descended into, nor are
+    repositories. Directories whose modification time matches the previous index are not
+    listed again.
+
+    Parameters:
+        roots (List[str]): The absolute paths of the directories to walk.
+        max_depth (int): Maximum depth of a directory below its root.
+        previous (Optional[Dict[str, List[Any]]]): The entries of a previous scan, reused for unchanged directories.
+        workers (int): Number of threads listing directories.
+
+    Returns:
+        Dict[str, List[Any]]: Dictionary mapping every directory walked to its [mtime_ns, kind, subdirectories] entry.
+    """
+    previous = previous or {}
+    entries: Dict[str, List[Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory, root, previous.get(root)): (root, 0) for root in roots}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, depth = pending.pop(future)
+                entry = future.result()
+                if entry is None:
+                    continue
+                entries[path] = entry
+                if depth == max_depth:
+                    continue
+                for name in entry[2]:
+                    child = os.path.join(path, name)
+                    if child not in entries:
+                        pending[executor.submit(_scan_directory, child, previous.get(child))] = (child, depth + 1)
+    return entries
+
+
+def find_directories(entries: Dict[str, List[Any]], kind: str) -> List[str]:
+    """
+    Lists the directories of a given kind found by a scan.
+
+    Parameters:
+        entries (Dict[str, List[Any]]): The entries returned by scan.
+        kind (str): REPOSITORY or PROJECT.
+
+    Returns:
+        List[str]: The directory paths, sorted.
+    """
+    return sorted(path for path, entry in entries.items() if entry[1] == kind)
+
+
+def load_index() -> Dict[str, Any]:
+    """
+    Reads the persisted directory index.
+
+    Returns:
+        Dict[str, Any]: The index, with its 'roots' and the 'entries' of every directory walked, empty if there is none.
+    """
+    try:
+        with open(get_path(INDEX_FILE), "r") as in_file:
+            return json.load(in_file)
+    except (OSError, ValueError):
+        return {"roots": [], "entries": {}}
+
+
+def get_index_key() -> Optional[Tuple[int, int]]:
+    """
+    Returns the key identifying the version of the persisted directory index.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (mtime_ns, size) of the index file, or None if there is none.
+    """
+    try:
+        stat = os.stat(get_path(INDEX_FILE))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def refresh(roots: List[str]) -> Dict[str, Any]:
+    """
+    Scans the given roots, reusing the persisted index for unchanged directories, and saves the result.
+
+    Parameters:
+        roots (List[str]): The absolute paths of the directories to index.
+
+    Returns:
+        Dict[str, Any]: The updated index.
+    """
+    index = load_index()
+    with phase("index.scan", roots=len(roots)):
+        entries = scan(roots, previous=index["entries"])
+    updated = {"roots": roots, "entries": entries}
+    if updated != index:
+        atomic_write(get_path(INDEX_FILE), json.dumps(updated))
+    return updated
+
+
+def indexed_names(index: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Names the repositories and projects of an index after their directory.
+
+    Directories sharing a name are told apart by their parent directory, e.g. 'web/api'
+    and 'mobile/api'.
+
+    Parameters:
+        index (Dict[str, Any]): The index returned by load_index or refresh.
+
+    Returns:
+        Dict[str, str]: Dictionary mapping every name to its directory.
+    """
+    paths = [path for path, entry in index["entries"].items() if entry[1]]
+    counts: Dict[str, int] = {}
+    for path in paths:
+        counts[os.path.basename(path)] = counts.get(os.path.basename(path), 0) + 1
+
+    names = {}
+    for path in sorted(paths):
+        name = os.path.basename(path)
+        if counts[name] > 1:
+            name = os.path.join(os.path.basename(os.path.dirname(path)), name)
+        names.setdefault(name, path)
+    return names
@@ -1,37 +1,83 @@
-import glob
 import importlib
+import marshal
 import os
-from functools import reduce
-from typing import Dict
+import pkgutil
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
 
+from .config import ROOT_DIRECTORY, atomic_write, get_config, get_path
+from .profile import phase
 
-def import_plugins(folder_path: str) -> Dict:
+MANIFEST_FILE = "manifest.marshal"
+# Bumped whenever the layout of the manifest changes, so older manifests are rebuilt.
+MANIFEST_VERSION = 2
+# Plugins taking longer than this to import are reported, and deferred by the daemon.
+IMPORT_BUDGET_MS = 50.0
+
+
+def plugins_search_path(folder_path: str) -> List[str]:
+    """
+    Returns the directories the plugins package imports its plugins from.
+
+    When running from the ikein.pyz bundle, the plugins directory next to the bundle is
+    added after the bundled one, so plugins installed after the bundle was built can be
+    imported too. Bundled plugins take precedence.
+
+    Parameters:
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+
+    Returns:
+        List[str]: The directories, in lookup order.
+    """
+    package = importlib.import_module(folder_path)
+    directory = os.path.join(ROOT_DIRECTORY, folder_path)
+    if directory not in package.__path__ and os.path.isdir(directory):
+        package.__path__.append(directory)
+    return list(package.__path__)
+
+
+def plugin_names(folder_path: str) -> List[str]:
+    """
+    Lists the plugins of the plugins package, i.e. its subpackages not starting with '_' or '.'.
+
+    Plugins are discovered on the search path of the package, so every plugin listed can
+    be imported, whether it comes from the plugins directory or from the bundle.
+
+    Parameters:
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+
+    Returns:
+        List[str]: The plugin names, sorted.
+    """
+    return sorted(
+        {
+            module.name
+            for module in pkgutil.iter_modules(plugins_search_path(folder_path))
+            if module.ispkg and not module.name.startswith(("_", "."))
+        }
+    )
+
+
+def import_plugins(folder_path: str, timings: Optional[Dict[str, float]] = None) -> Dict:
     """
     Imports plugins from the specified folder and returns a dictionary of methods.
 
     Parameters:
-        folder_path (str): Path to the plugins directory.
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+        timings (Optional[Dict[str, float]]): Dictionary filled with the import time of every plugin, in milliseconds.
 
     Returns:
         Dict: A dictionary mapping plugin names to their respective methods.
     """
-    current_dir = os.getcwd()
-    os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
-    methods = reduce(
-        lambda accumulate, current: {**accumulate, **current},
-        list(
-            map(
-                lambda init_file: {
-                    init_file.split("/")[-2]: importlib.import_module(
-                        f"{folder_path}.{init_file.split('/')[-2]}"
-                    ).methods
-                },
-                glob.glob(f"{folder_path}/*/__init__.py"),
-            )
-        ),
-    )
-    os.chdir(current_dir)
-    return methods
+    plugins = {}
+    for plugin in plugin_names(folder_path):
+        start = time.perf_counter()
+        with phase("import", plugin=plugin):
+            plugins[plugin] = importlib.import_module(f"{folder_path}.{plugin}").methods
+        if timings is not None:
+            timings[plugin] = round((time.perf_counter() - start) * 1000, 3)
+    return plugins
 
 
 def flatten_methods(nested_dict: Dict) -> Dict:
@@ -50,12 +96,170 @@ def flatten_methods(nested_dict: Dict) -> Dict:
     return flat_dict
 
 
-def load(plugins_path: str) -> tuple[Dict, Dict, Dict]:
+def plugins_signature(folder_path: str) -> Dict[str, int]:
+    """
+    Computes the modification signature of the plugins directory.
+
+    The signature holds the mtime of the plugins directory, of every plugin directory and
+    of every Python source inside them, so adding, removing or editing a plugin changes it.
+
+    Parameters:
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each path to its modification time in nanoseconds.
+    """
+    plugins_directory = os.path.join(ROOT_DIRECTORY, folder_path)
+    signature = {folder_path: os.stat(plugins_directory).st_mtime_ns}
+    with os.scandir(plugins_directory) as plugins:
+        for plugin in plugins:
+            if not plugin.is_dir() or plugin.name.startswith(("_", ".")):
+                continue
+            signature[f"{folder_path}/{plugin.name}"] = plugin.stat().st_mtime_ns
+            with os.scandir(plugin.path) as files:
+                for source in files:
+                    if source.name.endswith(".py"):
+                        signature[f"{folder_path}/{plugin.name}/{source.name}"] = (
+                            source.stat().st_mtime_ns
+                        )
+    return signature
+
+
+def get_import_budget() -> float:
+    """
+    Returns the import time budget of a plugin, set with 'plugins.import_budget_ms' in config.json.
+
+    Returns:
+        float: The budget in milliseconds, IMPORT_BUDGET_MS if it is not set or there is no configuration yet.
+    """
+    try:
+        configuration = get_config()
+    except (OSError, ValueError):
+        return IMPORT_BUDGET_MS
+    return float(configuration["plugins"].get("import_budget_ms", IMPORT_BUDGET_MS))
+
+
+def build_manifest(folder_path: str) -> Dict[str, Any]:
+    """
+    Imports every plugin and writes the command manifest next to the configuration file.
+
+    The manifest maps each command to the plugin that owns it and keeps the info, usage
+    and completion sources of every command, so most invocations and tab completion can
+    avoid importing plugins at all. It also records the import time of every plugin.
+
+    Plugins are merged in alphabetical order. A command already defined by a core command
+    or by an earlier plugin is kept by its first owner: the collision is reported and
+    recorded in the manifest, and the later definition is left out. Plugins taking longer
+    than the import budget to import are reported too.
+
+    Parameters:
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+
+    Returns:
+        Dict[str, Any]: The generated manifest.
+    """
+    from .core import methods as core_methods
+
+    timings: Dict[str, float] = {}
+    plugins = import_plugins(folder_path, timings)
+    owners = {command: "ikein" for command in flatten_methods(core_methods)}
+    manifest: Dict[str, Any] = {
+        "signature": plugins_signature(folder_path),
+        "commands": {},
+        "plugins": {},
+        "collisions": [],
+        "import_ms": timings,
+    }
+    for plugin, methods in plugins.items():
+        entries = manifest["plugins"][plugin] = {}
+        for command, method in methods.items():
+            if command in owners:
+                manifest["collisions"].append([command, owners[command], plugin])
+                print(
+                    f"Command '{command}' of plugin '{plugin}' is already defined by "
+                    f"'{owners[command]}', ignoring it.",
+                    file=sys.stderr,
+                )
+                continue
+            owners[command] = manifest["commands"][command] = plugin
+            entries[command] = {
+                "info": method["info"],
+                "usage": method["usage"],
+                "complete": method.get("complete", {}),
+            }
+
+    budget = get_import_budget()
+    for plugin, duration in timings.items():
+        if duration > budget:
+            print(
+                f"Plugin '{plugin}' took {duration:.1f} ms to import, over the {budget:g} ms budget.",
+                file=sys.stderr,
+            )
+
+    atomic_write(
+        get_path(MANIFEST_FILE),
+        marshal.dumps((MANIFEST_VERSION, sys.version_info[:2], manifest)),
+    )
+    return manifest
+
+
+def get_manifest(folder_path: str) -> Dict[str, Any]:
+    """
+    Returns the command manifest, rebuilding it if it is missing or out of date.
+
+    Parameters:
+        folder_path (str): Path to the plugins directory, relative to the IKEIN root.
+
+    Returns:
+        Dict[str, Any]: The command manifest.
+    """
+    try:
+        with open(get_path(MANIFEST_FILE), "rb") as in_file:
+            version, python_version, manifest = marshal.load(in_file)
+        if (
+            version == MANIFEST_VERSION
+            and python_version == sys.version_info[:2]
+            and manifest["signature"] == plugins_signature(folder_path)
+        ):
+            return manifest
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return build_manifest(folder_path)
+
+
+def deferred_method(plugins_path: str, plugin: str, command: str) -> Callable[..., Any]:
+    """
+    Builds a method importing its plugin on its first call.
+
+    Parameters:
+        plugins_path (str): Path to the plugins directory.
+        plugin (str): The plugin owning the command.
+        command (str): The command the method runs.
+
+    Returns:
+        Callable[..., Any]: The method, taking the arguments of the command.
+    """
+
+    def method(*args: str) -> Any:
+        with phase("import", plugin=plugin):
+            methods = importlib.import_module(f"{plugins_path}.{plugin}").methods
+        return methods[command]["method"](*args)
+
+    return method
+
+
+def load(plugins_path: str, command: Optional[str] = None) -> tuple[Dict, Dict, Dict]:
     """
     Loads plugins and their methods, returning structured dictionaries.
 
+    Commands are resolved from the manifest. When a command is given, only the plugin
+    that owns it is imported; core commands such as list and usage do not import any
+    plugin. Otherwise every plugin within the import budget is imported, and the others
+    are imported the first time one of their commands runs.
+
     Parameters:
         plugins_path (str): Path to the plugins directory.
+        command (Optional[str]): The command about to be executed. If None, every plugin is loaded.
 
     Returns:
         tuple[Dict, Dict, Dict]:
@@ -65,9 +269,34 @@ def load(plugins_path: str) -> tuple[Dict, Dict, Dict]:
     """
     from .core import methods as ikein_methods
 
-    methods = import_plugins(plugins_path)
+    with phase("discover"):
+        plugins_search_path(plugins_path)
+        manifest = get_manifest(plugins_path)
     ikein_info = ikein_methods.copy()
-    ikein_info.update(methods)
-    methods = flatten_methods(methods)
+    ikein_info.update(manifest["plugins"])
     ikein_methods = flatten_methods(ikein_methods)
+
+    if command is None:
+        budget = get_import_budget()
+        plugins = set(manifest["commands"].values())
+    else:
+        budget = None
+        plugins = {manifest["commands"][command]} if command in manifest["commands"] else set()
+
+    imported = {}
+    for plugin in sorted(plugins):
+        if budget is not None and manifest["import_ms"].get(plugin, 0.0) > budget:
+            continue
+        with phase("import", plugin=plugin):
+            imported[plugin] = importlib.import_module(f"{plugins_path}.{plugin}").methods
+
+    methods = {}
+    for name, plugin in manifest["commands"].items():
+        if plugin in imported:
+            methods[name] = imported[plugin][name]
+        elif plugin in plugins:
+            methods[name] = {
+                **manifest["plugins"][plugin][name],
+                "method": deferred_method(plugins_path, plugin, name),
+            }
     return ikein_info, ikein_methods, methods
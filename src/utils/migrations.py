@@ -0,0 +1,110 @@
+from typing import Any, Callable, Dict
+
+VERSION_KEY = "configVersion"
+CONFIG_VERSION = 1
+
+# Sections every configuration holds, with their default settings and empty tables.
+# Plugins can index them directly, e.g. get_config()["goto"]["dirs"].
+DEFAULTS: Dict[str, Any] = {
+    "git": {"profiles": {}},
+    "goto": {"dirs": {}, "roots": []},
+    "run": {"commands": {}},
+    "plugins": {},
+}
+
+# Sample entries of the configuration template installed before configurations were versioned.
+TEMPLATE_SAMPLES = {
+    ("git", "profiles"): {"sample": {"email": "email@email.com", "name": "username"}},
+    ("goto", "dirs"): {"key": "path"},
+    ("run", "commands"): {"key": {"directory": "path", "command": "command"}},
+}
+
+
+def _drop_template_samples(configuration: Dict[str, Any]) -> None:
+    """
+    Removes the sample alias and profile of the configuration template, unless they were edited.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data to migrate.
+    """
+    for (section, table), samples in TEMPLATE_SAMPLES.items():
+        entries = configuration.get(section)
+        entries = entries.get(table) if isinstance(entries, dict) else None
+        if not isinstance(entries, dict):
+            continue
+        for name, value in samples.items():
+            if entries.get(name) == value:
+                del entries[name]
+
+
+# Migration steps, keyed by the version of the configurations they upgrade. A step
+# upgrades a configuration of that version to the next one.
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], None]] = {
+    0: _drop_template_samples,
+}
+
+
+def merge_defaults(configuration: Dict[str, Any], defaults: Dict[str, Any]) -> bool:
+    """
+    Adds the missing keys of the defaults to a configuration, recursively.
+
+    Existing values are kept, and only sections holding a dictionary on both sides are
+    merged, so the entries of a table are never touched.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data, modified in place.
+        defaults (Dict[str, Any]): The default values.
+
+    Returns:
+        bool: True if a key was added, otherwise False.
+    """
+    changed = False
+    for key, default in defaults.items():
+        if key not in configuration:
+            configuration[key] = _copy(default)
+            changed = True
+        elif isinstance(default, dict) and isinstance(configuration[key], dict):
+            changed = merge_defaults(configuration[key], default) or changed
+    return changed
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copies a default value, so configurations never share its dictionaries and lists.
+
+    Parameters:
+        value (Any): The default value.
+
+    Returns:
+        Any: The copy.
+    """
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def upgrade(configuration: Dict[str, Any]) -> bool:
+    """
+    Brings a configuration up to CONFIG_VERSION and adds its missing defaults.
+
+    The migration steps between the version of the configuration, 0 if it has none, and
+    CONFIG_VERSION run in order. Configurations written by a newer version are not
+    migrated, but still get the missing defaults.
+
+    Parameters:
+        configuration (Dict[str, Any]): The configuration data, modified in place.
+
+    Returns:
+        bool: True if the configuration changed, otherwise False.
+    """
+    version = configuration.get(VERSION_KEY, 0)
+    changed = False
+    if isinstance(version, int) and version < CONFIG_VERSION:
+        for step in range(version, CONFIG_VERSION):
+            if step in MIGRATIONS:
+                MIGRATIONS[step](configuration)
+        configuration[VERSION_KEY] = CONFIG_VERSION
+        changed = True
+    return merge_defaults(configuration, DEFAULTS) or changed
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import os
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+from .profile import phase
+
+MAX_CONCURRENCY = 8
+
+
+def _result(command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the initial result of a command, as reported when it could not run.
+
+    Parameters:
+        command (Dict[str, Any]): The command, with its 'args' and optional 'cwd'.
+
+    Returns:
+        Dict[str, Any]: The result, with a None return code and empty output.
+    """
+    return {
+        "args": list(command["args"]),
+        "cwd": command.get("cwd"),
+        "returncode": None,
+        "stdout": "",
+        "stderr": "",
+        "duration": 0.0,
+        "timed_out": False,
+        "error": None,
+    }
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """
+    Kills a process, if it is still running, and waits for it to exit.
+
+    Parameters:
+        process (asyncio.subprocess.Process): The process to kill.
+    """
+    with contextlib.suppress(ProcessLookupError):
+        process.kill()
+    await process.wait()
+
+
+async def _run(
+    command: Dict[str, Any], semaphore: asyncio.Semaphore, timeout: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Runs a command once a concurrency slot is free, capturing its output.
+
+    The process is killed if it exceeds the timeout, or if the command is cancelled.
+
+    Parameters:
+        command (Dict[str, Any]): The command, with its 'args' and optional 'cwd'.
+        semaphore (asyncio.Semaphore): Semaphore limiting the commands running at the same time.
+        timeout (Optional[float]): Maximum duration of the command, in seconds.
+
+    Returns:
+        Dict[str, Any]: The result of the command.
+    """
+    result = _result(command)
+    args = result["args"]
+    async with semaphore:
+        with phase(os.path.basename(args[0]), command=" ".join(args[1:2])):
+            start = time.perf_counter()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *args,
+                    cwd=result["cwd"],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            except OSError as e:
+                result["error"] = str(e)
+                return result
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await _kill(process)
+                result.update(timed_out=True, error=f"Timed out after {timeout:g}s")
+            except asyncio.CancelledError:
+                await _kill(process)
+                raise
+            else:
+                result.update(
+                    returncode=process.returncode,
+                    stdout=stdout.decode("utf-8", errors="replace"),
+                    stderr=stderr.decode("utf-8", errors="replace"),
+                )
+            result["duration"] = time.perf_counter() - start
+    return result
+
+
+async def _gather(
+    commands: List[Dict[str, Any]], timeout: Optional[float], max_concurrency: int
+) -> List[Dict[str, Any]]:
+    """
+    Runs commands concurrently and gathers their results.
+
+    Parameters:
+        commands (List[Dict[str, Any]]): The commands, with their 'args' and optional 'cwd'.
+        timeout (Optional[float]): Maximum duration of every command, in seconds.
+        max_concurrency (int): Maximum number of commands running at the same time.
+
+    Returns:
+        List[Dict[str, Any]]: The results, in the order of the commands.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(_run(command, semaphore, timeout) for command in commands))
+
+
+def run_commands(
+    commands: List[Dict[str, Any]],
+    timeout: Optional[float] = None,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    Runs external commands concurrently, capturing their output, and gathers their results.
+
+    Every result holds the 'args' and 'cwd' of its command, its 'returncode', its decoded
+    'stdout' and 'stderr', its 'duration' in seconds, whether it 'timed_out', and an
+    'error' message if it could not run or timed out, in which case the return code is
+    None. On Ctrl-C, the running commands are killed before KeyboardInterrupt is raised.
+
+    Parameters:
+        commands (List[Dict[str, Any]]): The commands, each with its 'args' list and an optional 'cwd'.
+        timeout (Optional[float]): Maximum duration of every command, in seconds. Defaults to no limit.
+        max_concurrency (int): Maximum number of commands running at the same time.
+
+    Returns:
+        List[Dict[str, Any]]: The results, in the order of the commands.
+    """
+    if not commands:
+        return []
+    return asyncio.run(_gather(commands, timeout, max_concurrency))
+
+
+def run_command(
+    args: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Runs a single external command, capturing its output.
+
+    Parameters:
+        args (List[str]): The command and its arguments.
+        cwd (Optional[str]): The directory to run the command in. Defaults to the current one.
+        timeout (Optional[float]): Maximum duration of the command, in seconds. Defaults to no limit.
+
+    Returns:
+        Dict[str, Any]: The result of the command, as described in run_commands.
+    """
+    return run_commands([{"args": args, "cwd": cwd}], timeout)[0]
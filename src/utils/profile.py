@@ -0,0 +1,156 @@
+import contextlib
+import json
+import math
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_VARIABLE = "IKEIN_PROFILE"
+START_VARIABLE = "IKEIN_T0"
+PROFILE_FILE = "profile.log"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+ENABLED = os.environ.get(PROFILE_VARIABLE) == "1"
+
+# Phases recorded during the current invocation, written to the profile log by flush().
+_phases: List[Dict[str, Any]] = []
+_start = time.perf_counter()
+_disabled = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _timed(name: str, fields: Dict[str, Any]) -> Iterator[None]:
+    """
+    Records the duration of the block as a phase of the current invocation.
+
+    Parameters:
+        name (str): Name of the phase, e.g. "config.read".
+        fields (Dict[str, Any]): Extra fields stored with the phase, e.g. the plugin name.
+
+    Yields:
+        None
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append({"phase": name, "ms": round((time.perf_counter() - start) * 1000, 3), **fields})
+
+
+def start() -> None:
+    """
+    Starts profiling a new invocation, discarding the phases recorded so far.
+
+    Used by the daemon, which serves many invocations from the same process. IKEIN_PROFILE
+    is read again, as every invocation runs with the environment of its client.
+    """
+    global ENABLED, _start
+    ENABLED = os.environ.get(PROFILE_VARIABLE) == "1"
+    _start = time.perf_counter()
+    _phases.clear()
+
+
+def phase(name: str, **fields: Any) -> contextlib.AbstractContextManager:
+    """
+    Returns a context manager timing a phase of the current invocation.
+
+    Nothing is recorded unless IKEIN_PROFILE=1, and the disabled path does not allocate.
+
+    Parameters:
+        name (str): Name of the phase, e.g. "config.read".
+        fields (Any): Extra fields stored with the phase, e.g. the plugin name.
+
+    Returns:
+        contextlib.AbstractContextManager: The context manager wrapping the phase.
+    """
+    if not ENABLED:
+        return _disabled
+    return _timed(name, fields)
+
+
+def _startup_ms() -> Optional[float]:
+    """
+    Computes the time between the ikein.sh call and the start of the Python process.
+
+    ikein.sh exports the time it was called in IKEIN_T0, so this covers the wrapper and
+    the interpreter start.
+
+    Returns:
+        Optional[float]: The startup time in milliseconds, or None if IKEIN_T0 is not set.
+    """
+    try:
+        started = float(os.environ[START_VARIABLE].replace(",", "."))
+    except (KeyError, ValueError):
+        return None
+    return round((time.time() - (time.perf_counter() - _start) - started) * 1000, 3)
+
+
+def flush(command: str) -> None:
+    """
+    Writes the phases of the current invocation to the profile log as a single JSON line.
+
+    The log is rotated once it exceeds MAX_BYTES, keeping BACKUP_COUNT previous files.
+
+    Parameters:
+        command (str): The executed command.
+    """
+    if not ENABLED:
+        return
+
+    import logging.handlers
+
+    from .config import get_path
+
+    record = {
+        "time": round(time.time(), 3),
+        "command": command,
+        "total_ms": round((time.perf_counter() - _start) * 1000, 3),
+        "startup_ms": _startup_ms(),
+        "phases": list(_phases),
+    }
+    handler = logging.handlers.RotatingFileHandler(
+        get_path(PROFILE_FILE), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT
+    )
+    try:
+        handler.emit(logging.makeLogRecord({"msg": json.dumps(record)}))
+    finally:
+        handler.close()
+    _phases.clear()
+
+
+def read_profiles() -> List[Dict[str, Any]]:
+    """
+    Reads the invocations recorded in the profile log and its rotated backups.
+
+    Returns:
+        List[Dict[str, Any]]: The recorded invocations, oldest first.
+    """
+    from .config import get_path
+
+    records = []
+    for index in range(BACKUP_COUNT, -1, -1):
+        path = get_path(PROFILE_FILE + (f".{index}" if index else ""))
+        try:
+            with open(path, "r") as in_file:
+                for line in in_file:
+                    with contextlib.suppress(ValueError):
+                        records.append(json.loads(line))
+        except OSError:
+            continue
+    return records
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Computes a percentile of a list of values with the nearest-rank method.
+
+    Parameters:
+        values (List[float]): The values, which must not be empty.
+        rank (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The value at the given percentile.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * rank / 100) - 1)]
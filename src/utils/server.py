@@ -0,0 +1,218 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import bash, config, profile
+from .config import ROOT_DIRECTORY
+from .wrapper import get_socket_path, is_own_socket
+
+
+class _NonInteractiveInput(io.StringIO):
+    """
+    Stand-in for sys.stdin while a request is served by the daemon.
+
+    The daemon has no terminal attached, so any attempt to read user input marks the
+    request as interactive and makes the client fall back to the cold path.
+    """
+
+    requested: bool = False
+
+    def readline(self, *_: Any) -> str:
+        self.requested = True
+        raise EOFError("Interactive input is not available in server mode.")
+
+
+def _plugins_signature(plugins_directory: str) -> Tuple[Tuple[str, int], ...]:
+    """
+    Computes a signature of the plugin sources based on their modification times.
+
+    Parameters:
+        plugins_directory (str): Absolute path to the plugins directory.
+
+    Returns:
+        Tuple[Tuple[str, int], ...]: Sorted (path, mtime_ns) pairs of every plugin source file.
+    """
+    signature = []
+    for directory, _, files in os.walk(plugins_directory):
+        for filename in files:
+            if filename.endswith(".py"):
+                path = os.path.join(directory, filename)
+                signature.append((path, os.stat(path).st_mtime_ns))
+    return tuple(sorted(signature))
+
+
+def _reload_plugins(plugins_path: str, load: Callable[[str], Tuple]) -> Tuple:
+    """
+    Drops every imported plugin module and loads the plugins again.
+
+    Parameters:
+        plugins_path (str): Name of the plugins package.
+        load (Callable[[str], Tuple]): Loader returning the ikein registry for the package.
+
+    Returns:
+        Tuple: The registry returned by the loader.
+    """
+    for module in list(sys.modules):
+        if module == plugins_path or module.startswith(f"{plugins_path}."):
+            del sys.modules[module]
+    importlib.invalidate_caches()
+    return load(plugins_path)
+
+
+def _bind(path: str) -> socket.socket:
+    """
+    Binds the daemon socket, replacing a stale socket file left by a previous daemon.
+
+    Parameters:
+        path (str): The socket path.
+
+    Returns:
+        socket.socket: The listening server socket.
+    """
+    if os.path.lexists(path):
+        if not is_own_socket(path):
+            raise RuntimeError(f"'{path}' exists and is not a socket owned by the current user.")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            if probe.connect_ex(path) == 0:
+                raise RuntimeError(f"An ikein daemon is already listening on '{path}'.")
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    previous_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(previous_umask)
+    server.listen()
+    return server
+
+
+def run_captured(
+    args: List[str],
+    cwd: str,
+    dispatch: Callable[[List[str]], Optional[str]],
+    env: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Executes a command line in a working directory, capturing its output.
+
+    stdout and stderr are captured, and reading stdin fails as no user can answer, which
+    marks the command as interactive. Commands calling utils.bash.require_foreground are
+    marked the same way.
+
+    Parameters:
+        args (List[str]): Command-line arguments, without the program name.
+        cwd (str): Working directory in which the command must be executed.
+        dispatch (Callable[[List[str]], Optional[str]]): Function that executes a command line and returns the shell command to run.
+        env (Optional[Dict[str, str]]): Environment the command runs with. Defaults to the current one.
+
+    Returns:
+        Dict[str, Any]: The response: whether the command must run in the foreground ('fallback'), its captured 'output' and 'error', and the shell 'command' to run.
+    """
+    stdout, stderr, stdin = io.StringIO(), io.StringIO(), _NonInteractiveInput()
+    previous_directory, previous_stdin = os.getcwd(), sys.stdin
+    previous_environment = None if env is None else dict(os.environ)
+    try:
+        os.chdir(cwd)
+        if env is not None:
+            os.environ.clear()
+            os.environ.update(env)
+        sys.stdin = stdin
+        bash.captured.update(active=True, foreground=False)
+        profile.start()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            command = dispatch(["ikein.py", *args])
+    finally:
+        bash.captured["active"] = False
+        sys.stdin = previous_stdin
+        if previous_environment is not None:
+            os.environ.clear()
+            os.environ.update(previous_environment)
+        os.chdir(previous_directory)
+
+    return {
+        "fallback": stdin.requested or bash.captured["foreground"],
+        "output": stdout.getvalue(),
+        "error": stderr.getvalue(),
+        "command": command,
+    }
+
+
+def _handle(connection: socket.socket, dispatch: Callable[[List[str]], Optional[str]]) -> None:
+    """
+    Serves a single client request.
+
+    The command runs in the client's working directory and environment with stdout and
+    stderr captured, and the captured output is sent back as a single JSON line, together
+    with the shell command to run.
+
+    Parameters:
+        connection (socket.socket): The accepted client connection.
+        dispatch (Callable[[List[str]], Optional[str]]): Function that executes a command line and returns the shell command to run.
+    """
+    with connection.makefile("rb") as reader:
+        payload = json.loads(reader.readline())
+
+    response = run_captured(payload["args"], payload["cwd"], dispatch, payload.get("env"))
+    connection.sendall(json.dumps(response).encode("utf-8") + b"\n")
+
+    # The client is no longer waiting, so journaled configuration updates are folded into
+    # config.json now rather than on the next size-triggered compaction.
+    config.compact()
+
+    # A command that changed the cached configuration without saving it must not leak
+    # those changes into the next request.
+    if config.is_dirty():
+        config.reload()
+
+
+def serve(
+    plugins_path: str,
+    load: Callable[[str], Tuple],
+    dispatch: Callable[[Tuple, List[str]], Optional[str]],
+) -> None:
+    """
+    Runs the ikein daemon until it is interrupted.
+
+    The registry is kept in memory between requests and plugins are reloaded whenever
+    their sources change on disk. The configuration is cached by utils.config and parsed
+    again only when config.json changes on disk.
+
+    Parameters:
+        plugins_path (str): Name of the plugins package.
+        load (Callable[[str], Tuple]): Loader returning the ikein registry for the package.
+        dispatch (Callable[[Tuple, List[str]], Optional[str]]): Executes a command line against the registry and returns the shell command to run.
+    """
+    os.chdir(ROOT_DIRECTORY)
+    plugins_directory = os.path.join(ROOT_DIRECTORY, plugins_path)
+    path = get_socket_path()
+    server = _bind(path)
+    registry = load(plugins_path)
+    signature = _plugins_signature(plugins_directory)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"I.K.E.I.N. daemon listening on '{path}'", flush=True)
+
+    try:
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                current_signature = _plugins_signature(plugins_directory)
+                if current_signature != signature:
+                    registry = _reload_plugins(plugins_path, load)
+                    signature = current_signature
+                try:
+                    _handle(connection, lambda args: dispatch(registry, args))
+                except (OSError, ValueError) as e:
+                    print(f"Request failed: {e}", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
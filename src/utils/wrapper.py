@@ -0,0 +1,75 @@
+import os
+import stat
+import sys
+
+# What the Python entry points share with ikein.sh. Only the standard modules loaded by
+# the interpreter itself are imported, so client.py starts without paying for the rest
+# of ikein.
+COMMAND_FD_VARIABLE = "IKEIN_COMMAND_FD"
+START_COMMAND = "<<START_COMMAND>>"
+END_COMMAND = "<<END_COMMAND>>"
+SOCKET_VARIABLE = "IKEIN_SOCKET"
+SOCKET_NAME = "ikein-{uid}.sock"
+
+
+def get_socket_path() -> str:
+    """
+    Returns the per-user Unix socket path used by the ikein daemon.
+
+    The path can be overridden with the IKEIN_SOCKET environment variable. It must stay
+    in sync with the socket lookup done in ikein.sh.
+
+    Returns:
+        str: The absolute path of the daemon socket.
+    """
+    if os.environ.get(SOCKET_VARIABLE):
+        return os.environ[SOCKET_VARIABLE]
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(directory, SOCKET_NAME.format(uid=os.getuid()))
+
+
+def is_own_socket(path: str) -> bool:
+    """
+    Tells whether a path is a Unix socket owned by the current user.
+
+    The default socket directory may be shared with other users, who could otherwise
+    create the socket first and answer with commands that the shell would run.
+
+    Parameters:
+        path (str): The socket path.
+
+    Returns:
+        bool: True if the path is a socket owned by the current user, otherwise False.
+    """
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def emit_command(command: str) -> None:
+    """
+    Hands the shell command to run over to ikein.sh.
+
+    The command is written, as a whole, to the file descriptor named by the
+    IKEIN_COMMAND_FD environment variable, keeping it apart from the output displayed to
+    the user. When that descriptor is not available, e.g. when ikein.py is run directly,
+    the command is printed between the START_COMMAND and END_COMMAND markers instead.
+
+    Parameters:
+        command (str): The shell command to run.
+    """
+    try:
+        descriptor = int(os.environ[COMMAND_FD_VARIABLE])
+        data = command.encode("utf-8")
+        sys.stdout.flush()
+        while data:
+            data = data[os.write(descriptor, data) :]
+        return
+    except (KeyError, ValueError, OSError):
+        pass
+
+    print(START_COMMAND)
+    print(command)
+    print(END_COMMAND)